@@ -8,18 +8,36 @@ import numpy as np
 import pandas as pd
 from pathlib import Path
 import joblib
-import json
 from datetime import datetime, timedelta
 import hashlib
 import warnings
 import nest_asyncio
 import os
-import requests
 import gzip
 import plotly.graph_objects as go
-import shutil
+import tempfile
 import random
-import math
+import time
+import queue
+
+from src.betting.odds_scanner import NameIndex, read_odds, odds_files, edges_and_kelly, top_value_bets
+from src.betting.devig import devig, METHODS as DEVIG_METHODS, DEFAULT_METHOD as DEVIG_DEFAULT
+from src.betting.portfolio import simultaneous_kelly, same_player_corr
+from src.betting.combos import build_combos
+from src.tennis.markov import anchored_distribution, anchored_serves, prob_total_over, prob_handicap, DEFAULT_SERVE
+from src.tennis.inplay import ScoreFeed, LiveBoard
+from src.tennis.draw_sim import read_bracket, elo_win_matrix, blend_win_matrix, simulate_draw, round_labels
+from src.data.feature_store import data_manifest
+from src.services.memo import LRUCache, version_token
+from src.services.prediction_store import PredictionStore
+from src.services.file_cache import JsonFileCache
+from src.services.backups import BackupRepo
+from src.services.telegram_queue import TelegramQueue
+from src.services.http_client import HttpClient
+from src.services.fanout import FanOut
+from src.services.llm_cache import LLMCache
+from src.services.llm_stream import stream_openai, stream_claude
+from src.models.calibration import Calibrator, compile_calibrator, SURFACE_KEYS as CALIB_SURFACES
 
 nest_asyncio.apply()
 warnings.filterwarnings("ignore")
@@ -29,19 +47,38 @@ MODELS_DIR = ROOT_DIR / "models"
 DATA_DIR   = ROOT_DIR / "src" / "data" / "raw" / "tml-tennis"
 HIST_DIR   = ROOT_DIR / "history"
 BACKUP_DIR = ROOT_DIR / "backups"
+ODDS_DIR   = ROOT_DIR / "odds"
+LIVE_FEED  = ROOT_DIR / "live" / "scores.jsonl"
+DRAWS_DIR  = ROOT_DIR / "draws"
 
 for d in [MODELS_DIR, DATA_DIR, HIST_DIR, BACKUP_DIR]:
     d.mkdir(exist_ok=True, parents=True)
 
-HIST_FILE         = HIST_DIR / "predictions_history.json"
-USER_STATS_FILE   = HIST_DIR / "user_stats.json"
+HIST_FILE         = HIST_DIR / "predictions_history.json"   # ancien format, migré une fois
+PRED_DB_FILE      = HIST_DIR / "predictions.db"
 ACHIEVEMENTS_FILE = HIST_DIR / "achievements.json"
 METADATA_FILE     = MODELS_DIR / "model_metadata.json"
 ELO_CACHE_FILE    = HIST_DIR / "elo_ratings.json"
+TG_QUEUE_FILE     = HIST_DIR / "telegram_queue.db"
+LLM_CACHE_FILE    = HIST_DIR / "llm_cache.db"
 
 SURFACES         = ["Hard", "Clay", "Grass"]
-MIN_EDGE_COMBINE = 0.02
+MIN_EDGE_COMBINE = 0.02  # edge min d'un value bet / d'un combiné
 MAX_MATCHES      = 30
+VB_TOP_K         = 200   # value bets conservés par le scanner
+KELLY_FRACTION   = 0.25  # Kelly fractionné
+MAX_EXPOSURE     = 0.10  # exposition totale max du portefeuille du jour
+COMBO_MIN_PROBA  = 0.05  # proba min d'un combiné
+COMBO_TOP_K      = 10
+VB_PAGE_SIZE     = 10    # cartes affichées par page
+AI_TIMEOUT       = 120   # s, attente max de l'ensemble des analyses IA
+AI_REFRESH       = 0.15  # s entre deux rafraîchissements d'une analyse en cours
+LLM_CACHE_TTL    = 7*24*3600  # réponses IA conservées une semaine
+LLM_CACHE_MAX    = 2000  # entrées (LRU au-delà)
+PRED_CACHE_SIZE  = 256   # prédictions mémoïsées (LRU)
+PRED_CACHE_TTL   = 1800  # secondes
+BACKUP_DAILY     = 30    # rétention : un instantané par jour sur 30 jours
+BACKUP_WEEKLY    = 52    # puis un par semaine sur un an
 
 # ─── ELO configuration ───────────────────────────────────────
 ELO_K_BASE    = 32       # K-factor de base
@@ -345,26 +382,11 @@ def get_elo_ratings():
     """Retourne le dict ELO (depuis cache session ou recalcul)."""
     if "elo_ratings" not in st.session_state:
         with st.spinner("Calcul des cotes ELO depuis l'historique..."):
-            st.session_state["elo_ratings"] = compute_elo_from_csv()
+            elo = compute_elo_from_csv()
+            st.session_state["elo_ratings"] = elo
+            st.session_state["elo_token"] = version_token(len(elo), round(sum(d["global"] for d in elo.values()), 1))
     return st.session_state["elo_ratings"]
 
-def elo_proba(p1, p2, surface):
-    """
-    Probabilité basée sur l'ELO.
-    Combine ELO global (30%) + ELO surface (70%).
-    """
-    elo = get_elo_ratings()
-    if p1 not in elo or p2 not in elo:
-        return None
-    d1 = elo[p1]; d2 = elo[p2]
-    # ELO global
-    p_global  = _elo_expected(d1["global"], d2["global"])
-    # ELO surface
-    p_surface = _elo_expected(d1.get(surface, ELO_BASE), d2.get(surface, ELO_BASE))
-    # Mix pondéré
-    p = 0.30 * p_global + 0.70 * p_surface
-    return max(0.05, min(0.95, p))
-
 def elo_diff_info(p1, p2, surface):
     """Retourne texte info ELO pour affichage."""
     elo = get_elo_ratings()
@@ -446,15 +468,6 @@ def get_momentum():
         st.session_state["momentum_cache"] = compute_momentum()
     return st.session_state["momentum_cache"]
 
-def momentum_diff(p1, p2):
-    """Retourne (score_p1, score_p2, avantage_p1_en_proba)."""
-    m = get_momentum()
-    s1 = m.get(p1, 0.5)
-    s2 = m.get(p2, 0.5)
-    # Conversion diff → avantage probabiliste (max ±8%)
-    diff = (s1 - s2) * 0.16
-    return round(s1, 3), round(s2, 3), diff
-
 # ═══════════════════════════════════════════════════════════════
 # H2H PONDÉRÉ (H2H récent compte plus)
 # ═══════════════════════════════════════════════════════════════
@@ -485,68 +498,179 @@ def load_h2h_full():
             continue
     return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
 
-def get_h2h(p1, p2, surface=None):
-    """H2H avec pondération temporelle et optionnellement filtré par surface."""
+@st.cache_resource(ttl=3600, show_spinner=False)
+def load_h2h_index():
+    """
+    Index H2H précalculé : {(vainqueur, perdant): {n, w, surf}}.
+    Partagé en lecture seule (cache_resource : pas de copie par appel), ne pas le modifier.
+    Pondération temporelle : < 1 an × 2, < 2 ans × 1.5, < 3 ans × 1, au-delà × 0.5.
+    Une recherche H2H devient un accès dict au lieu d'un filtre sur tout l'historique.
+    """
     df = load_h2h_full()
     if df.empty:
-        return None
-    mask = (((df.winner_name == p1) & (df.loser_name == p2)) |
-            ((df.winner_name == p2) & (df.loser_name == p1)))
-    h = df[mask].copy()
-    if len(h) == 0:
-        return None
-
-    # H2H sur cette surface
-    h_surf = h[h["surface"] == surface] if surface and "surface" in h.columns else pd.DataFrame()
-
-    # Pondération temporelle : matchs récents × 2, plus de 3 ans × 0.5
-    now = pd.Timestamp.now()
-    weights = []
-    if "tourney_date" in h.columns:
-        for dt in h["tourney_date"]:
-            if pd.isna(dt):
-                w = 1.0
-            else:
-                days = (now - dt).days
-                if days < 365:     w = 2.0
-                elif days < 730:   w = 1.5
-                elif days < 1095:  w = 1.0
-                else:              w = 0.5
-            weights.append(w)
+        return {}
+    if "tourney_date" in df.columns:
+        days = (pd.Timestamp.now() - df["tourney_date"]).dt.days
+        w = np.select([days < 365, days < 730, days < 1095], [2.0, 1.5, 1.0], 0.5)
+        w = np.where(days.isna(), 1.0, w)
     else:
-        weights = [1.0] * len(h)
-
-    p1_wins = sum(w for w, row in zip(weights, h.itertuples()) if row.winner_name == p1)
-    p2_wins = sum(w for w, row in zip(weights, h.itertuples()) if row.winner_name == p2)
-    total_w = p1_wins + p2_wins
+        w = np.ones(len(df))
+    df = df.assign(_w=w)
+    pairs = df.groupby(["winner_name", "loser_name"], sort=False)["_w"].agg(["size", "sum"])
+    index = {k: {"n": int(n), "w": float(sw), "surf": {}}
+             for k, n, sw in zip(pairs.index, pairs["size"].to_numpy(), pairs["sum"].to_numpy())}
+    if "surface" in df.columns:
+        by_surf = df.groupby(["winner_name", "loser_name", "surface"], sort=False).size()
+        for (wn, ln, sf), n in zip(by_surf.index, by_surf.to_numpy()):
+            index[(wn, ln)]["surf"][sf] = int(n)
+    return index
 
+def get_h2h(p1, p2, surface=None):
+    """H2H avec pondération temporelle et optionnellement filtré par surface."""
+    idx = load_h2h_index()
+    a = idx.get((p1, p2)); b = idx.get((p2, p1))
+    if not a and not b:
+        return None
+    a = a or {"n": 0, "w": 0.0, "surf": {}}
+    b = b or {"n": 0, "w": 0.0, "surf": {}}
+    surf_p1 = a["surf"].get(surface, 0) if surface else 0
+    surf_p2 = b["surf"].get(surface, 0) if surface else 0
     return {
-        "total":      len(h),
-        "p1_wins":    len(h[h.winner_name == p1]),
-        "p2_wins":    len(h[h.winner_name == p2]),
-        "p1_wins_w":  round(p1_wins, 2),
-        "p2_wins_w":  round(p2_wins, 2),
-        "total_w":    round(total_w, 2),
-        "surf_total": len(h_surf),
-        "surf_p1":    len(h_surf[h_surf.winner_name == p1]) if not h_surf.empty else 0,
-        "surf_p2":    len(h_surf[h_surf.winner_name == p2]) if not h_surf.empty else 0,
+        "total":      a["n"] + b["n"],
+        "p1_wins":    a["n"],
+        "p2_wins":    b["n"],
+        "p1_wins_w":  round(a["w"], 2),
+        "p2_wins_w":  round(b["w"], 2),
+        "total_w":    round(a["w"] + b["w"], 2),
+        "surf_total": surf_p1 + surf_p2,
+        "surf_p1":    surf_p1,
+        "surf_p2":    surf_p2,
     }
 
-def h2h_proba(h2h, p1):
-    """Probabilité H2H pondérée."""
-    if not h2h or h2h["total_w"] == 0:
-        return 0.5
-    return min(0.9, max(0.1, h2h["p1_wins_w"] / h2h["total_w"]))
-
 # ═══════════════════════════════════════════════════════════════
 # ENSEMBLE DE MODÈLES — FUSION RF + ELO + MOMENTUM + H2H
 # ═══════════════════════════════════════════════════════════════
-def logit(p):
-    p = max(0.001, min(0.999, p))
-    return math.log(p / (1 - p))
+def _history_outcomes(h):
+    """(surfaces, probas brutes, J1 gagnant) des pronostics résolus de l'historique."""
+    rows = [(p.get("surface"), p.get("proba_raw", p.get("proba")), float(p["vainqueur_reel"] == p.get("player1")))
+            for p in h if p.get("statut") in ("gagne", "perdu") and p.get("vainqueur_reel")
+            and p.get("proba_raw", p.get("proba")) is not None]
+    return tuple(zip(*rows)) if rows else ((), (), ())
+
+def load_calibrator():
+    """Calibrateur par surface : a priori joblib + historique résolu, gardé en session."""
+    if "calibrator" not in st.session_state:
+        priors = {}
+        for s in CALIB_SURFACES:
+            f = MODELS_DIR / ("tennis_calibrator_" + s + ".joblib")
+            if f.exists():
+                try: priors[s] = compile_calibrator(joblib.load(f))
+                except Exception: pass
+        cal = Calibrator(priors)
+        surfs, probas, outcomes = _history_outcomes(get_store().query(statut=("gagne", "perdu")))
+        if surfs: cal.add_many(surfs, probas, outcomes)
+        st.session_state["calibrator"] = cal
+    return st.session_state["calibrator"]
+
+ENSEMBLE_SIGNALS = ["RF", "ELO", "Momentum", "H2H"]
+ENSEMBLE_WEIGHTS = np.array([0.45, 0.30, 0.15, 0.10])
+
+def ensemble_batch(matchups, mi, h2h_list=None):
+    """
+    Ensemble vectorisé pour N matchs [(p1, p2, surface, tournoi), ...].
 
-def inv_logit(x):
-    return 1.0 / (1.0 + math.exp(-x))
+    Chaque signal devient une colonne de la matrice `P` (N × 4, NaN si absent) ;
+    le mélange log-odds pondéré, la renormalisation des poids manquants et la
+    confiance sont calculés en opérations sur tableaux. Les dicts détaillés
+    attendus par l'UI sont construits à la demande par ensemble_details().
+    """
+    n = len(matchups)
+    if h2h_list is None:
+        h2h_list = [get_h2h(p1, p2, s) for p1, p2, s, _ in matchups]
+    elo = get_elo_ratings(); mom = get_momentum()
+    P = np.full((n, 4), np.nan)
+
+    # ── H2H pondéré (ratio aussi utilisé comme feature du RF) ──
+    h2h_tot  = np.array([h["total"] if h else 0 for h in h2h_list], dtype=float)
+    h2h_w1   = np.array([h["p1_wins_w"] if h else 0.0 for h in h2h_list])
+    h2h_totw = np.array([h["total_w"] if h else 0.0 for h in h2h_list])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        h2h_p = np.where(h2h_totw > 0, np.clip(h2h_w1 / np.where(h2h_totw > 0, h2h_totw, 1), 0.1, 0.9), 0.5)
+    P[:, 3] = np.where(h2h_tot >= 2, h2h_p, np.nan)
+
+    # ── RF : une seule prédiction pour tout le lot ─────────────
+    rf_p, rf_status = predict_rf_batch(matchups, h2h_p, mi)
+    P[:, 0] = rf_p
+
+    # ── ELO global 30% + surface 70% ───────────────────────────
+    def _elo(p, key):
+        d = elo.get(p)
+        return np.nan if d is None else d.get(key, ELO_BASE)
+    g1 = np.array([_elo(p1, "global") for p1, _, _, _ in matchups], dtype=float)
+    g2 = np.array([_elo(p2, "global") for _, p2, _, _ in matchups], dtype=float)
+    s1 = np.array([_elo(p1, s) for p1, _, s, _ in matchups], dtype=float)
+    s2 = np.array([_elo(p2, s) for _, p2, s, _ in matchups], dtype=float)
+    p_glob = 1.0 / (1.0 + 10.0 ** ((g2 - g1) / 400.0))
+    p_surf = 1.0 / (1.0 + 10.0 ** ((s2 - s1) / 400.0))
+    P[:, 1] = np.clip(0.30 * p_glob + 0.70 * p_surf, 0.05, 0.95)
+
+    # ── Momentum (toujours présent, 0.5 par défaut) ────────────
+    m1 = np.array([mom.get(p1, 0.5) for p1, _, _, _ in matchups], dtype=float)
+    m2 = np.array([mom.get(p2, 0.5) for _, p2, _, _ in matchups], dtype=float)
+    P[:, 2] = np.clip(0.5 + (m1 - m2) * 0.16, 0.05, 0.95)
+
+    # ── Mélange log-odds avec renormalisation des poids ────────
+    active = ~np.isnan(P)
+    W = np.where(active, ENSEMBLE_WEIGHTS, 0.0)
+    Pc = np.clip(np.where(active, P, 0.5), 0.001, 0.999)
+    P = np.round(P, 4)
+    log_odds = (W * np.log(Pc / (1 - Pc))).sum(axis=1) / W.sum(axis=1)
+    raw = 1.0 / (1.0 + np.exp(-log_odds))
+    # ── Calibration par surface (un seul np.interp) ────────────
+    proba = np.round(np.clip(load_calibrator().apply(raw, [s for _, _, s, _ in matchups]), 0.05, 0.95), 4)
+
+    # ── Confiance multi-facteurs ───────────────────────────────
+    n_active = active.sum(axis=1)
+    mean = np.where(active, P, 0).sum(axis=1) / n_active
+    std = np.sqrt(np.where(active, (np.where(active, P, 0) - mean[:, None]) ** 2, 0).sum(axis=1) / n_active)
+    elo_diff = np.round(s1 - s2)
+    conf = (40.0
+            + np.abs(proba - 0.5) * 50                      # écart à 0.5 → max +25
+            + n_active * 2.5                                # sources actives → max +10
+            - np.where(n_active >= 2, std * 40, 0.0)        # signaux divergents → pénalité
+            + np.select([h2h_tot >= 5, h2h_tot >= 2], [8.0, 4.0], 0.0)
+            + np.where(np.isnan(elo_diff), 0.0, np.minimum(8, np.abs(elo_diff) / 50)))
+    conf = np.round(np.clip(conf, 10.0, 100.0), 1)
+
+    return {"matchups": matchups, "h2h": h2h_list, "P": P, "active": active,
+            "proba": proba, "proba_raw": np.round(raw, 4), "conf": conf, "h2h_p": np.round(h2h_p, 4),
+            "elo_s1": s1, "elo_s2": s2, "mom1": m1, "mom2": m2,
+            "rf_status": rf_status}
+
+def ensemble_details(batch, i):
+    """Reconstruit (proba, détails_dict, sources) pour le match i du lot."""
+    P, active = batch["P"], batch["active"]
+    details = {}
+    if active[i, 0]:
+        details["RF"] = {"proba": float(P[i, 0]), "weight": 0.45, "status": "ok"}
+    else:
+        details["RF"] = {"proba": None, "weight": 0, "status": "absent"}
+    if active[i, 1]:
+        e1, e2 = batch["elo_s1"][i], batch["elo_s2"][i]
+        details["ELO"] = {"proba": float(P[i, 1]), "weight": 0.30,
+                          "elo_p1": round(e1), "elo_p2": round(e2), "diff": round(e1 - e2)}
+    else:
+        details["ELO"] = {"proba": None, "weight": 0}
+    details["Momentum"] = {"proba": float(P[i, 2]), "weight": 0.15,
+                           "score_p1": round(float(batch["mom1"][i]), 3),
+                           "score_p2": round(float(batch["mom2"][i]), 3)}
+    h2h_data = batch["h2h"][i]
+    if active[i, 3]:
+        details["H2H"] = {"proba": float(batch["h2h_p"][i]), "weight": 0.10, "total": h2h_data["total"]}
+    else:
+        details["H2H"] = {"proba": float(batch["h2h_p"][i]), "weight": 0, "total": 0}
+    sources = [k for k, v in details.items() if v.get("weight", 0) > 0]
+    return float(batch["proba"][i]), details, sources
 
 def ensemble_proba(p1, p2, surface, tournament, h2h_data, mi):
     """
@@ -561,111 +685,54 @@ def ensemble_proba(p1, p2, surface, tournament, h2h_data, mi):
     Si un signal est absent, son poids est redistribué.
     Retourne (proba, détails_dict, sources_utilisées)
     """
-    details  = {}
-    log_odds = 0.0
-    total_w  = 0.0
-
-    # ── Signal 1 : Modèle RF ─────────────────────────────────
-    rf_p = None
-    if mi:
-        ratio = h2h_proba(h2h_data, p1) if h2h_data else 0.5
-        rf_p, rf_status = predict_rf(p1, p2, surface, tournament, ratio, mi)
-    if rf_p is not None:
-        w = 0.45
-        log_odds += w * logit(rf_p)
-        total_w  += w
-        details["RF"] = {"proba": round(rf_p, 4), "weight": w, "status": "ok"}
-    else:
-        details["RF"] = {"proba": None, "weight": 0, "status": "absent"}
-
-    # ── Signal 2 : ELO surface ───────────────────────────────
-    elo_p = elo_proba(p1, p2, surface)
-    if elo_p is not None:
-        w = 0.30
-        log_odds += w * logit(elo_p)
-        total_w  += w
-        e1, e2, ediff = elo_diff_info(p1, p2, surface)
-        details["ELO"] = {"proba": round(elo_p, 4), "weight": w,
-                           "elo_p1": e1, "elo_p2": e2, "diff": ediff}
-    else:
-        details["ELO"] = {"proba": None, "weight": 0}
-
-    # ── Signal 3 : Momentum ──────────────────────────────────
-    m1, m2, mom_diff = momentum_diff(p1, p2)
-    mom_p = max(0.05, min(0.95, 0.5 + mom_diff))
-    w_mom = 0.15
-    log_odds += w_mom * logit(mom_p)
-    total_w  += w_mom
-    details["Momentum"] = {"proba": round(mom_p, 4), "weight": w_mom,
-                            "score_p1": m1, "score_p2": m2}
-
-    # ── Signal 4 : H2H pondéré ───────────────────────────────
-    h2h_p = h2h_proba(h2h_data, p1)
-    if h2h_data and h2h_data["total"] >= 2:
-        w = 0.10
-        log_odds += w * logit(h2h_p)
-        total_w  += w
-        details["H2H"] = {"proba": round(h2h_p, 4), "weight": w,
-                           "total": h2h_data["total"]}
-    else:
-        details["H2H"] = {"proba": round(h2h_p, 4), "weight": 0, "total": 0}
-
-    # ── Normalisation si total_w < 1 ─────────────────────────
-    if total_w == 0:
-        return 0.5, details, []
-    log_odds_norm = log_odds / total_w
-    proba = inv_logit(log_odds_norm)
-    proba = max(0.05, min(0.95, proba))
-
-    sources = [k for k, v in details.items() if v.get("weight", 0) > 0]
-    return round(proba, 4), details, sources
+    batch = ensemble_batch([(p1, p2, surface, tournament)], mi, [h2h_data])
+    return ensemble_details(batch, 0)
 
 # ═══════════════════════════════════════════════════════════════
-# CONFIANCE MULTI-FACTEURS
+# MÉMOÏSATION DES PRÉDICTIONS
 # ═══════════════════════════════════════════════════════════════
-def calc_confidence_v2(proba, details, h2h_data):
+def get_pred_cache():
+    if "pred_cache" not in st.session_state:
+        st.session_state["pred_cache"] = LRUCache(PRED_CACHE_SIZE, PRED_CACHE_TTL)
+    return st.session_state["pred_cache"]
+
+def prediction_version():
+    """Jeton modèle RF chargé + ELO + manifest des CSV + calibration : tout changement vide le cache."""
+    get_elo_ratings(); cal = load_calibrator()
+    files = sorted(DATA_DIR.glob("*.csv")) if DATA_DIR.exists() else []
+    return version_token(st.session_state.get("rf_model_token"), st.session_state.get("elo_token"),
+                         data_manifest(files), id(cal), cal.version)
+
+def predict_matches(matches, mi):
     """
-    Score de confiance 0-100 basé sur :
-    - Écart de proba par rapport à 0.5
-    - Nombre de sources d'accord
-    - Quantité de données H2H
-    - Cohérence entre les signaux
-    - ELO diff
+    Résultat complet par match (ensemble, distributions, value bets, paris
+    alternatifs), clé (p1, p2, surface, tournoi, cotes, de-margination).
+    Seuls les matchs absents du cache passent par ensemble_batch.
     """
-    score = 40.0
-
-    # Écart par rapport à 0.5 → max +25
-    score += abs(proba - 0.5) * 50
-
-    # Nombre de sources actives → max +10
-    active = sum(1 for v in details.values() if v.get("weight", 0) > 0)
-    score += active * 2.5
-
-    # Cohérence entre les signaux → pénalité si divergence
-    proba_vals = [v["proba"] for v in details.values()
-                  if v.get("proba") is not None and v.get("weight", 0) > 0]
-    if len(proba_vals) >= 2:
-        std = np.std(proba_vals)
-        # std élevé = signaux divergents → pénalité
-        score -= std * 40
-
-    # H2H data
-    if h2h_data and h2h_data.get("total", 0) >= 5:
-        score += 8
-    elif h2h_data and h2h_data.get("total", 0) >= 2:
-        score += 4
-
-    # ELO diff important → signe clair
-    elo_d = details.get("ELO", {})
-    if elo_d.get("diff") is not None:
-        score += min(8, abs(elo_d["diff"]) / 50)
-
-    return round(min(100.0, max(10.0, score)), 1)
+    cache = get_pred_cache()
+    cache.set_version(prediction_version())
+    dv = get_devig_method()
+    keys = [(m["p1"], m["p2"], m["surf"], m["tourn"], m["o1"], m["o2"], dv) for m in matches]
+    out = [cache.get(k) for k in keys]
+    miss = [i for i, r in enumerate(out) if r is None]
+    if miss:
+        batch = ensemble_batch([keys[i][:4] for i in miss], mi)
+        dists = match_distributions(batch["matchups"], batch["proba"], mi)
+        for j, i in enumerate(miss):
+            p1, p2, surf, tourn, o1, o2, _ = keys[i]
+            proba, details, sources = ensemble_details(batch, j)
+            best_val, vb_analyse = compute_value_bets(p1, p2, proba, o1, o2, dv)
+            out[i] = {"proba": proba, "details": details, "sources": sources,
+                      "conf": float(batch["conf"][j]), "proba_raw": float(batch["proba_raw"][j]),
+                      "h2h": batch["h2h"][j], "best_val": best_val, "vb_analyse": vb_analyse,
+                      "alt": _alt_bets(p1, p2, proba, dists[j], get_level(tourn)[1])}
+            cache.put(keys[i], out[i])
+    return out
 
 # ═══════════════════════════════════════════════════════════════
 # CRITÈRE DE KELLY — DIMENSIONNEMENT DE LA MISE
 # ═══════════════════════════════════════════════════════════════
-def kelly_fraction(proba, cote, fraction=0.25):
+def kelly_fraction(proba, cote, fraction=KELLY_FRACTION):
     """
     Calcule la fraction Kelly.
     fraction=0.25 = Kelly fractionné (recommandé pour limiter le risque).
@@ -680,9 +747,14 @@ def kelly_fraction(proba, cote, fraction=0.25):
         return 0.0
     return round(kf * fraction, 4)  # Kelly fractionné
 
-def compute_value_bets(p1, p2, proba, o1_str, o2_str):
+def get_devig_method():
+    return st.session_state.get("devig_method", DEVIG_DEFAULT)
+
+def compute_value_bets(p1, p2, proba, o1_str, o2_str, devig_method=None):
     """
     Calcule les value bets avec edge, Kelly, et classification qualité.
+    L'edge est mesuré contre la proba implicite dé-marginée (devig_method,
+    par défaut celle choisie dans la sidebar), pas contre 1/cote brut.
     Retourne (best_val_dict_or_None, analyse_dict)
     """
     best_val = None
@@ -693,14 +765,15 @@ def compute_value_bets(p1, p2, proba, o1_str, o2_str):
     if o1f <= 1.0 or o2f <= 1.0:
         return None, {}
 
-    # Probabilité implicite des cotes (marges comprises)
-    impl1 = 1.0 / o1f
-    impl2 = 1.0 / o2f
-    marge = impl1 + impl2 - 1.0  # marge bookmaker
+    # Probabilité implicite brute (marge comprise) puis dé-marginée
+    marge = 1.0 / o1f + 1.0 / o2f - 1.0  # marge bookmaker
+    impl1, impl2 = map(float, devig([o1f, o2f], devig_method or get_devig_method()))
 
     e1 = proba - impl1
     e2 = (1 - proba) - impl2
 
+    # Kelly volontairement sur la cote brute : c'est le prix réellement payé. La dé-margination
+    # ne sert qu'à estimer la proba « juste » du marché pour mesurer l'edge.
     kf1 = kelly_fraction(proba,        o1f)
     kf2 = kelly_fraction(1 - proba,    o2f)
 
@@ -710,14 +783,15 @@ def compute_value_bets(p1, p2, proba, o1_str, o2_str):
         if edge >= 0.02: return "C", "#FFB200", "Acceptable"
         return "D", "#FF4757", "Faible"
 
-    for player, edge, cote, proba_b, kf in [
-        (p1, e1, o1f, proba,     kf1),
-        (p2, e2, o2f, 1-proba,   kf2),
+    for player, edge, cote, proba_b, kf, impl in [
+        (p1, e1, o1f, proba,     kf1, impl1),
+        (p2, e2, o2f, 1-proba,   kf2, impl2),
     ]:
         grade, color, label = quality(edge)
         analyse[player] = {
             "edge": round(edge, 4), "cote": cote,
-            "proba": round(proba_b, 4), "implied": round(1/cote, 4),
+            "proba": round(proba_b, 4), "implied": round(impl, 4),
+            "implied_raw": round(1/cote, 4),
             "kelly": kf, "grade": grade, "color": color, "label": label,
             "marge": round(marge, 4),
         }
@@ -734,6 +808,11 @@ def compute_value_bets(p1, p2, proba, o1_str, o2_str):
 # ═══════════════════════════════════════════════════════════════
 # MODÈLE RF — inchangé
 # ═══════════════════════════════════════════════════════════════
+@st.cache_resource(show_spinner=False)
+def get_http():
+    """Client HTTP partagé (sessions keep-alive par hôte, disjoncteurs, latences)."""
+    return HttpClient()
+
 def load_rf_model():
     if "rf_model_cache" in st.session_state:
         return st.session_state["rf_model_cache"]
@@ -751,7 +830,7 @@ def load_rf_model():
             with st.spinner("Telechargement du modele RF..."):
                 url = ("https://github.com/Xela91300/sports-betting-neural-net"
                        "/releases/latest/download/tennis_ml_model_complete.pkl.gz")
-                r = requests.get(url, timeout=60)
+                r = get_http().get("github", url)
                 if r.status_code == 200:
                     tmp = MODELS_DIR / "model_temp.pkl.gz"
                     tmp.write_bytes(r.content)
@@ -762,20 +841,17 @@ def load_rf_model():
         except Exception as e:
             st.warning("Modele non telecharge: " + str(e))
     st.session_state["rf_model_cache"] = model_info
+    # Nouveau jeton à chaque chargement : invalide les prédictions mémoïsées
+    st.session_state["rf_model_token"] = version_token(model_info is not None, time.time_ns())
     return model_info
 
+@st.cache_resource(show_spinner=False)
+def get_file_cache():
+    """Cache des fichiers d'état JSON (un par processus, revalidé par stat())."""
+    return JsonFileCache()
+
 def load_model_metadata():
-    if "model_metadata_cache" in st.session_state:
-        return st.session_state["model_metadata_cache"]
-    result = {}
-    if METADATA_FILE.exists():
-        try:
-            with open(METADATA_FILE) as fh:
-                result = json.load(fh)
-        except Exception:
-            pass
-    st.session_state["model_metadata_cache"] = result
-    return result
+    return get_file_cache().read(METADATA_FILE, {})
 
 def extract_21_features(ps, p1, p2, surface, level="A", best_of=3, h2h_r=0.5):
     s1, s2 = ps.get(p1, {}), ps.get(p2, {})
@@ -821,6 +897,27 @@ def predict_rf(p1, p2, surface, tournament, h2h_r, mi):
     except Exception as e:
         return None, str(e)[:30]
 
+def predict_rf_batch(matchups, h2h_ratios, mi):
+    """Probas RF pour un lot de matchs en un seul transform + predict_proba (NaN si indisponible)."""
+    n = len(matchups)
+    out = np.full(n, np.nan)
+    if mi is None: return out, ["absent"] * n
+    m, sc, ps = mi.get("model"), mi.get("scaler"), mi.get("player_stats", {})
+    if m is None or sc is None: return out, ["incomplet"] * n
+    status = ["joueurs_inconnus"] * n
+    rows, feats = [], []
+    for i, (p1, p2, surface, tournament) in enumerate(matchups):
+        if p1 not in ps or p2 not in ps: continue
+        lv, bo = get_level(tournament)
+        rows.append(i); feats.append(extract_21_features(ps, p1, p2, surface, lv, bo, h2h_ratios[i]))
+    if rows:
+        try:
+            out[rows] = np.clip(m.predict_proba(sc.transform(np.vstack(feats)))[:, 1], 0.05, 0.95)
+            for i in rows: status[i] = "ok"
+        except Exception as e:
+            for i in rows: status[i] = str(e)[:30]
+    return out, status
+
 # ═══════════════════════════════════════════════════════════════
 # DONNÉES CSV
 # ═══════════════════════════════════════════════════════════════
@@ -843,70 +940,80 @@ def load_players():
         except Exception: pass
     return sorted(p for p in players if p and p.lower() != "nan" and len(p) > 1)
 
+@st.cache_resource(ttl=3600, show_spinner=False)
+def load_name_index():
+    """Index des noms partagé (cache_resource, sans copie par scan) ; lecture seule."""
+    return NameIndex(load_players())
+
+@st.cache_data(max_entries=4, ttl=3600, show_spinner=False)
+def _load_odds_cached(path, manifest):
+    return read_odds(path)
+
+def load_odds_markets(path):
+    """Marchés du fichier/répertoire de cotes ; rechargés seulement si un fichier change."""
+    files = odds_files(path)
+    return _load_odds_cached(str(path), tuple(data_manifest(files)))
+
 # ═══════════════════════════════════════════════════════════════
 # HISTORIQUE & STATS
 # ═══════════════════════════════════════════════════════════════
+@st.cache_resource(show_spinner=False)
+def get_store():
+    """Base SQLite des pronostics (une par processus) ; importe l'ancien JSON au premier lancement."""
+    store = PredictionStore(PRED_DB_FILE)
+    store.migrate_json(HIST_FILE)
+    return store
+
 def load_history():
-    if not HIST_FILE.exists(): return []
-    try:
-        with open(HIST_FILE, "r", encoding="utf-8") as f: return json.load(f)
-    except Exception: return []
+    return get_store().query()
 
 def save_pred(pred):
     try:
-        h = load_history()
         pred["id"] = hashlib.md5((str(datetime.now())+pred.get("player1","")).encode()).hexdigest()[:8]
         pred["statut"] = "en_attente"
         pred["vainqueur_reel"] = None
         pred["pronostic_correct"] = None
-        h.append(pred)
-        with open(HIST_FILE, "w", encoding="utf-8") as f:
-            json.dump(h[-1000:], f, indent=2, ensure_ascii=False)
+        get_store().insert(pred)
         return True
     except Exception: return False
 
 def update_pred_result(pred_id, statut, vainqueur_reel=None):
     try:
-        h = load_history()
-        for p in h:
-            if p.get("id") == pred_id:
-                p["statut"] = statut
-                p["date_maj"] = datetime.now().isoformat()
-                p["vainqueur_reel"] = vainqueur_reel
-                p["pronostic_correct"] = (vainqueur_reel == p.get("favori")) if vainqueur_reel else None
-                break
-        with open(HIST_FILE, "w", encoding="utf-8") as f:
-            json.dump(h, f, indent=2, ensure_ascii=False)
-        update_stats()
+        store = get_store()
+        cur = store.get(pred_id)
+        if cur is None: return False
+        # Statut et pronostic_correct dans la même transaction (le favori ne change pas)
+        fields = {"statut": statut, "date_maj": datetime.now().isoformat(), "vainqueur_reel": vainqueur_reel}
+        fields["pronostic_correct"] = (vainqueur_reel == cur.get("favori")) if vainqueur_reel else None
+        p = store.update(pred_id, **fields)
+        if p is None: return False
+        if vainqueur_reel and cur.get("statut", "en_attente") == "en_attente":
+            # Rafraîchissement incrémental de la calibration (deux classes + PAV), une seule
+            # fois par match : une correction ou un ré-enregistrement ne recompte pas l'issue
+            raw = p.get("proba_raw", p.get("proba"))
+            if statut in ("gagne", "perdu") and raw is not None and "calibrator" in st.session_state:
+                st.session_state["calibrator"].add(p.get("surface"), raw, float(vainqueur_reel == p.get("player1")))
         return True
     except Exception: return False
 
 def load_user_stats():
-    default = {"total_predictions":0,"correct_predictions":0,
-               "incorrect_predictions":0,"annules_predictions":0,
-               "current_streak":0,"best_streak":0}
-    if not USER_STATS_FILE.exists(): return default
-    try:
-        with open(USER_STATS_FILE) as f: return json.load(f)
-    except Exception: return default
+    """Compteurs tenus à jour par événement dans la base (une requête sur la table stats)."""
+    raw = get_store().stats()
+    return {"total_predictions":raw.get("total",0),
+            "correct_predictions":raw.get("statut:gagne",0),
+            "incorrect_predictions":raw.get("statut:perdu",0),
+            "annules_predictions":raw.get("statut:annule",0),
+            "pending_predictions":raw.get("statut:en_attente",0),
+            "current_streak":raw.get("current_streak",0),"best_streak":raw.get("best_streak",0),
+            "value_wins":raw.get("value_wins",0)}
 
 def update_stats():
-    h = load_history()
-    correct   = sum(1 for p in h if p.get("statut")=="gagne")
-    incorrect = sum(1 for p in h if p.get("statut")=="perdu")
-    cancel    = sum(1 for p in h if p.get("statut")=="annule")
-    streak = cur = best = 0
-    for p in reversed(h):
-        if p.get("statut")=="gagne":   streak+=1; cur=streak; best=max(best,streak)
-        elif p.get("statut")=="perdu": streak=0;  cur=0
-    stats = {"total_predictions":len(h),"correct_predictions":correct,
-             "incorrect_predictions":incorrect,"annules_predictions":cancel,
-             "current_streak":cur,"best_streak":best}
-    with open(USER_STATS_FILE,"w") as f: json.dump(stats,f)
-    return stats
-
-def calc_accuracy():
-    s = load_user_stats()
+    """Réparation : recalcul complet des compteurs depuis l'historique."""
+    get_store().recompute_stats()
+    return load_user_stats()
+
+def calc_accuracy(s=None):
+    s = s or load_user_stats()
     tv = s.get("correct_predictions",0)+s.get("incorrect_predictions",0)
     return (s.get("correct_predictions",0)/tv*100) if tv>0 else 0
 
@@ -920,25 +1027,27 @@ def get_tg_config():
         c = os.environ.get("TELEGRAM_CHAT_ID")
         return (t,c) if t and c else (None,None)
 
-def tg_send(message, parse_mode="HTML"):
+@st.cache_resource(show_spinner=False)
+def get_tg_queue(token, chat_id, api_base):
+    """File d'envoi persistante et son worker (un par processus et par configuration)."""
+    return TelegramQueue(TG_QUEUE_FILE, token, chat_id, api_base=api_base,
+                         session=get_http().provider("telegram")).start()
+
+def tg_queue():
     token, chat_id = get_tg_config()
-    if not token or not chat_id: return False, "Telegram non configure"
-    message = str(message)
-    if len(message) > 4000: message = message[:3990] + "\n..."
+    if not token or not chat_id: return None
+    api_base = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org")
+    try: api_base = st.secrets.get("TELEGRAM_API_BASE", api_base)
+    except Exception: pass
+    return get_tg_queue(token, chat_id, api_base)
+
+def tg_send(message, parse_mode="HTML", digest=False):
+    """Met le message en file (retour immédiat) ; digest=True : regroupé avec les pronostics voisins."""
+    q = tg_queue()
+    if q is None: return False, "Telegram non configure"
     try:
-        r = requests.post(
-            "https://api.telegram.org/bot" + token + "/sendMessage",
-            json={"chat_id":chat_id,"text":message,"parse_mode":parse_mode,
-                  "disable_web_page_preview":True}, timeout=15)
-        if r.status_code == 200: return True, "Envoye sur Telegram"
-        err = r.json().get("description", r.text[:100])
-        if "parse" in err.lower():
-            plain = message.replace("<b>","").replace("</b>","").replace("<i>","").replace("</i>","")
-            r2 = requests.post(
-                "https://api.telegram.org/bot" + token + "/sendMessage",
-                json={"chat_id":chat_id,"text":plain,"disable_web_page_preview":True}, timeout=15)
-            if r2.status_code == 200: return True, "Envoye (texte brut)"
-        return False, "Telegram: " + err
+        q.enqueue(message, parse_mode=parse_mode, digest=digest)
+        return True, "En file d'envoi Telegram"
     except Exception as e: return False, "Erreur: " + str(e)[:60]
 
 def format_pred_msg(pred, ai_txt=None):
@@ -971,10 +1080,10 @@ def format_pred_msg(pred, ai_txt=None):
     return msg
 
 def format_stats_msg():
-    s=load_user_stats(); h=load_history()
+    s=load_user_stats()
     c=s.get("correct_predictions",0); w=s.get("incorrect_predictions",0)
     tv=c+w; acc=(c/tv*100) if tv>0 else 0
-    recent=[p for p in h[-20:] if p.get("statut") in ["gagne","perdu"]]
+    recent=[p for p in get_store().recent(20) if p.get("statut") in ["gagne","perdu"]]
     r_acc=(sum(1 for p in recent if p.get("statut")=="gagne")/len(recent)*100) if recent else 0
     return ("<b>STATS TENNISIQ</b>\n"
             "Precision: <b>"+str(round(acc,1))+"%</b>  "
@@ -997,43 +1106,50 @@ def get_claude_key():
     try: return st.secrets["ANTHROPIC_API_KEY"]
     except Exception: return os.environ.get("ANTHROPIC_API_KEY")
 
-def call_groq(prompt):
-    key = get_groq_key()
-    if not key: return None
-    try:
-        r = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={"Authorization":"Bearer "+key,"Content-Type":"application/json"},
-            json={"model":"llama-3.3-70b-versatile","messages":[{"role":"user","content":prompt}],
-                  "temperature":0.3,"max_tokens":600}, timeout=30)
-        return r.json()["choices"][0]["message"]["content"] if r.status_code==200 else None
-    except Exception: return None
+AI_MODELS = {"Groq": "llama-3.3-70b-versatile", "DeepSeek": "deepseek-chat",
+             "Claude": "claude-3-haiku-20240307"}
 
-def call_deepseek(prompt):
-    key = get_deepseek_key()
-    if not key: return None
-    try:
-        r = requests.post(
-            "https://api.deepseek.com/v1/chat/completions",
-            headers={"Authorization":"Bearer "+key,"Content-Type":"application/json"},
-            json={"model":"deepseek-chat","messages":[{"role":"user","content":prompt}],
-                  "temperature":0.3,"max_tokens":600}, timeout=30)
-        return r.json()["choices"][0]["message"]["content"] if r.status_code==200 else None
-    except Exception: return None
+AI_API_BASES = {"Groq": ("GROQ_API_BASE", "https://api.groq.com/openai/v1"),
+                "DeepSeek": ("DEEPSEEK_API_BASE", "https://api.deepseek.com/v1"),
+                "Claude": ("ANTHROPIC_API_BASE", "https://api.anthropic.com/v1")}
+
+def get_api_base(provider):
+    """URL de base du fournisseur (secrets ou variable d'environnement, ex. serveur SSE local)."""
+    name, default = AI_API_BASES[provider]
+    try: return st.secrets[name]
+    except Exception: return os.environ.get(name, default)
 
-def call_claude_api(prompt):
-    key = get_claude_key()
+AI_STREAMS = {"Groq": (stream_openai, get_groq_key), "DeepSeek": (stream_openai, get_deepseek_key),
+              "Claude": (stream_claude, get_claude_key)}
+
+def ai_stream_spec(provider):
+    """
+    Paramètres d'un appel en streaming, résolus sur le thread du script (st.secrets,
+    client HTTP partagé) : (fonction, session, base, clé, modèle), ou None sans clé.
+    """
+    stream, get_key = AI_STREAMS[provider]
+    key = get_key()
     if not key: return None
-    try:
-        r = requests.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={"x-api-key":key,"anthropic-version":"2023-06-01","content-type":"application/json"},
-            json={"model":"claude-3-haiku-20240307","max_tokens":600,
-                  "messages":[{"role":"user","content":prompt}]}, timeout=30)
-        return r.json()["content"][0]["text"] if r.status_code==200 else None
+    return (stream, get_http().provider(provider.lower()), get_api_base(provider), key, AI_MODELS[provider])
+
+def open_stream(spec, prompt):
+    if spec is None: return iter(())
+    stream, session, base, key, model = spec
+    return stream(session, base, key, model, prompt)
+
+def stream_groq(prompt):       return open_stream(ai_stream_spec("Groq"), prompt)
+def stream_deepseek(prompt):   return open_stream(ai_stream_spec("DeepSeek"), prompt)
+def stream_claude_api(prompt): return open_stream(ai_stream_spec("Claude"), prompt)
+
+def _collect(chunks):
+    try: return "".join(chunks) or None
     except Exception: return None
 
-def ai_analysis(p1, p2, surface, tournament, proba, details, best_value, ia_choice):
+def call_groq(prompt):       return _collect(stream_groq(prompt))
+def call_deepseek(prompt):   return _collect(stream_deepseek(prompt))
+def call_claude_api(prompt): return _collect(stream_claude_api(prompt))
+
+def ai_prompt(p1, p2, surface, tournament, proba, details, best_value):
     """Prompt enrichi avec données ELO, momentum, H2H, edge."""
     fav  = p1 if proba >= 0.5 else p2
     und  = p2 if proba >= 0.5 else p1
@@ -1078,27 +1194,60 @@ def ai_analysis(p1, p2, surface, tournament, proba, details, best_value, ia_choi
         "4. Pronostic final + confiance (etoiles 1-5) + % bankroll conseille\n\n"
         "Sois factuel et concis."
     )
-    if ia_choice == "Groq":     return call_groq(prompt)
-    if ia_choice == "DeepSeek": return call_deepseek(prompt)
-    if ia_choice == "Claude":   return call_claude_api(prompt)
-    return None
+    return prompt
+
+@st.cache_resource(show_spinner=False)
+def get_llm_cache():
+    """Cache disque des réponses IA (clé : fournisseur + modèle + hash du prompt)."""
+    return LLMCache(LLM_CACHE_FILE, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX)
+
+def fetch_ai(spec, cache, provider, prompt, events, key):
+    """
+    Exécuté dans un worker FanOut, sans contexte Streamlit : spec (ai_stream_spec) et
+    cache sont résolus par le script. Seule la file `events` est partagée :
+    (key, fragment) à chaque fragment, puis (key, None, texte complet ou None).
+    Le texte est mis en cache : un rerun qui abandonne l'attente le retrouve.
+    """
+    parts, txt = [], None
+    try:
+        for d in open_stream(spec, prompt):
+            parts.append(d); events.put((key, d))
+        txt = "".join(parts) or None
+        if txt: cache.put(provider, spec[4], prompt, txt)
+    except Exception: txt = None
+    finally: events.put((key, None, txt))
+    return txt
+
+@st.cache_resource(show_spinner=False)
+def get_fanout():
+    """Pool partagé des appels IA (limite de concurrence par fournisseur)."""
+    return FanOut()
+
+def render_ai(slot, ai_txt, expanded, partial=False):
+    if not ai_txt:
+        slot.caption("Analyse IA indisponible"); return
+    if partial: ai_txt += " ▌"
+    with slot.container():
+        with st.expander("Analyse IA",expanded=expanded):
+            st.markdown(
+                "<div style='background:rgba(0,121,255,0.06);"
+                "border:1px solid rgba(0,121,255,0.2);border-radius:10px;"
+                "padding:1rem;font-size:0.9rem;line-height:1.6;color:#E8EDF5;'>"
+                +ai_txt.replace("\n","<br>")+"</div>",
+                unsafe_allow_html=True)
 
 # ═══════════════════════════════════════════════════════════════
 # ACHIEVEMENTS
 # ═══════════════════════════════════════════════════════════════
 def load_ach():
-    if not ACHIEVEMENTS_FILE.exists(): return {}
-    try:
-        with open(ACHIEVEMENTS_FILE) as f: return json.load(f)
-    except Exception: return {}
+    return dict(get_file_cache().read(ACHIEVEMENTS_FILE, {}))
 
 def save_ach(a):
-    try:
-        with open(ACHIEVEMENTS_FILE,"w") as f: json.dump(a,f)
+    try: get_file_cache().write(ACHIEVEMENTS_FILE, a)
     except Exception: pass
 
 def check_achievements():
-    s=load_user_stats(); h=load_history(); a=load_ach(); new=[]
+    s=load_user_stats(); a=load_ach(); new=[]
     for aid, cond in [
         ("first_win",s.get("correct_predictions",0)>=1),
         ("streak_5", s.get("best_streak",0)>=5),
@@ -1107,21 +1256,26 @@ def check_achievements():
     ]:
         if cond and aid not in a:
             a[aid]={"unlocked_at":datetime.now().isoformat()}; new.append(ACHIEVEMENTS[aid])
-    vw=sum(1 for p in h if p.get("best_value") and p.get("statut")=="gagne")
+    vw=s.get("value_wins",0)
     if vw>=10 and "value_master" not in a:
         a["value_master"]={"unlocked_at":datetime.now().isoformat()}; new.append(ACHIEVEMENTS["value_master"])
-    surfs={p.get("surface") for p in h if p.get("statut")=="gagne"}
+    surfs={k for k,v in get_store().aggregate("surface").items() if v.get("gagne")}
     if len(surfs)>=3 and "surface_specialist" not in a:
         a["surface_specialist"]={"unlocked_at":datetime.now().isoformat()}; new.append(ACHIEVEMENTS["surface_specialist"])
     if new: save_ach(a)
     return new
 
 def backup():
-    ts=datetime.now().strftime("%Y%m%d_%H%M%S")
-    for f in [HIST_FILE,USER_STATS_FILE]:
-        if f.exists():
-            try: shutil.copy(f,BACKUP_DIR/(f.stem+"_"+ts+f.suffix))
-            except Exception: pass
+    """Instantané dédupliqué (copie cohérente de la base + succès), puis rétention."""
+    try:
+        repo=BackupRepo(BACKUP_DIR)
+        with tempfile.TemporaryDirectory() as tmp:
+            db=Path(tmp)/PRED_DB_FILE.name
+            get_store().backup(db)
+            snap,stats=repo.snapshot({PRED_DB_FILE.name:db,ACHIEVEMENTS_FILE.name:ACHIEVEMENTS_FILE})
+        removed,_=repo.prune(BACKUP_DAILY,BACKUP_WEEKLY)
+        return snap,stats,len(removed)
+    except Exception: return None
 
 # ═══════════════════════════════════════════════════════════════
 # SÉLECTEURS
@@ -1159,13 +1313,13 @@ def tourn_sel(label, key, default=None):
 # ═══════════════════════════════════════════════════════════════
 def show_dashboard():
     st.markdown(section_title("Dashboard", "Vue d ensemble"), unsafe_allow_html=True)
-    stats=load_user_stats(); h=load_history(); a=load_ach()
+    stats=load_user_stats(); store=get_store(); a=load_ach()
     mi=load_rf_model(); metadata=load_model_metadata()
     correct=stats.get("correct_predictions",0); wrong=stats.get("incorrect_predictions",0)
     cancel=stats.get("annules_predictions",0)
-    pending=len([p for p in h if p.get("statut")=="en_attente"])
+    pending=stats["pending_predictions"]
     tv=correct+wrong; acc=(correct/tv*100) if tv>0 else 0
-    recent=[p for p in h[-20:] if p.get("statut") in ["gagne","perdu"]]
+    recent=[p for p in store.recent(20) if p.get("statut") in ["gagne","perdu"]]
     r_acc=(sum(1 for p in recent if p.get("statut")=="gagne")/len(recent)*100) if recent else 0
 
     c1,c2,c3,c4,c5 = st.columns(5)
@@ -1221,14 +1375,10 @@ def show_dashboard():
             +rows+"</div>", unsafe_allow_html=True)
 
     st.markdown("<br>", unsafe_allow_html=True)
-    finished=[p for p in h if p.get("statut") in ["gagne","perdu"]]
-    if len(finished)>=3:
-        df_h=pd.DataFrame(finished)
-        df_h["ok"]=(df_h["statut"]=="gagne").astype(int)
-        df_h["cum_ok"]=df_h["ok"].expanding().sum()
-        df_h["cum_n"]=range(1,len(df_h)+1)
-        df_h["acc"]=df_h["cum_ok"]/df_h["cum_n"]*100
-        df_h["n"]=range(1,len(df_h)+1)
+    curve=store.accuracy_curve()
+    if curve and curve[-1][0]>=3:
+        df_h=pd.DataFrame(curve,columns=["n","cum_ok"])
+        df_h["acc"]=df_h["cum_ok"]/df_h["n"]*100
         fig=go.Figure()
         fig.add_hline(y=50,line_dash="dot",line_color="rgba(255,255,255,0.15)")
         fig.add_trace(go.Scatter(x=df_h["n"],y=df_h["acc"],mode="lines",
@@ -1287,6 +1437,9 @@ def show_prediction():
         ia_choice=st.selectbox("IA",ia_opts,index=min(1,len(ia_opts)-1))
         send_tg=st.checkbox("Envoi Telegram auto",False)
         show_details=st.checkbox("Afficher details ensemble",True)
+        # Plafond effectif de simultaneous_kelly : 0.99 × fraction Kelly
+        max_expo=st.slider("Exposition totale max (%)",1,int(KELLY_FRACTION*99),int(MAX_EXPOSURE*100))/100
+        combo_legs=st.slider("Jambes max combines",2,6,4)
 
     inputs=[]
     for i in range(n):
@@ -1319,8 +1472,11 @@ def show_prediction():
                                +" (diff "+str(ediff)+")")
             inputs.append({"p1":p1,"p2":p2,"surf":surf,"tourn":tourn,"o1":o1,"o2":o2})
 
-    if not st.button("Analyser",type="primary",use_container_width=True):
-        return
+    # Les matchs analysés restent affichés aux reruns (Sauvegarder, Telegram...)
+    fresh=st.button("Analyser",type="primary",use_container_width=True)
+    if fresh: st.session_state["analyse_inputs"]=inputs
+    inputs=st.session_state.get("analyse_inputs")
+    if not inputs: return
 
     valid=[m for m in inputs if m["p1"] and m["p2"]]
     if not valid: st.warning("Remplis au moins un match"); return
@@ -1328,13 +1484,20 @@ def show_prediction():
     st.markdown("---")
     st.markdown(section_title("Resultats"), unsafe_allow_html=True)
 
+    # ── CALCUL ENSEMBLE (lot des matchs absents du cache) ───
+    results=predict_matches(valid,mi)
+    day_bets=[]; legs=[]
+    if fresh: st.session_state["ai_done"]={}
+    ai_done=st.session_state.setdefault("ai_done",{})   # prompt → texte, conservé aux reruns
+    ai_jobs={}; ai_keys={}; auto_send={}; ai_events=queue.Queue()
+    ai_spec=ai_stream_spec(ia_choice) if ia_choice in AI_STREAMS else None; llm_cache=get_llm_cache()
+
     for i,m in enumerate(valid):
         p1,p2,surf,tourn=m["p1"],m["p2"],m["surf"],m["tourn"]
-
-        # ── CALCUL ENSEMBLE ─────────────────────────────────
-        h2h_data=get_h2h(p1,p2,surf)
-        proba,details,sources=ensemble_proba(p1,p2,surf,tourn,h2h_data,mi)
-        conf=calc_confidence_v2(proba,details,h2h_data)
+        r=results[i]
+        h2h_data=r["h2h"]
+        proba,details,sources=r["proba"],r["details"],r["sources"]
+        conf=r["conf"]
         fav=p1 if proba>=0.5 else p2
         fav_p=max(proba,1-proba)
         cfg=SURFACE_CFG[surf]
@@ -1432,9 +1595,15 @@ def show_prediction():
                             unsafe_allow_html=True)
 
         # ── Value Bet avec Kelly ─────────────────────────────
-        best_val, vb_analyse = compute_value_bets(p1,p2,proba,m["o1"],m["o2"])
+        best_val, vb_analyse = r["best_val"], r["vb_analyse"]
+        for player,opp in [(p1,p2),(p2,p1)]:
+            if player in vb_analyse:
+                legs.append({"match":i+1,"joueur":player,"adversaire":opp,
+                             "proba":vb_analyse[player]["proba"],"cote":vb_analyse[player]["cote"]})
         if best_val:
             kf=_safe_float(best_val.get("kelly"),0)
+            day_bets.append({**best_val,"match":i+1,
+                             "adversaire":p2 if best_val["joueur"]==p1 else p1})
             edge_pct=round(_safe_float(best_val.get("edge"))*100,1)
             edge_col="#00DFA2" if edge_pct>=5 else "#FFB200"
             st.markdown(
@@ -1449,7 +1618,7 @@ def show_prediction():
                 +(kelly_badge(kf) if kf>0 else "")
                 +"</div>"
                 "<div style='font-size:0.72rem;color:#7A8599;margin-top:0.5rem;'>"
-                "Marge bookmaker: "+str(round(_safe_float(vb_analyse.get(p1,{}).get("marge",0))*100,1))+"%  |  "
+                "Marge bookmaker: "+str(round(_safe_float(vb_analyse.get(p1,{}).get("marge",0))*100,1))+"% (de-marginee : "+get_devig_method()+")  |  "
                 "Kelly fractionne (25%) — ne jamais depasser 5% du bankroll sur un seul pari</div></div>",
                 unsafe_allow_html=True)
 
@@ -1472,7 +1641,7 @@ def show_prediction():
                                 +" ["+grade+"]</div>"
                                 "<div style='font-size:0.78rem;color:#E8EDF5;margin-top:0.25rem;'>"
                                 "Proba modele: "+str(prob_p)+"%<br>"
-                                "Proba cote: "+str(impl_p)+"%<br>"
+                                "Proba cote: "+str(impl_p)+"% <span style='color:#7A8599;'>(brute "+str(round(_safe_float(va.get("implied_raw"))*100,1))+"%)</span><br>"
                                 "Edge: <b style='color:"+color_g+";'>"+str(edge_p)+"%</b><br>"
                                 +"Kelly: "+str(kf_p)+"% bankroll<br>"
                                 +"Qualite: "+str(va.get("label",""))+"</div></div>",
@@ -1482,28 +1651,31 @@ def show_prediction():
 
         # ── Paris alternatifs ────────────────────────────────
         with st.expander("Paris alternatifs"):
-            bets=_alt_bets(p1,p2,surf,proba)
-            for b in bets:
+            for b in r["alt"]:
                 ci="OK" if b["confidence"]>=65 else "~"
                 st.markdown(ci+" **"+b["type"]+"** — "+b["description"]
                             +"  Proba "+str(round(b["proba"]*100,1))+"%  Cote "+str(b["cote"]))
 
-        # ── Analyse IA ───────────────────────────────────────
+        # ── Analyse IA (lancée en parallèle, affichée à l'arrivée) ──
         ai_txt=None
-        if ia_choice!="Aucune":
-            with st.spinner("Analyse "+ia_choice+"..."):
-                ai_txt=ai_analysis(p1,p2,surf,tourn,proba,details,best_val,ia_choice)
-            if ai_txt:
-                with st.expander("Analyse IA",expanded=bool(best_val)):
-                    st.markdown(
-                        "<div style='background:rgba(0,121,255,0.06);"
-                        "border:1px solid rgba(0,121,255,0.2);border-radius:10px;"
-                        "padding:1rem;font-size:0.9rem;line-height:1.6;color:#E8EDF5;'>"
-                        +ai_txt.replace("\n","<br>")+"</div>",
-                        unsafe_allow_html=True)
+        if ia_choice in AI_STREAMS:
+            prompt=ai_prompt(p1,p2,surf,tourn,proba,details,best_val)
+            key=ai_keys[i]=version_token(ia_choice,prompt)
+            slot=st.empty()
+            if key not in ai_done:
+                hit=llm_cache.get(ia_choice,AI_MODELS[ia_choice],prompt)
+                if hit: ai_done[key]=hit
+            if key in ai_done:
+                ai_txt=ai_done[key]; render_ai(slot,ai_txt,bool(best_val))
+            else:
+                slot.caption("Analyse "+ia_choice+" en cours...")
+                if key not in ai_jobs:
+                    fut=get_fanout().submit(ia_choice,fetch_ai,ai_spec,llm_cache,ia_choice,prompt,ai_events,key)
+                    ai_jobs[key]=(fut,[])
+                ai_jobs[key][1].append((slot,bool(best_val)))
 
         pred_data={"player1":p1,"player2":p2,"tournament":tourn,"surface":surf,
-                   "proba":float(proba),"confidence":float(conf),
+                   "proba":float(proba),"proba_raw":r["proba_raw"],"confidence":float(conf),
                    "odds1":m["o1"],"odds2":m["o2"],"favori":fav,
                    "best_value":best_val,"ml_used":bool(mi),
                    "sources":sources,"details":str(details),
@@ -1515,28 +1687,130 @@ def show_prediction():
                 st.success("Sauvegarde!") if save_pred(pred_data) else st.error("Erreur")
         with cb2:
             if st.button("Envoyer Telegram",key="tg_"+str(i),use_container_width=True):
-                ok,resp=tg_send(format_pred_msg(pred_data,ai_txt))
+                ok,resp=tg_send(format_pred_msg(pred_data,ai_txt),digest=True)
                 st.success(resp) if ok else st.error(resp)
 
-        if send_tg and i==0:
-            save_pred(pred_data); tg_send(format_pred_msg(pred_data,ai_txt))
+        if send_tg and fresh:
+            save_pred(pred_data); auto_send[i]=pred_data
         st.markdown("---")
 
+    if ai_keys: llm_cache.flush()      # accès et compteurs des lectures de la page, une transaction
+    # Fragments IA relayés par les workers ; affichés au fil de l'eau (attente ≈ l'appel le plus lent)
+    pending=set(ai_jobs); partial={}; shown={}
+    deadline=time.time()+AI_TIMEOUT
+    while pending and time.time()<deadline:
+        try: key,d,*done=ai_events.get(timeout=0.25)
+        except queue.Empty: continue
+        if key not in pending: continue
+        if done:
+            # Fin de l'appel : seul le thread du script écrit dans session_state
+            ai_done[key]=done[0]; pending.discard(key)
+            for slot,exp in ai_jobs[key][1]: render_ai(slot,ai_done.get(key),exp)
+            continue
+        partial[key]=partial.get(key,"")+d
+        if time.time()-shown.get(key,0)>=AI_REFRESH:
+            shown[key]=time.time()
+            for slot,exp in ai_jobs[key][1]: render_ai(slot,partial[key],True,partial=True)
+    for key in pending:
+        ai_jobs[key][0].cancel()
+        for slot,exp in ai_jobs[key][1]: render_ai(slot,None,exp)
+    for i,pred_data in auto_send.items():
+        tg_send(format_pred_msg(pred_data,ai_done.get(ai_keys.get(i))),digest=True)
+
+    if len(day_bets)>=2:
+        show_portfolio(day_bets,max_expo)
+    if len({l["match"] for l in legs})>=2:
+        show_combos(legs,combo_legs)
+
     nb=check_achievements()
     if nb: st.balloons(); st.success(str(len(nb))+" badge(s) debloque(s)!")
 
-def _alt_bets(p1,p2,surface,proba):
+def show_portfolio(bets,max_expo):
+    """Mises Kelly simultanées pour tous les value bets de l'analyse (exposition plafonnée)."""
+    probs=np.array([b["proba"] for b in bets]); odds=np.array([b["cote"] for b in bets])
+    corr=same_player_corr([(b["joueur"],b["adversaire"]) for b in bets])
+    res=simultaneous_kelly(probs,odds,max_exposure=max_expo,fraction=KELLY_FRACTION,
+                           corr=None if np.allclose(corr,np.eye(len(bets))) else corr)
+    indiv=sum(_safe_float(b.get("kelly")) for b in bets)
+    st.markdown(section_title("Portefeuille Kelly","Mises simultanees · exposition max "+str(round(max_expo*100))+"%"),
+                unsafe_allow_html=True)
+    c1,c2,c3=st.columns(3)
+    with c1: st.markdown(big_metric("Exposition",str(round(res["total"]*100,1))+"%"), unsafe_allow_html=True)
+    with c2: st.markdown(big_metric("Kelly isoles",str(round(indiv*100,1))+"%",color="#FFB200"), unsafe_allow_html=True)
+    with c3: st.markdown(big_metric("Croissance log",str(round(res["growth"]*100,3))+"%",color="#0079FF"), unsafe_allow_html=True)
+    st.dataframe(pd.DataFrame([{"Match":b["match"],"Joueur":b["joueur"],"Cote":round(b["cote"],2),
+                                "Proba %":round(b["proba"]*100,1),"Edge %":round(b["edge"]*100,1),
+                                "Kelly isole %":round(_safe_float(b.get("kelly"))*100,2),
+                                "Mise portefeuille %":round(float(s)*100,2)}
+                               for b,s in zip(bets,res["stakes"])]),
+                 use_container_width=True,hide_index=True)
+
+def show_combos(legs,max_legs):
+    """Meilleurs combinés des matchs analysés (séparation-évaluation, edge > MIN_EDGE_COMBINE)."""
+    combos,nodes=build_combos(legs,2,max_legs,MIN_EDGE_COMBINE,COMBO_MIN_PROBA,COMBO_TOP_K,KELLY_FRACTION)
+    st.markdown(section_title("Combines","Top "+str(COMBO_TOP_K)+" · 2 a "+str(max_legs)+" jambes · "
+                              +str(nodes)+" noeuds explores"), unsafe_allow_html=True)
+    if not combos:
+        st.caption("Aucun combine avec edge > "+str(int(MIN_EDGE_COMBINE*100))+"%"); return
+    for rank,c in enumerate(combos,1):
+        sel=" + ".join(legs[j]["joueur"]+" (M"+str(legs[j]["match"])+" @"+str(round(legs[j]["cote"],2))+")"
+                       for j in c["legs"])
+        st.markdown(
+            "<div style='background:rgba(255,255,255,0.04);border:1px solid rgba(0,121,255,0.3);"
+            "border-radius:12px;padding:0.9rem;margin-bottom:0.6rem;'>"
+            "<div style='font-weight:700;color:#E8EDF5;'>#"+str(rank)+" · "+str(len(c["legs"]))+" jambes</div>"
+            "<div style='font-size:0.8rem;color:#7A8599;margin:0.25rem 0;'>"+sel+"</div>"
+            "<div style='display:flex;gap:1.25rem;flex-wrap:wrap;'>"
+            "<span style='color:#FFB200;font-weight:700;'>Cote "+str(round(c["cote"],2))+"</span>"
+            "<span style='color:#00DFA2;font-weight:700;'>Edge +"+str(round(c["edge"]*100,1))+"%</span>"
+            "<span style='color:#0079FF;'>Proba "+str(round(c["proba"]*100,1))+"%</span>"
+            "<span style='color:#7A8599;'>EV +"+str(round(c["ev"]*100,1))+"%</span>"
+            +(kelly_badge(c["kelly"]) if c["kelly"]>0 else "")
+            +"</div></div>",
+            unsafe_allow_html=True)
+
+def serve_points_won(ps, player):
+    """Proba de gagner un point au service : 1re balle in × 1re gagnée + 2e × 2e gagnée."""
+    sp = ps.get(player, {}).get("serve_pct", {})
+    fi, fw, sw = (_safe_float(sp.get(k), np.nan) for k in ("pct_1st_in", "pct_1st_won", "pct_2nd_won"))
+    if np.isnan(fi) or np.isnan(fw) or np.isnan(sw): return DEFAULT_SERVE
+    if max(fi, fw, sw) > 1.0: fi, fw, sw = fi/100, fw/100, sw/100   # stats en %
+    spw = fi*fw + (1-fi)*sw
+    return spw if 0.3 < spw < 0.95 else DEFAULT_SERVE
+
+def match_distributions(matchups, probas, mi):
+    """
+    Distributions exactes (jeux, handicaps, sets) pour tous les matchs de la page.
+    Service de chaque joueur depuis player_stats, puis ancrage sur la proba de l'ensemble.
+    """
+    ps = (mi or {}).get("player_stats", {})
+    return [anchored_distribution(serve_points_won(ps, p1), serve_points_won(ps, p2),
+                                  float(pr), get_level(t)[1])
+            for (p1, p2, _, t), pr in zip(matchups, probas)]
+
+def _alt_bets(p1,p2,proba,dist,best_of=3):
+    """Paris alternatifs avec probas exactes du modèle de Markov ; cote = cote juste (1/p)."""
+    def bet(t,desc,p):
+        p=min(max(float(p),0.001),0.999)
+        return {"type":t,"description":desc,"proba":round(p,3),"cote":round(1/p,2),"confidence":int(round(p*100))}
     bets=[]
-    if proba>0.6 or proba<0.4:
-        bets.append({"type":"Under 22.5 games","description":"Moins de 22.5 jeux","proba":0.64,"cote":1.78,"confidence":68})
+    line=22.5 if best_of==3 else 38.5
+    p_over=prob_total_over(dist,line)
+    if p_over>=0.5: bets.append(bet("Over "+str(line)+" games","Plus de "+str(line)+" jeux",p_over))
+    else:           bets.append(bet("Under "+str(line)+" games","Moins de "+str(line)+" jeux",1-p_over))
+    fav,dog,sign=(p1,p2,1) if proba>=0.5 else (p2,p1,-1)
+    hcp=3.5 if best_of==3 else 5.5
+    p_fav_cover=prob_handicap(dist,-hcp) if sign==1 else 1-prob_handicap(dist,hcp)
+    if max(proba,1-proba)>0.65:
+        bets.append(bet("Handicap -"+str(hcp),fav+" avec ecart",p_fav_cover))
     else:
-        bets.append({"type":"Over 22.5 games","description":"Plus de 22.5 jeux","proba":0.61,"cote":1.82,"confidence":63})
-    if proba>0.65:
-        bets.append({"type":"Handicap -3.5","description":p1+" avec ecart","proba":0.57,"cote":2.15,"confidence":58})
-    elif proba<0.35:
-        bets.append({"type":"Handicap +3.5","description":p2+" outsider","proba":0.60,"cote":1.98,"confidence":62})
+        bets.append(bet("Handicap +"+str(hcp),dog+" outsider",1-p_fav_cover))
+    n_sets=best_of//2+1
     if 0.3<proba<0.7:
-        bets.append({"type":"Set chacun","description":"Match en 3 sets","proba":0.54,"cote":2.25,"confidence":54})
+        p_dec=sum(p for (a,b),p in dist["sets"].items() if a+b==best_of)
+        bets.append(bet("Set chacun","Match en "+str(best_of)+" sets",p_dec))
+    (a,b),p_score=max(dist["sets"].items(),key=lambda x:x[1])
+    bets.append(bet("Score exact "+str(a)+"-"+str(b),(p1 if a==n_sets else p2)+" gagne "+str(max(a,b))+"-"+str(min(a,b)),p_score))
     return bets
 
 # ═══════════════════════════════════════════════════════════════
@@ -1544,7 +1818,7 @@ def _alt_bets(p1,p2,surface,proba):
 # ═══════════════════════════════════════════════════════════════
 def show_pending():
     st.markdown(section_title("En attente","Validez les resultats"), unsafe_allow_html=True)
-    h=load_history(); pending=[p for p in h if p.get("statut")=="en_attente"]
+    pending=get_store().query(statut="en_attente")
     if not pending:
         st.markdown("<div style='text-align:center;padding:3rem;background:rgba(255,255,255,0.04);"
                     "border:1px dashed rgba(255,255,255,0.10);border-radius:16px;'>"
@@ -1605,21 +1879,17 @@ def show_pending():
 # ═══════════════════════════════════════════════════════════════
 def show_statistics():
     st.markdown(section_title("Statistiques","Analyse complete"), unsafe_allow_html=True)
-    h=load_history()
-    if not h: st.info("Aucune prediction."); return
-    df=pd.DataFrame(h)
-    df["date"]=pd.to_datetime(df["date"],errors="coerce")
-    if "pronostic_correct" not in df.columns: df["pronostic_correct"]=False
-    df["pronostic_correct"]=df["pronostic_correct"].fillna(False)
-    gagnes=df[df["statut"]=="gagne"]; perdus=df[df["statut"]=="perdu"]
-    abandons=df[df["statut"]=="annule"]; fini=df[df["statut"].isin(["gagne","perdu","annule"])]
-    tv=len(gagnes)+len(perdus); acc=(len(gagnes)/tv*100) if tv>0 else 0
+    store=get_store(); us=load_user_stats(); total=us["total_predictions"]
+    if not total: st.info("Aucune prediction."); return
+    n_g,n_p,n_a=us["correct_predictions"],us["incorrect_predictions"],us["annules_predictions"]
+    fini=pd.DataFrame(store.query(statut=["gagne","perdu","annule"],limit=10,newest_first=True))
+    tv=n_g+n_p; acc=(n_g/tv*100) if tv>0 else 0
 
     c1,c2,c3,c4,c5=st.columns(5)
-    with c1: st.markdown(big_metric("TOTAL",str(len(df)),color="#0079FF"), unsafe_allow_html=True)
-    with c2: st.markdown(big_metric("GAGNES",str(len(gagnes)),color="#00DFA2"), unsafe_allow_html=True)
-    with c3: st.markdown(big_metric("PERDUS",str(len(perdus)),color="#FF4757"), unsafe_allow_html=True)
-    with c4: st.markdown(big_metric("ABANDONS",str(len(abandons)),color="#FFB200"), unsafe_allow_html=True)
+    with c1: st.markdown(big_metric("TOTAL",str(total),color="#0079FF"), unsafe_allow_html=True)
+    with c2: st.markdown(big_metric("GAGNES",str(n_g),color="#00DFA2"), unsafe_allow_html=True)
+    with c3: st.markdown(big_metric("PERDUS",str(n_p),color="#FF4757"), unsafe_allow_html=True)
+    with c4: st.markdown(big_metric("ABANDONS",str(n_a),color="#FFB200"), unsafe_allow_html=True)
     with c5: st.markdown(big_metric("PRECISION",str(round(acc,1))+"%"), unsafe_allow_html=True)
 
     st.markdown("<br>", unsafe_allow_html=True)
@@ -1627,7 +1897,7 @@ def show_statistics():
     with col_pie:
         if tv>0:
             fig_d=go.Figure(go.Pie(labels=["Gagnes","Perdus","Abandons"],
-                                    values=[len(gagnes),len(perdus),len(abandons)],
+                                    values=[n_g,n_p,n_a],
                                     hole=0.65,marker_colors=["#00DFA2","#FF4757","#FFB200"],textinfo="none"))
             fig_d.update_layout(height=240,margin=dict(l=0,r=0,t=10,b=0),
                                  paper_bgcolor="rgba(0,0,0,0)",plot_bgcolor="rgba(0,0,0,0)",
@@ -1637,7 +1907,7 @@ def show_statistics():
             st.plotly_chart(fig_d,use_container_width=True)
     with col_table:
         if not fini.empty:
-            for _,row in fini.sort_values("date",ascending=False).head(10).iterrows():
+            for _,row in fini.iterrows():
                 s=row.get("statut","?"); pc=row.get("pronostic_correct")
                 sc="#00DFA244" if s=="gagne" else "#FF475744" if s=="perdu" else "#FFB20044"
                 si="V" if s=="gagne" else "D" if s=="perdu" else "~"
@@ -1661,11 +1931,11 @@ def show_statistics():
                     "</div></div>",unsafe_allow_html=True)
 
     st.markdown("<br>", unsafe_allow_html=True)
-    surf_cols=st.columns(3)
+    surf_cols=st.columns(3); by_surf=store.aggregate("surface")
     for si,surf in enumerate(SURFACES):
-        cfg=SURFACE_CFG[surf]; sp=df[df["surface"]==surf]
-        sg=len(sp[sp["statut"]=="gagne"]); sp2=len(sp[sp["statut"]=="perdu"])
-        sa=len(sp[sp["statut"]=="annule"])
+        cfg=SURFACE_CFG[surf]; cs=by_surf.get(surf,{})
+        sg=cs.get("gagne",0); sp2=cs.get("perdu",0)
+        sa=cs.get("annule",0); n_s=sum(cs.values())
         s_acc=(sg/(sg+sp2)*100) if (sg+sp2)>0 else 0
         with surf_cols[si]:
             st.markdown(
@@ -1679,30 +1949,110 @@ def show_statistics():
                 "<span style='color:#00DFA2;'>V "+str(sg)+"</span>"
                 "<span style='color:#FF4757;'>D "+str(sp2)+"</span>"
                 "<span style='color:#FFB200;'>A "+str(sa)+"</span></div>"
-                "<div style='color:#6C7A89;font-size:0.75rem;'>"+str(len(sp))+" matchs</div></div>",
+                "<div style='color:#6C7A89;font-size:0.75rem;'>"+str(n_s)+" matchs</div></div>",
                 unsafe_allow_html=True)
+
+    # ── Agrégats matérialisés (mois, sources, confiance) ────
+    def _agg_table(dim,label):
+        rows=[]
+        for v,cs in sorted(store.aggregate(dim).items()):
+            g,p=cs.get("gagne",0),cs.get("perdu",0)
+            rows.append({label:v,"Pronostics":sum(cs.values()),"Gagnes":g,"Perdus":p,
+                         "Precision %":round(g/(g+p)*100,1) if g+p else None})
+        return pd.DataFrame(rows)
+    st.markdown("<br>", unsafe_allow_html=True)
+    t_month,t_src,t_conf=st.tabs(["Par mois","Par sources","Par confiance"])
+    with t_month:
+        df_m=_agg_table("month","Mois")
+        if not df_m.empty:
+            fig_m=go.Figure(go.Bar(x=df_m["Mois"],y=df_m["Precision %"],marker_color="#00DFA2"))
+            fig_m.update_layout(height=220,margin=dict(l=0,r=0,t=10,b=0),
+                                paper_bgcolor="rgba(0,0,0,0)",plot_bgcolor="rgba(0,0,0,0)",
+                                font=dict(color="#7A8599"),yaxis=dict(range=[0,100]))
+            st.plotly_chart(fig_m,use_container_width=True)
+        st.dataframe(df_m,use_container_width=True,hide_index=True)
+    with t_src:
+        st.dataframe(_agg_table("sources","Sources"),use_container_width=True,hide_index=True)
+    with t_conf:
+        df_c=_agg_table("conf","Confiance")
+        if not df_c.empty:
+            df_c["Confiance"]=[c+"-"+str(int(c)+10) if c.isdigit() else c for c in df_c["Confiance"]]
+        st.dataframe(df_c,use_container_width=True,hide_index=True)
+
     if st.button("Exporter CSV"):
-        st.download_button("Telecharger",df.to_csv(index=False),"tennisiq.csv","text/csv")
+        st.download_button("Telecharger",pd.DataFrame(load_history()).to_csv(index=False),"tennisiq.csv","text/csv")
 
 # ═══════════════════════════════════════════════════════════════
 # PAGE : VALUE BETS
 # ═══════════════════════════════════════════════════════════════
+def scan_value_bets(markets, mi, k=VB_TOP_K, min_edge=MIN_EDGE_COMBINE):
+    """
+    Score tous les marchés du fichier de cotes et garde les K meilleurs edges.
+
+    Les noms sont résolus via l'index, chaque match distinct (p1, p2, surface,
+    tournoi) ne passe qu'une fois dans ensemble_batch, puis edges/Kelly des deux
+    côtés sont vectorisés. Retourne (value_bets, stats).
+    """
+    t0 = time.perf_counter()
+    idx = load_name_index()
+    n1 = idx.resolve_many(markets["p1"].to_numpy())
+    n2 = idx.resolve_many(markets["p2"].to_numpy())
+    ok = pd.notna(n1) & pd.notna(n2) & (n1 != n2)
+    m = markets[ok].assign(p1=n1[ok], p2=n2[ok])
+    stats = {"markets": len(markets), "resolved": int(ok.sum()), "unresolved": int((~ok).sum())}
+    if m.empty:
+        return [], {**stats, "matches": 0, "seconds": round(time.perf_counter() - t0, 3)}
+
+    tourn = m["tournament"].where(m["tournament"].notna(), "").astype(str)
+    surf = m["surface"].where(m["surface"].isin(SURFACES), tourn.map(get_surface))
+    keys = pd.MultiIndex.from_arrays([m["p1"], m["p2"], surf, tourn])
+    codes, uniques = pd.factorize(keys)
+    batch = ensemble_batch(list(uniques), mi)
+    proba = batch["proba"][codes]
+
+    edge, kelly, marge = edges_and_kelly(proba, m["o1"].to_numpy(), m["o2"].to_numpy(),
+                                         method=get_devig_method())
+    p1s, p2s, o = m["p1"].to_numpy(), m["p2"].to_numpy(), m[["o1", "o2"]].to_numpy(dtype=float)
+    books, surfs, tourns = m["bookmaker"].to_numpy(), surf.to_numpy(), tourn.to_numpy()
+    vbs = []
+    for r, side in top_value_bets(edge, k, min_edge):
+        pb = proba[r] if side == 0 else 1 - proba[r]
+        vbs.append({"joueur": (p1s, p2s)[side][r], "edge": float(edge[r, side]),
+                    "cote": float(o[r, side]), "proba": round(float(pb), 4),
+                    "kelly": float(kelly[r, side]), "marge": round(float(marge[r]), 4),
+                    "match": p1s[r] + " vs " + p2s[r], "surf": surfs[r],
+                    "tournament": tourns[r] or "—", "bookmaker": books[r],
+                    "conf": float(batch["conf"][codes[r]]), "proba_orig": float(proba[r])})
+    stats.update(matches=len(uniques), seconds=round(time.perf_counter() - t0, 3))
+    return vbs, stats
+
 def show_value_bets():
     st.markdown(section_title("Value Bets","Avec edge + Kelly criterion"), unsafe_allow_html=True)
-    mi=load_rf_model(); vbs=[]
-    for m in _mock_matches():
-        h2h_d=get_h2h(m["p1"],m["p2"],m["surface"])
-        proba,_,_=ensemble_proba(m["p1"],m["p2"],m["surface"],m["tournament"],h2h_d,mi)
-        seed=hash(m["p1"]+m["p2"])%1000/1000
-        o1=round(1/proba*(0.88+0.15*seed),2)
-        o2=round(1/(1-proba)*(0.88+0.15*(1-seed)),2)
-        bv,analyse=compute_value_bets(m["p1"],m["p2"],proba,str(o1),str(o2))
-        if bv:
-            vbs.append({**bv,"match":m["p1"]+" vs "+m["p2"],
-                        "surf":m["surface"],"tournament":m["tournament"],"proba_orig":proba})
-    vbs.sort(key=lambda x:x["edge"],reverse=True)
+    c1,c2,c3=st.columns([3,1,1])
+    with c1: path=st.text_input("Fichier ou dossier de cotes (CSV / JSONL)",str(ODDS_DIR))
+    with c2: min_e=st.number_input("Edge min %",0.0,50.0,MIN_EDGE_COMBINE*100,0.5)/100
+    with c3: top_k=st.number_input("Top K",10,5000,VB_TOP_K,10)
+    if not odds_files(path):
+        st.info("Aucun fichier de cotes trouvé. Une ligne par marché, colonnes : "
+                "p1, p2, o1, o2 (+ surface, tournament, bookmaker optionnels).")
+        st.code("p1,p2,o1,o2,tournament,bookmaker\nCarlos Alcaraz,Jannik Sinner,2.10,1.80,Roland Garros,Pinnacle")
+        return
+    try:
+        markets=load_odds_markets(path)
+    except Exception as e:
+        st.error("Lecture des cotes impossible : "+str(e)); return
+    mi=load_rf_model()
+    vbs,stats=scan_value_bets(markets,mi,int(top_k),min_e)
+    st.caption(str(stats["markets"])+" marchés · "+str(stats["resolved"])+" résolus · "
+               +str(stats.get("matches",0))+" matchs scorés · "+str(stats["seconds"])+" s")
+    if stats["unresolved"]:
+        st.caption(str(stats["unresolved"])+" marchés ignorés (joueurs inconnus)")
     if not vbs: st.info("Aucun value bet."); return
-    for rank,vb in enumerate(vbs,1):
+    n_pages=(len(vbs)-1)//VB_PAGE_SIZE+1
+    page=st.number_input("Page",1,n_pages,1,key="vb_page") if n_pages>1 else 1
+    st.caption(str(len(vbs))+" value bets · page "+str(page)+" / "+str(n_pages))
+    first=(page-1)*VB_PAGE_SIZE
+    for rank,vb in enumerate(vbs[first:first+VB_PAGE_SIZE],first+1):
         cfg=SURFACE_CFG.get(vb["surf"],SURFACE_CFG["Hard"])
         e_pct=round(_safe_float(vb["edge"])*100,1)
         kf=_safe_float(vb.get("kelly"),0)
@@ -1713,6 +2063,8 @@ def show_value_bets():
             "<span style='font-family:Syne,sans-serif;font-size:1rem;font-weight:700;color:#E8EDF5;'>"
             "#"+str(rank)+" "+vb["match"]+"</span>"
             +surface_badge(vb["surf"])+"</div>"
+            "<div style='color:#7A8599;font-size:0.75rem;margin-bottom:0.4rem;'>"
+            +str(vb["tournament"])+(" · "+str(vb["bookmaker"]) if pd.notna(vb["bookmaker"]) else "")+"</div>"
             "<div style='font-size:1.2rem;font-weight:800;'>"
             "MISER SUR : <span style='color:#00DFA2;'>"+str(vb["joueur"]).upper()+"</span></div>"
             "<div style='display:flex;gap:1.5rem;margin-top:0.5rem;flex-wrap:wrap;'>"
@@ -1732,13 +2084,108 @@ def show_value_bets():
                  +"\n#TennisIQ #ValueBet")
             ok,resp=tg_send(msg); st.success(resp) if ok else st.error(resp)
 
-def _mock_matches():
-    return [
-        {"p1":"Novak Djokovic","p2":"Carlos Alcaraz","surface":"Clay","tournament":"Roland Garros"},
-        {"p1":"Jannik Sinner","p2":"Daniil Medvedev","surface":"Hard","tournament":"Miami Open"},
-        {"p1":"Alexander Zverev","p2":"Stefanos Tsitsipas","surface":"Clay","tournament":"Madrid Open"},
-        {"p1":"Holger Rune","p2":"Casper Ruud","surface":"Grass","tournament":"Wimbledon"},
-    ]
+# ═══════════════════════════════════════════════════════════════
+# PAGE : LIVE
+# ═══════════════════════════════════════════════════════════════
+def live_register(board, events, mi):
+    """Enregistre les nouveaux matchs du flux : forces au service ancrées sur l'ensemble d'avant-match."""
+    new={}
+    for e in events:
+        mid=e.get("match_id")
+        if mid is not None and mid not in board.matches and mid not in new and e.get("p1") and e.get("p2"):
+            new[mid]=(e["p1"],e["p2"],e.get("surface") or get_surface(e.get("tournament","")),e.get("tournament",""))
+    if not new: return
+    batch=ensemble_batch(list(new.values()),mi)
+    ps=(mi or {}).get("player_stats",{})
+    for (mid,(p1,p2,surf,tourn)),pr in zip(new.items(),batch["proba"]):
+        bo=int(next((e.get("best_of") for e in events if e.get("match_id")==mid and e.get("best_of")),get_level(tourn)[1]))
+        sa,sb=anchored_serves(serve_points_won(ps,p1),serve_points_won(ps,p2),float(pr),bo)
+        board.register(mid,sa,sb,bo,p1=p1,p2=p2,surface=surf,tournament=tourn,pre_match=float(pr))
+
+def show_live():
+    st.markdown(section_title("Live","Probabilites en direct depuis le flux de scores"), unsafe_allow_html=True)
+    path=st.text_input("Flux de scores (JSON lines)",str(LIVE_FEED))
+    if st.session_state.get("live_feed_path")!=path:
+        st.session_state["live_feed_path"]=path
+        st.session_state["live_feed"]=ScoreFeed(path)
+        st.session_state["live_board"]=LiveBoard()
+    feed,board=st.session_state["live_feed"],st.session_state["live_board"]
+    events=feed.poll()
+    if events:
+        live_register(board,events,load_rf_model())
+        board.apply(events)
+    if st.button("Rafraichir"): st.rerun()
+    live=[(mid,m) for mid,m in board.matches.items() if m["dist"] is not None]
+    if not live:
+        st.info("Aucun match en direct. Une ligne par point, ex. :")
+        st.code('{"match_id": "rg-sf1", "p1": "Carlos Alcaraz", "p2": "Jannik Sinner", "tournament": "Roland Garros", '
+                '"sets": [[6, 4]], "games": [2, 3], "points": ["30", "15"], "server": "p1"}')
+        return
+    st.caption(str(len(live))+" matchs · "+str(len(events))+" evenements traites"
+               +(" · "+str(board.rejected)+" ignores (dernier : "+str(board.last_error)+")" if board.rejected else ""))
+    rows=[]
+    for mid,m in live:
+        d,stt=m["dist"],m["state"]
+        line=22.5 if m["best_of"]==3 else 38.5
+        score=" ".join(str(a)+"-"+str(b) for a,b in stt["sets"])+" | "+str(stt["games"][0])+"-"+str(stt["games"][1])
+        (sa,sb),p_sc=max(d["sets"].items(),key=lambda x:x[1])
+        rows.append({"Match":m["p1"]+" vs "+m["p2"],"Score":score,
+                     "Points":str(stt["points"][0])+"-"+str(stt["points"][1])+(" *" if stt["server_a"] else " °"),
+                     "Avant-match %":round(m["pre_match"]*100,1),"Live %":round(d["p_win"]*100,1),
+                     "Total jeux":"Over "+str(line)+" : "+str(round(prob_total_over(d,line)*100,1))+"%",
+                     "Hcp -1.5 J1 %":round(prob_handicap(d,-1.5)*100,1),
+                     "Score sets probable":str(sa)+"-"+str(sb)+" ("+str(round(p_sc*100))+"%)",
+                     "Calcul (us)":m.get("compute_us")})
+    st.dataframe(pd.DataFrame(rows),use_container_width=True,hide_index=True)
+
+# ═══════════════════════════════════════════════════════════════
+# PAGE : TABLEAU (simulation Monte-Carlo)
+# ═══════════════════════════════════════════════════════════════
+def draw_win_matrix(players, surface, tournament, mi):
+    """P(i bat j) : ELO global/surface, mélangé en log-odds avec le RF là où il est disponible."""
+    elo=get_elo_ratings()
+    g=[elo.get(p,{}).get("global",ELO_BASE) for p in players]
+    s=[elo.get(p,{}).get(surface,ELO_BASE) for p in players]
+    M=elo_win_matrix(g,s)
+    iu=np.triu_indices(len(players),1)
+    matchups=[(players[i],players[j],surface,tournament) for i,j in zip(*iu)]
+    # H2H neutre : des milliers de paires, le RF n'en garde qu'une feature
+    rf,_=predict_rf_batch(matchups,np.full(len(matchups),0.5),mi)
+    R=np.full(M.shape,np.nan); R[iu]=rf
+    return blend_win_matrix(M,R,ENSEMBLE_WEIGHTS[0]), int((~np.isnan(rf)).sum()), len(rf)
+
+def show_draw():
+    st.markdown(section_title("Tableau","Probabilites de parcours et de titre par simulation"), unsafe_allow_html=True)
+    DRAWS_DIR.mkdir(exist_ok=True)
+    files=sorted(f.name for f in DRAWS_DIR.iterdir() if f.suffix.lower() in (".txt",".csv"))
+    if not files:
+        st.info("Deposez un tableau dans "+str(DRAWS_DIR)+" : un joueur par ligne dans l'ordre du tableau, "
+                "ligne vide ou 'bye' pour un bye (128 places max).")
+        return
+    c1,c2,c3=st.columns(3)
+    with c1: fname=st.selectbox("Tableau",files)
+    with c2: tourn=tourn_sel("Tournoi","draw_t")
+    with c3: n_sims=st.select_slider("Simulations",[10_000,50_000,100_000,200_000,500_000],value=100_000)
+    surface=get_surface(tourn)
+    try: slots=read_bracket(DRAWS_DIR/fname)
+    except (OSError,ValueError) as e: st.error(str(e)); return
+    raw=[n for n in slots if n]
+    resolved=load_name_index().resolve_many(raw)
+    players=[r or n for n,r in zip(raw,resolved)]
+    unknown=[n for n,r in zip(raw,resolved) if r is None]
+    st.markdown(surface_badge(surface)+" "+str(len(slots))+" places · "+str(len(players))+" joueurs", unsafe_allow_html=True)
+    if unknown: st.caption("Inconnus (ELO de base) : "+", ".join(unknown[:10])+(" ..." if len(unknown)>10 else ""))
+    if not st.button("Simuler",type="primary"): return
+    t0=time.time()
+    M,n_rf,n_pairs=draw_win_matrix(players,surface,tourn,load_rf_model())
+    it=iter(range(len(players)))
+    idx=[next(it) if n else None for n in slots]
+    reach=simulate_draw(M,idx,n_sims)
+    st.caption(f"{n_sims:,} tableaux en {time.time()-t0:.2f}s · RF sur {n_rf}/{n_pairs} paires")
+    df=pd.DataFrame(np.round(reach[:,1:]*100,2),columns=round_labels(len(slots))[1:])
+    df.insert(0,"Joueur",players)
+    df["Cote juste"]=np.round(1/np.maximum(reach[:,-1],1/n_sims),2)
+    st.dataframe(df.sort_values("Vainqueur",ascending=False),use_container_width=True,hide_index=True)
 
 # ═══════════════════════════════════════════════════════════════
 # PAGE : CONFIGURATION
@@ -1759,8 +2206,9 @@ def show_config():
             for feat,val in sorted(imp.items(),key=lambda x:x[1],reverse=True)[:10]:
                 st.progress(float(val),text=feat+": "+str(round(val*100,1))+"%")
         if st.button("Recharger modele"):
-            for k in ["rf_model_cache","model_metadata_cache","elo_ratings","momentum_cache"]:
+            for k in ["rf_model_cache","elo_ratings","momentum_cache"]:
                 st.session_state.pop(k,None)
+            get_file_cache().invalidate()
             st.rerun()
     else:
         st.warning("Aucun modele RF.")
@@ -1781,6 +2229,48 @@ def show_config():
         st.session_state.pop("momentum_cache",None)
         st.cache_data.clear(); st.rerun()
 
+    st.markdown("---")
+    st.subheader("Cache des predictions")
+    pc=get_pred_cache(); cs=pc.stats
+    c1,c2,c3,c4=st.columns(4)
+    with c1: st.markdown(big_metric("Hit rate",str(round(pc.hit_rate()*100,1))+"%"), unsafe_allow_html=True)
+    with c2: st.markdown(big_metric("Entrees",str(len(pc))+" / "+str(pc.maxsize),color="#0079FF"), unsafe_allow_html=True)
+    with c3: st.markdown(big_metric("Hits / Miss",str(cs["hits"])+" / "+str(cs["misses"]),color="#7A8599"), unsafe_allow_html=True)
+    with c4: st.markdown(big_metric("Invalidations",str(cs["invalidations"]),color="#7A8599"), unsafe_allow_html=True)
+    st.caption("TTL "+str(PRED_CACHE_TTL//60)+" min · evictions "+str(cs["evictions"])+" · expirations "+str(cs["expired"])
+               +" · version "+str(pc.version))
+    if st.button("Vider le cache"): pc.clear(); st.rerun()
+
+    st.markdown("---")
+    st.subheader("Cache des analyses IA")
+    lc=get_llm_cache(); ls=lc.stats()
+    c1,c2,c3,c4=st.columns(4)
+    with c1: st.markdown(big_metric("Hit rate",str(round(ls["hit_rate"]*100,1))+"%"), unsafe_allow_html=True)
+    with c2: st.markdown(big_metric("Entrees",str(ls["entries"])+" / "+str(LLM_CACHE_MAX),color="#0079FF"), unsafe_allow_html=True)
+    with c3: st.markdown(big_metric("Hits / Miss",str(ls["hits"])+" / "+str(ls["misses"]),color="#7A8599"), unsafe_allow_html=True)
+    with c4: st.markdown(big_metric("Taille",str(round(ls["bytes"]/1e3,1))+" Ko",color="#7A8599"), unsafe_allow_html=True)
+    st.caption("TTL "+str(LLM_CACHE_TTL//86400)+" j · evictions "+str(ls["evictions"]))
+    if st.button("Vider le cache IA"): lc.clear(); st.rerun()
+
+    st.markdown("---")
+    st.subheader("Connexions HTTP")
+    hm=get_http().metrics()
+    if hm:
+        st.dataframe(pd.DataFrame([{"Service":k,**v} for k,v in hm.items()]),
+                     use_container_width=True,hide_index=True)
+    else: st.caption("Aucun appel HTTP depuis le demarrage")
+
+    st.markdown("---")
+    st.subheader("Calibration")
+    cal=load_calibrator()
+    st.dataframe(pd.DataFrame([{"Surface":k,"Source":src,"Resultats":n,
+                                "p=0.60":round(float(cal.apply([0.6],[k])[0]),3),
+                                "p=0.75":round(float(cal.apply([0.75],[k])[0]),3)}
+                               for k,(src,n) in cal.summary().items()]),
+                 use_container_width=True,hide_index=True)
+    if st.button("Recalibrer depuis l'historique"):
+        st.session_state.pop("calibrator",None); st.rerun()
+
     st.markdown("---")
     st.subheader("Tests IA")
     c1,c2,c3=st.columns(3)
@@ -1798,14 +2288,19 @@ def show_config():
     c1,c2,c3=st.columns(3)
     with c1:
         if st.button("Effacer historique",use_container_width=True):
-            if HIST_FILE.exists(): HIST_FILE.unlink()
+            get_store().clear()
             update_stats(); st.rerun()
     with c2:
-        if st.button("Recalculer stats",use_container_width=True):
+        if st.button("Recalculer stats (reparation)",use_container_width=True):
             update_stats(); st.success("OK")
     with c3:
         if st.button("Backup",use_container_width=True):
-            backup(); st.success("OK")
+            res=backup()
+            if res:
+                snap,bs,rm=res; n,size=BackupRepo(BACKUP_DIR).usage()
+                st.success(snap+" · "+str(bs["new_chunks"])+"/"+str(bs["chunks"])+" blocs nouveaux · "
+                           +str(n)+" instantanes ("+str(round(size/1e6,1))+" Mo)")
+            else: st.error("Backup impossible")
 
 def show_telegram():
     st.markdown(section_title("Telegram","Notifications"), unsafe_allow_html=True)
@@ -1815,10 +2310,19 @@ def show_telegram():
         st.code("TELEGRAM_BOT_TOKEN = ...\nTELEGRAM_CHAT_ID = ...")
         return
     st.success("Telegram configure - Chat ID: "+str(chat_id))
+    qs=tg_queue().stats()
+    q1,q2,q3,q4=st.columns(4)
+    q1.metric("En attente",qs.get("pending",0)+qs.get("sending",0))
+    q2.metric("Envoyes",qs.get("sent",0))
+    q3.metric("Echecs",qs.get("failed",0))
+    with q4:
+        if st.button("Rafraichir",use_container_width=True): st.rerun()
+    if qs.get("last_error"): st.caption("Derniere erreur: "+qs["last_error"])
     c1,c2,c3=st.columns(3)
     with c1:
         if st.button("Tester",use_container_width=True):
-            ok,msg=tg_send("<b>Test TennisIQ</b>\n"+datetime.now().strftime("%d/%m/%Y %H:%M"))
+            # Envoi direct (hors file) : le résultat reflète vraiment l'état du bot
+            ok,msg=tg_queue().send_now("<b>Test TennisIQ</b>\n"+datetime.now().strftime("%d/%m/%Y %H:%M"))
             st.success(msg) if ok else st.error(msg)
     with c2:
         if st.button("Stats",use_container_width=True):
@@ -1845,7 +2349,7 @@ def main():
 
     if "last_backup" not in st.session_state:
         st.session_state["last_backup"]=datetime.now()
-    if (datetime.now()-st.session_state["last_backup"]).seconds>=86400:
+    if (datetime.now()-st.session_state["last_backup"]).total_seconds()>=86400:
         backup(); st.session_state["last_backup"]=datetime.now()
 
     with st.sidebar:
@@ -1860,11 +2364,14 @@ def main():
 
         page=st.radio("Nav",
                       ["Dashboard","Analyse","En Attente","Statistiques",
-                       "Value Bets","Telegram","Configuration"],
+                       "Value Bets","Live","Tableau","Telegram","Configuration"],
                       label_visibility="collapsed")
+        st.selectbox("De-margination des cotes",DEVIG_METHODS,
+                     index=DEVIG_METHODS.index(DEVIG_DEFAULT),key="devig_method",
+                     help="proportional : prorata · power : marge plus forte sur les outsiders · shin : parieurs inities")
 
-        s=load_user_stats(); h=load_history()
-        acc=calc_accuracy(); pend=len([p for p in h if p.get("statut")=="en_attente"])
+        s=load_user_stats()
+        acc=calc_accuracy(s); pend=s["pending_predictions"]
         sc="#FF4757" if s.get("current_streak",0)==0 else "#00DFA2"
         st.markdown(
             "<div style='padding:0.5rem 0;'>"
@@ -1888,6 +2395,8 @@ def main():
     elif page=="En Attente":    show_pending()
     elif page=="Statistiques":  show_statistics()
     elif page=="Value Bets":    show_value_bets()
+    elif page=="Live":          show_live()
+    elif page=="Tableau":       show_draw()
     elif page=="Telegram":      show_telegram()
     elif page=="Configuration": show_config()
 
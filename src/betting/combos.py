@@ -0,0 +1,86 @@
+"""
+Combinés (accumulateurs) par séparation-évaluation.
+
+Un combiné de k jambes indépendantes a pour proba P = Π p_i, pour cote
+O = Π o_i, et pour edge P - 1/O = P · (1 - 1/R) avec R = Π p_i·o_i.
+
+- Une jambe avec p·o ≤ 1 fait baisser à la fois P et R : elle ne peut
+  qu'abaisser l'edge, donc seules les jambes de valeur (p·o > 1) sont explorées.
+- Ajouter une jambe ne fait jamais monter P. Triées par p·o décroissant, les
+  m jambes suivantes donnent le meilleur R atteignable : pour tout
+  prolongement, edge ≤ P_courant · (1 - 1/R_borne). Une branche dont cette
+  borne est sous le seuil (edge min, ou K-ième meilleur déjà trouvé) est coupée
+  sans énumérer ses descendants.
+
+Les K meilleurs combinés sont gardés dans un tas borné ; l'espace
+combinatoire complet n'est jamais matérialisé.
+"""
+import heapq
+import math
+
+
+def build_combos(legs, min_legs=2, max_legs=4, min_edge=0.02, min_proba=0.05,
+                 top_k=20, kelly_frac=0.25, max_nodes=2_000_000):
+    """
+    Meilleurs combinés parmi `legs` = [{"match": id, "proba": p, "cote": o, ...}].
+
+    Une seule jambe par match (les deux issues d'un même match s'excluent).
+    Retourne (combinés triés par edge décroissant, nombre de nœuds explorés) ;
+    chaque combiné = {"legs": indices dans `legs`, "proba", "cote", "edge",
+    "ev" (P·O - 1), "kelly"}.
+    """
+    cand = [(i, l["match"], float(l["proba"]), float(l["cote"]))
+            for i, l in enumerate(legs)
+            if l.get("cote", 0) > 1.0 and 0.0 < l.get("proba", 0) < 1.0 and l["proba"] * l["cote"] > 1.0]
+    cand.sort(key=lambda c: c[2] * c[3], reverse=True)
+    n = len(cand)
+    log_r = [math.log(p * o) for _, _, p, o in cand]
+    # prefix[j] = Σ_{t<j} log r_t : les m meilleures jambes après i = prefix[i+1+m] - prefix[i+1]
+    prefix = [0.0]
+    for lr in log_r:
+        prefix.append(prefix[-1] + lr)
+
+    heap = []
+    nodes = 0
+
+    def threshold():
+        return heap[0][0] if len(heap) >= top_k else min_edge
+
+    def dfs(start, chosen, matches, P, O, logR):
+        nonlocal nodes
+        depth = len(chosen)
+        for j in range(start, n):
+            if nodes >= max_nodes:
+                return
+            idx, match, p, o = cand[j]
+            if match in matches:
+                continue
+            P2 = P * p
+            if P2 < min_proba:
+                continue            # P décroît : aucune extension ne repasse au-dessus
+            nodes += 1
+            logR2 = logR + log_r[j]
+            k = depth + 1
+            if k >= min_legs:
+                edge = P2 * (1.0 - math.exp(-logR2))
+                if edge > threshold():
+                    item = (edge, tuple(chosen + [idx]), P2, O * o)
+                    if len(heap) < top_k:
+                        heapq.heappush(heap, item)
+                    else:
+                        heapq.heapreplace(heap, item)
+            if k >= max_legs:
+                continue
+            m = min(max_legs - k, n - j - 1)
+            bound_logR = logR2 + prefix[j + 1 + m] - prefix[j + 1]
+            if P2 * (1.0 - math.exp(-bound_logR)) <= threshold():
+                continue
+            dfs(j + 1, chosen + [idx], matches | {match}, P2, O * o, logR2)
+
+    dfs(0, [], frozenset(), 1.0, 1.0, 0.0)
+    combos = []
+    for edge, idx, P, O in sorted(heap, reverse=True):
+        ev = P * O - 1.0
+        combos.append({"legs": idx, "proba": P, "cote": O, "edge": edge, "ev": ev,
+                       "kelly": round(max(ev / (O - 1.0), 0.0) * kelly_frac, 4)})
+    return combos, nodes
@@ -0,0 +1,114 @@
+"""
+Dé-margination des cotes (suppression de l'overround bookmaker).
+
+Les probabilités implicites brutes π = 1/cote somment à 1 + marge. Trois
+méthodes ramènent la somme à 1, toutes vectorisées sur un tableau (N, k) de
+marchés à k issues — aucune boucle Python sur les marchés :
+
+- proportional : p = π / Σπ (marge répartie au prorata)
+- power        : p = π^κ avec κ tel que Σ π^κ = 1 (marge plus forte sur les outsiders)
+- shin         : modèle de Shin (1993) à fraction z de parieurs initiés,
+                 z tel que Σ p_i(z) = 1
+
+power et shin sont résolus par Newton sur tous les marchés à la fois ;
+les marchés déjà convergés sont simplement masqués.
+"""
+import numpy as np
+
+METHODS = ("proportional", "power", "shin")
+DEFAULT_METHOD = "power"
+
+
+def implied(odds):
+    """π = 1/cote, cotes ≤ 1 ou NaN → NaN."""
+    o = np.asarray(odds, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(o > 1.0, 1.0 / o, np.nan)
+
+
+def overround(odds):
+    """Marge par marché : Σ 1/cote - 1."""
+    return implied(np.atleast_2d(odds)).sum(axis=1) - 1.0
+
+
+def _proportional(pi):
+    return pi / pi.sum(axis=1, keepdims=True)
+
+
+def _power(pi, tol, max_iter):
+    """Newton sur f(κ) = Σ π^κ - 1, f'(κ) = Σ π^κ ln π (f décroissante, convexe)."""
+    log_pi = np.log(pi)
+    kappa = np.ones(len(pi))
+    active = np.ones(len(pi), dtype=bool)
+    for _ in range(max_iter):
+        pk = np.exp(kappa[active, None] * log_pi[active])
+        f = pk.sum(axis=1) - 1.0
+        df = (pk * log_pi[active]).sum(axis=1)
+        step = f / df
+        kappa[active] = np.maximum(kappa[active] - step, 1e-6)
+        done = np.abs(f) < tol
+        active[np.flatnonzero(active)[done]] = False
+        if not active.any():
+            break
+    return np.exp(kappa[:, None] * log_pi)
+
+
+def _shin(pi, tol, max_iter):
+    """
+    p_i(z) = (sqrt(z² + 4(1-z) π_i²/S) - z) / (2(1-z)), S = Σπ.
+    Σ p_i(0) = sqrt(S) > 1 et Σ p_i décroît avec z : Newton depuis z = 0.
+    """
+    S = pi.sum(axis=1, keepdims=True)
+    a = pi ** 2 / S
+    z = np.zeros(len(pi))
+    active = (S[:, 0] > 1.0)
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        za = z[active, None]
+        aa = a[active]
+        r = np.sqrt(za ** 2 + 4.0 * (1.0 - za) * aa)
+        p = (r - za) / (2.0 * (1.0 - za))
+        dr = (za - 2.0 * aa) / r
+        dp = ((dr - 1.0) * (1.0 - za) + (r - za)) / (2.0 * (1.0 - za) ** 2)
+        f = p.sum(axis=1) - 1.0
+        z[active] = np.clip(z[active] - f / dp.sum(axis=1), 0.0, 0.99)
+        done = np.abs(f) < tol
+        active[np.flatnonzero(active)[done]] = False
+    z = z[:, None]
+    p = (np.sqrt(z ** 2 + 4.0 * (1.0 - z) * a) - z) / (2.0 * (1.0 - z))
+    # Marchés sans marge (z = 0) : renormalisation simple
+    return p / p.sum(axis=1, keepdims=True)
+
+
+def devig(odds, method=DEFAULT_METHOD, tol=1e-10, max_iter=50):
+    """
+    Probabilités « justes » à partir des cotes.
+
+    odds   : (N, k) ou (k,) — une ligne par marché, une colonne par issue
+    method : "proportional" | "power" | "shin"
+    Retourne un tableau de même forme ; un marché avec une cote invalide
+    (≤ 1 ou NaN) donne une ligne de NaN.
+    """
+    if method not in METHODS:
+        raise ValueError(f"méthode de dé-margination inconnue : {method} (attendu : {METHODS})")
+    o = np.asarray(odds, dtype=np.float64)
+    single = o.ndim == 1
+    pi = implied(np.atleast_2d(o))
+    ok = ~np.isnan(pi).any(axis=1)
+    out = np.full(pi.shape, np.nan)
+    if ok.any():
+        p = pi[ok]
+        if method == "proportional":
+            out[ok] = _proportional(p)
+        elif method == "power":
+            out[ok] = _power(p, tol, max_iter)
+        else:
+            out[ok] = _shin(p, tol, max_iter)
+    return out[0] if single else out
+
+
+def devig_two_way(o1, o2, method=DEFAULT_METHOD):
+    """Raccourci marchés à deux issues : retourne (p1, p2) justes."""
+    p = devig(np.column_stack([np.ravel(o1), np.ravel(o2)]), method)
+    return p[:, 0], p[:, 1]
@@ -0,0 +1,154 @@
+"""
+Scanner de value bets sur fichiers de cotes locaux.
+
+Un fichier (CSV ou JSON lines) contient une ligne par marché vainqueur du
+match : joueur 1, joueur 2, cote J1, cote J2, et optionnellement surface,
+tournoi et bookmaker. Les noms sont résolus via un index normalisé construit
+une fois, puis edges et Kelly sont calculés pour les deux côtés en opérations
+vectorisées ; seuls les K meilleurs edges sont conservés (tas borné).
+"""
+import heapq
+import re
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .devig import devig, DEFAULT_METHOD
+
+ODDS_EXTENSIONS = (".csv", ".jsonl", ".json")
+
+# Noms de colonnes acceptés → nom canonique
+COLUMN_ALIASES = {
+    "p1": "p1", "player1": "p1", "player_1": "p1", "joueur1": "p1", "home": "p1",
+    "p2": "p2", "player2": "p2", "player_2": "p2", "joueur2": "p2", "away": "p2",
+    "o1": "o1", "odds1": "o1", "odds_p1": "o1", "cote1": "o1", "odds_home": "o1",
+    "o2": "o2", "odds2": "o2", "odds_p2": "o2", "cote2": "o2", "odds_away": "o2",
+    "surface": "surface",
+    "tournament": "tournament", "tournoi": "tournament",
+    "bookmaker": "bookmaker", "book": "bookmaker",
+}
+REQUIRED_COLUMNS = ("p1", "p2", "o1", "o2")
+
+
+def normalize_name(name):
+    """Minuscules, sans accents ni ponctuation, espaces compactés."""
+    s = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode()
+    s = re.sub(r"[^a-z ]+", " ", s.lower().replace("-", " "))
+    return " ".join(s.split())
+
+
+class NameIndex:
+    """
+    Résolution nom libre → nom canonique du dataset.
+
+    Trois clés par joueur : nom complet, nom inversé ("alcaraz carlos") et
+    nom + initiale ("alcaraz c"). Une clé partagée par plusieurs joueurs est
+    écartée plutôt que résolue au hasard.
+    """
+
+    def __init__(self, players):
+        self.exact = {}
+        short = {}
+        for p in players:
+            n = normalize_name(p)
+            parts = n.split()
+            if not parts:
+                continue
+            self.exact.setdefault(n, p)
+            if len(parts) > 1:
+                self.exact.setdefault(" ".join(parts[1:] + parts[:1]), p)
+                for k in (parts[-1] + " " + parts[0][0], parts[0][0] + " " + parts[-1]):
+                    short.setdefault(k, set()).add(p)
+        self.short = {k: next(iter(v)) for k, v in short.items() if len(v) == 1}
+
+    def resolve(self, name):
+        n = normalize_name(name)
+        if n in self.exact:
+            return self.exact[n]
+        parts = n.split()
+        if len(parts) > 1:
+            # "Alcaraz C." / "C. Alcaraz"
+            for k in (parts[0] + " " + parts[-1][0], parts[-1] + " " + parts[0][0], n):
+                if k in self.short:
+                    return self.short[k]
+        return None
+
+    def resolve_many(self, names):
+        """Résout un tableau de noms ; chaque nom distinct n'est traité qu'une fois."""
+        codes, uniques = pd.factorize(pd.Series(names, dtype=object))
+        resolved = np.array([self.resolve(u) for u in uniques] + [None], dtype=object)
+        return resolved[codes]
+
+
+def odds_files(path):
+    """Fichiers de cotes sous `path` (fichier unique ou répertoire, non récursif)."""
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    if not path.is_dir():
+        return []
+    return sorted(f for f in path.iterdir() if f.suffix.lower() in ODDS_EXTENSIONS)
+
+
+def _read_one(f):
+    if f.suffix.lower() == ".csv":
+        df = pd.read_csv(f, on_bad_lines="skip")
+    else:
+        df = pd.read_json(f, lines=True)
+    df = df.rename(columns=lambda c: COLUMN_ALIASES.get(str(c).strip().lower(), str(c).strip().lower()))
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"{f.name}: colonnes manquantes {missing}")
+    df["source"] = f.name
+    return df
+
+
+def read_odds(path):
+    """
+    Charge tous les marchés sous `path` dans un DataFrame
+    (p1, p2, o1, o2, surface, tournament, bookmaker, source).
+    Les cotes ≤ 1 ou illisibles (virgule décimale acceptée) sont écartées.
+    """
+    frames = [_read_one(f) for f in odds_files(path)]
+    if not frames:
+        return pd.DataFrame(columns=list(REQUIRED_COLUMNS) + ["surface", "tournament", "bookmaker", "source"])
+    df = pd.concat(frames, ignore_index=True)
+    for c in ("surface", "tournament", "bookmaker"):
+        if c not in df.columns:
+            df[c] = None
+    for c in ("o1", "o2"):
+        if df[c].dtype == object:
+            df[c] = df[c].astype(str).str.replace(",", ".", regex=False)
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    df = df[(df["o1"] > 1.0) & (df["o2"] > 1.0)]
+    return df[list(REQUIRED_COLUMNS) + ["surface", "tournament", "bookmaker", "source"]].reset_index(drop=True)
+
+
+def edges_and_kelly(proba, o1, o2, fraction=0.25, method=DEFAULT_METHOD):
+    """
+    Edges et Kelly fractionné des deux côtés pour N marchés.
+    L'edge est mesuré contre les probas dé-marginées (`method`, cf. devig).
+    Retourne (edge (N, 2), kelly (N, 2), marge (N,)) — colonne 0 = J1, 1 = J2.
+    """
+    p = np.column_stack([proba, 1.0 - np.asarray(proba, dtype=float)])
+    o = np.column_stack([o1, o2]).astype(float)
+    edge = p - devig(o, method)
+    b = o - 1.0
+    kelly = np.where(b > 0, np.maximum((b * p - (1.0 - p)) / np.where(b > 0, b, 1.0), 0.0) * fraction, 0.0)
+    marge = (1.0 / o).sum(axis=1) - 1.0
+    return edge, np.round(kelly, 4), marge
+
+
+def top_value_bets(edge, k, min_edge=0.0):
+    """
+    Indices (marché, côté) des K plus gros edges > min_edge, triés décroissants.
+    Seuls les candidats passent dans le tas borné de taille K.
+    """
+    rows, sides = np.nonzero(edge > min_edge)
+    if k <= 0 or len(rows) == 0:
+        return []
+    vals = edge[rows, sides]
+    best = heapq.nlargest(k, range(len(vals)), key=vals.__getitem__)
+    return [(int(rows[j]), int(sides[j])) for j in best]
@@ -0,0 +1,99 @@
+"""
+Cache adressé par contenu pour les matrices de features.
+
+La clé d'une entrée est le hash de (manifest des données brutes, version du
+code de feature engineering, liste des features). Les tableaux sont stockés en
+.npy et rechargés en memory-map : un hit ne relit ni les CSV ni le code de
+features, l'entraînement démarre immédiatement.
+"""
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_STORE_DIR = Path(__file__).resolve().parents[2] / "data" / "feature_store"
+
+
+def data_manifest(paths):
+    """Liste triée (nom, taille, mtime_ns) des fichiers bruts — un seul stat() par fichier."""
+    manifest = []
+    for p in sorted(Path(p) for p in paths):
+        st = p.stat()
+        manifest.append((p.name, st.st_size, st.st_mtime_ns))
+    return manifest
+
+
+def code_version(*funcs, version="1"):
+    """Hash du source des fonctions (ou modules) de feature engineering (+ version manuelle)."""
+    h = hashlib.sha256(str(version).encode())
+    for fn in funcs:
+        try:
+            h.update(inspect.getsource(fn).encode())
+        except (OSError, TypeError):
+            h.update(getattr(fn, "__qualname__", repr(fn)).encode())
+    return h.hexdigest()[:16]
+
+
+def feature_key(manifest, code_ver, features, **params):
+    payload = json.dumps({"manifest": manifest, "code": code_ver,
+                          "features": list(features), "params": params},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+class FeatureStore:
+    """Répertoire de matrices de features indexées par clé de contenu."""
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = Path(root)
+
+    def _entry(self, key):
+        return self.root / key
+
+    def load(self, key, mmap=True):
+        """Retourne {nom: array} (memory-mappés) ou None si absent."""
+        entry = self._entry(key)
+        meta_file = entry / "meta.json"
+        if not meta_file.exists():
+            return None
+        with open(meta_file) as f:
+            meta = json.load(f)
+        mode = "r" if mmap else None
+        return {name: np.load(entry / (name + ".npy"), mmap_mode=mode)
+                for name in meta["arrays"]}
+
+    def save(self, key, arrays, **meta):
+        """Écrit les tableaux dans un dossier temporaire puis le renomme (atomique)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / (".tmp_" + key + "_" + uuid.uuid4().hex[:8])
+        tmp.mkdir()
+        try:
+            for name, arr in arrays.items():
+                np.save(tmp / (name + ".npy"), np.ascontiguousarray(arr), allow_pickle=False)
+            with open(tmp / "meta.json", "w") as f:
+                json.dump({"arrays": list(arrays), **meta}, f, default=str)
+            entry = self._entry(key)
+            if entry.exists():
+                shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+
+    def get_or_build(self, key, builder, **meta):
+        """Hit → tableaux memory-mappés ; miss → builder() puis sauvegarde."""
+        cached = self.load(key)
+        if cached is not None:
+            return cached, True
+        arrays = builder()
+        self.save(key, arrays, **meta)
+        return self.load(key), False
+
+    def clear(self):
+        if self.root.exists():
+            shutil.rmtree(self.root, ignore_errors=True)
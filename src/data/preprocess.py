@@ -1,60 +1,214 @@
 import pandas as pd
+import numpy as np
+from collections import deque
 from pathlib import Path
 
-def calculate_form(df, team_col, result_col, n=5):
-    """Calcule la forme sur n derniers matchs (points: 3 win, 1 draw, 0 loss)"""
-    df['points'] = df[result_col].map({'W': 3, 'D': 1, 'L': 0})
-    df[f'form_{n}'] = df.groupby(team_col)['points'].rolling(n, min_periods=1).sum().reset_index(0, drop=True)
+from src.data import rolling
+from src.data.feature_store import data_manifest, code_version, feature_key
+from src.data.rolling import rolling_features, days_since_previous
+
+FOOTBALL_FEATURES = ['home_form_5', 'away_form_5', 'home_goals_avg', 'away_goals_avg', 'diff_classement', 'B365H', 'B365D', 'B365A']
+TENNIS_FEATURES = ['rank_diff', 'surface_hard', 'surface_clay', 'surface_grass', 'form_10_p1', 'form_10_p2',
+                   'h2h_p1_wins', 'h2h_p2_wins', 'fatigue_p1', 'fatigue_p2', 'days_since_last_p1', 'days_since_last_p2']
+BASKETBALL_FEATURES = ['points_avg_home', 'reb_avg_home', 'eff_rating_home', 'back_to_back', 'spread', 'points_avg_away', 'reb_avg_away', 'eff_rating_away']
+
+def calculate_form(df, team_col, result_col, n=5, date_col=None, points_map=None):
+    """Calcule la forme sur n derniers matchs (points: 3 win, 1 draw, 0 loss), match courant exclu"""
+    df['points'] = df[result_col].map(points_map or {'W': 3, 'D': 1, 'L': 0})
+    df[f'form_{n}'] = rolling_features(df, team_col, {f'form_{n}': ('points', 'sum', n)}, date_col=date_col)[f'form_{n}']
     return df
 
-def preprocess_football(raw_path, processed_path):
+def _column_array(name, col):
+    """Colonne → tableau numpy stockable ; les colonnes objet doivent être numériques."""
+    if col.dtype.kind in "biufcmM":
+        return col.to_numpy()
+    try:
+        return pd.to_numeric(col, errors="raise").to_numpy(dtype=np.float64)
+    except (ValueError, TypeError):
+        raise ValueError(f"colonne non numerique {name!r} : le feature store ne met en cache que des "
+                         "colonnes numeriques (l'encoder ou l'exclure des features)") from None
+
+def _cached(raw_path, builder, features, store):
+    """Passe par le feature store (si fourni) : un hit évite tout le feature engineering."""
+    if store is None:
+        return builder(raw_path)
+    # Tout le code dont dépendent les features : un helper modifié invalide le cache
+    # (module rolling entier : _group_order, days_since_previous…)
+    deps = (builder, calculate_form, tennis_history_features, approx_match_dates, _column_array, rolling)
+    key = feature_key(data_manifest([raw_path]), code_version(*deps), features)
+
+    def build():
+        out = builder(raw_path)
+        return {c: _column_array(c, out[c]) for c in out.columns}
+
+    arrays, _ = store.get_or_build(key, build, raw_path=str(raw_path))
+    return pd.DataFrame({c: np.asarray(a) for c, a in arrays.items()})
+
+def _football_features(raw_path):
     df = pd.read_csv(raw_path)  # Assume colonnes comme FTHG (full time home goals), FTAG, etc. de football-data.co.uk
+    date_col = None
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'], dayfirst=True, errors='coerce')
+        date_col = 'Date'
     df['home_win'] = (df['FTHG'] > df['FTAG']).astype(int)
-    # Ajoute forme (exemple simplifié – adapte à ton dataset)
-    df = calculate_form(df, 'HomeTeam', 'FTR', n=5).rename(columns={'form_5': 'home_form_5'})
-    df = calculate_form(df, 'AwayTeam', 'FTR', n=5).rename(columns={'form_5': 'away_form_5'})
-    # Ajoute averages (rolling)
-    df['home_goals_avg'] = df.groupby('HomeTeam')['FTHG'].rolling(5, min_periods=1).mean().reset_index(0, drop=True)
-    df['away_goals_avg'] = df.groupby('AwayTeam')['FTAG'].rolling(5, min_periods=1).mean().reset_index(0, drop=True)
+    # Points du point de vue de chaque équipe (FTR = H / D / A)
+    df['home_points'] = df['FTR'].map({'H': 3, 'D': 1, 'A': 0})
+    df['away_points'] = df['FTR'].map({'A': 3, 'D': 1, 'H': 0})
+    # Forme + moyennes de buts sur les 5 matchs précédents, un seul tri par équipe
+    home = rolling_features(df, 'HomeTeam', {
+        'home_form_5':    ('home_points', 'sum', 5),
+        'home_goals_avg': ('FTHG', 'mean', 5),
+    }, date_col=date_col)
+    away = rolling_features(df, 'AwayTeam', {
+        'away_form_5':    ('away_points', 'sum', 5),
+        'away_goals_avg': ('FTAG', 'mean', 5),
+    }, date_col=date_col)
+    df = df.join(home).join(away)
     df['diff_classement'] = df['HomeTeam_rank'] - df['AwayTeam_rank']  # Assume tu as des ranks
     # Sélectionne features + target
-    features = ['home_form_5', 'away_form_5', 'home_goals_avg', 'away_goals_avg', 'diff_classement', 'B365H', 'B365D', 'B365A']
-    df[features + ['home_win']].rename(columns={'home_win': 'target'}).to_csv(processed_path, index=False)
+    return df[FOOTBALL_FEATURES + ['home_win']].rename(columns={'home_win': 'target'})
+
+def preprocess_football(raw_path, processed_path, store=None):
+    _cached(raw_path, _football_features, FOOTBALL_FEATURES, store).to_csv(processed_path, index=False)
     print(f"Processed football data saved to {processed_path}")
 
-def preprocess_tennis(raw_path, processed_path):
+# Tours du tableau principal dans l'ordre (TML : pas de qualifications ; BR = match pour le bronze)
+ROUND_ORDER = {'R128': 0, 'R64': 1, 'R32': 2, 'R16': 3, 'QF': 4, 'SF': 5, 'F': 6, 'BR': 6}
+
+def approx_match_dates(df, date_col='tourney_date'):
+    """
+    Date approximative de chaque match : `tourney_date` (TML) est la date de début du
+    tournoi. On ajoute un jour par tour depuis le premier tour du tournoi (deux jours
+    en Bo5, rythme des Grands Chelems) ; les tours hors tableau (RR…) gardent la date
+    de début et match_num les départage.
+    """
+    dates = pd.to_datetime(df[date_col], errors='coerce')
+    if 'round' not in df.columns:
+        return dates
+    rank = df['round'].map(ROUND_ORDER)
+    tourney = df['tourney_id'] if 'tourney_id' in df.columns else dates
+    first = rank.groupby(tourney).transform('min')
+    step = np.where(df['best_of'] == 5, 2, 1) if 'best_of' in df.columns else 1
+    offset = ((rank - first) * step).fillna(0)
+    return dates + pd.to_timedelta(offset, unit='D')
+
+def tennis_history_features(p1_ids, p2_ids, dates, p1_won, window_days=7, order=None):
+    """
+    H2H et fatigue point-in-time en une passe chronologique, O(n) au total.
+
+    - h2h_p1_wins / h2h_p2_wins : victoires de chaque joueur dans les
+      confrontations précédentes (compteurs par paire, clé entière)
+    - days_since_last_p* : jours depuis le match précédent du joueur
+    - fatigue_p* : matchs joués dans les `window_days` jours précédents
+      (file de dates par joueur, chaque date entre et sort une seule fois)
+
+    Le match courant n'est jamais compté. `dates` doit être la date du match
+    (cf. approx_match_dates) : avec la seule date de début de tournoi, tous les
+    matchs d'un même tournoi auraient days_since_last = 0. À date égale, `order`
+    (match_num en TML) puis l'ordre du fichier départagent.
+    """
+    n = len(p1_ids)
+    codes, _ = pd.factorize(pd.concat([pd.Series(p1_ids), pd.Series(p2_ids)], ignore_index=True))
+    c1, c2 = codes[:n], codes[n:]
+    stride = int(codes.max()) + 1 if n else 1
+    days = pd.to_datetime(pd.Series(dates), errors="coerce").to_numpy(dtype="datetime64[D]")
+    has_day = ~np.isnat(days)
+    day_int = np.where(has_day, days.view("int64"), 0)
+    won = np.asarray(p1_won, dtype=bool)
+    tie = np.zeros(n) if order is None else \
+        np.nan_to_num(pd.to_numeric(pd.Series(order), errors='coerce').to_numpy(dtype=np.float64))
+
+    h2h_1, h2h_2 = np.zeros(n), np.zeros(n)
+    last_1, last_2 = np.full(n, np.nan), np.full(n, np.nan)
+    fat_1, fat_2 = np.full(n, np.nan), np.full(n, np.nan)
+
+    pair_wins = {}   # lo * stride + hi → [victoires lo, victoires hi]
+    last_day = {}    # joueur → dernier jour joué
+    recent = {}      # joueur → deque des jours dans la fenêtre
+
+    for i in np.lexsort((np.arange(n), tie, day_int)):
+        a, b = int(c1[i]), int(c2[i])
+        key = a * stride + b if a < b else b * stride + a
+        wins = pair_wins.get(key)
+        if wins is None:
+            wins = pair_wins[key] = [0, 0]
+        ia, ib = (0, 1) if a < b else (1, 0)
+        h2h_1[i], h2h_2[i] = wins[ia], wins[ib]
+
+        if has_day[i]:
+            day = int(day_int[i])
+            for player, last_out, fat_out in ((a, last_1, fat_1), (b, last_2, fat_2)):
+                dq = recent.get(player)
+                if dq is None:
+                    dq = recent[player] = deque()
+                while dq and dq[0] <= day - window_days:
+                    dq.popleft()
+                fat_out[i] = len(dq)
+                if player in last_day:
+                    last_out[i] = day - last_day[player]
+            for player in (a, b):
+                recent[player].append(day)
+                last_day[player] = day
+
+        wins[ia if won[i] else ib] += 1
+
+    return pd.DataFrame({
+        'h2h_p1_wins': h2h_1, 'h2h_p2_wins': h2h_2,
+        'days_since_last_p1': last_1, 'days_since_last_p2': last_2,
+        'fatigue_p1': fat_1, 'fatigue_p2': fat_2,
+    })
+
+def _tennis_features(raw_path):
     df = pd.read_csv(raw_path)  # Assume colonnes comme winner_id, loser_id, surface, rank_points_winner, etc. de JeffSackmann
     df['player1_win'] = 1  # Assume player1 est winner pour simplifier – adapte
     # One-hot pour surface
     df = pd.get_dummies(df, columns=['surface'])
+    date_col = 'tourney_date' if 'tourney_date' in df.columns else None
+    if date_col:
+        df[date_col] = pd.to_datetime(df[date_col].astype(str), format='%Y%m%d', errors='coerce')
     # Forme récente
-    df = calculate_form(df, 'player1_id', 'winner', n=10).rename(columns={'form_10': 'form_10_p1'})  # Adap te 'winner' column
-    df = calculate_form(df, 'player2_id', 'winner', n=10).rename(columns={'form_10': 'form_10_p2'})
+    df = calculate_form(df, 'player1_id', 'winner', n=10, date_col=date_col).rename(columns={'form_10': 'form_10_p1'})  # Adap te 'winner' column
+    df = calculate_form(df, 'player2_id', 'winner', n=10, date_col=date_col).rename(columns={'form_10': 'form_10_p2'})
     df['rank_diff'] = df['rank_points_p1'] - df['rank_points_p2']
-    df['h2h_p1_wins'] = 0  # À calculer avec groupby sur historical matches
-    df['fatigue_p1'] = df.groupby('player1_id')['match_num'].rolling(5).count().reset_index(0, drop=True)  # Ex fatigue
-    features = ['rank_diff', 'surface_hard', 'surface_clay', 'surface_grass', 'form_10_p1', 'form_10_p2', 'h2h_p1_wins', 'fatigue_p1']
-    df[features + ['player1_win']].rename(columns={'player1_win': 'target'}).to_csv(processed_path, index=False)
+    # H2H + fatigue (7 jours) + repos, en une passe chronologique sur la date approximative du match
+    p1_won = (df['winner_id'] == df['player1_id']) if 'winner_id' in df.columns else df['player1_win'].astype(bool)
+    hist = tennis_history_features(df['player1_id'], df['player2_id'],
+                                   approx_match_dates(df, date_col) if date_col else pd.Series(pd.NaT, index=df.index),
+                                   p1_won, order=df['match_num'] if 'match_num' in df.columns else None)
+    df = df.join(hist.set_index(df.index))
+    return df[TENNIS_FEATURES + ['player1_win']].rename(columns={'player1_win': 'target'})
+
+def preprocess_tennis(raw_path, processed_path, store=None):
+    _cached(raw_path, _tennis_features, TENNIS_FEATURES, store).to_csv(processed_path, index=False)
     print(f"Processed tennis data saved to {processed_path}")
 
-def preprocess_basketball(raw_path, processed_path):
+def _basketball_features(raw_path):
     df = pd.read_csv(raw_path)  # Assume colonnes comme TEAM_ID_HOME, PTS_HOME, REB_HOME, etc. de Kaggle NBA
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'], errors='coerce')
     df['home_win'] = (df['PTS_HOME'] > df['PTS_AWAY']).astype(int)
-    # Averages
-    df['points_avg_home'] = df.groupby('TEAM_ID_HOME')['PTS_HOME'].rolling(5, min_periods=1).mean().reset_index(0, drop=True)
-    df['reb_avg_home'] = df.groupby('TEAM_ID_HOME')['REB_HOME'].rolling(5).mean().reset_index(0, drop=True)
+    # Averages sur les 5 matchs précédents (un seul tri par équipe)
+    home = rolling_features(df, 'TEAM_ID_HOME', {
+        'points_avg_home': ('PTS_HOME', 'mean', 5),
+        'reb_avg_home':    ('REB_HOME', 'mean', 5, 5),
+    }, date_col='GAME_DATE')
+    away = rolling_features(df, 'TEAM_ID_AWAY', {
+        'points_avg_away': ('PTS_AWAY', 'mean', 5, 5),
+        'reb_avg_away':    ('REB_AWAY', 'mean', 5, 5),
+    }, date_col='GAME_DATE')
+    df = df.join(home).join(away)
     df['eff_rating_home'] = (df['points_avg_home'] + df['reb_avg_home']) / 2  # Simplifié
-    df['back_to_back'] = df.groupby('TEAM_ID_HOME')['GAME_DATE'].diff().dt.days == 1  # Assume datetime
+    df['back_to_back'] = days_since_previous(df, 'TEAM_ID_HOME', 'GAME_DATE') == 1
     df['spread'] = df['SPREAD_HOME']  # Si disponible
-    # Similaire pour away
-    df['points_avg_away'] = df.groupby('TEAM_ID_AWAY')['PTS_AWAY'].rolling(5).mean().reset_index(0, drop=True)
-    df['reb_avg_away'] = df.groupby('TEAM_ID_AWAY')['REB_AWAY'].rolling(5).mean().reset_index(0, drop=True)
     df['eff_rating_away'] = (df['points_avg_away'] + df['reb_avg_away']) / 2
-    features = ['points_avg_home', 'reb_avg_home', 'eff_rating_home', 'back_to_back', 'spread', 'points_avg_away', 'reb_avg_away', 'eff_rating_away']
-    df[features + ['home_win']].rename(columns={'home_win': 'target'}).to_csv(processed_path, index=False)
+    return df[BASKETBALL_FEATURES + ['home_win']].rename(columns={'home_win': 'target'})
+
+def preprocess_basketball(raw_path, processed_path, store=None):
+    _cached(raw_path, _basketball_features, BASKETBALL_FEATURES, store).to_csv(processed_path, index=False)
     print(f"Processed basketball data saved to {processed_path}")
 
 # Exemple d'appel (à utiliser dans un script ou notebook)
+# Lancer depuis la racine du dépôt : python -m src.data.preprocess
 if __name__ == "__main__":
     # Ex: preprocess_football('data/raw/soccer.csv', 'data/processed/football_features.csv')
+    # Avec cache : preprocess_football(..., store=FeatureStore())  (from src.data.feature_store import FeatureStore)
     pass
@@ -0,0 +1,90 @@
+"""
+Moteur de features glissantes par entité (équipe / joueur), en une seule passe.
+
+Les lignes sont triées une fois par (entité, date), puis chaque fenêtre est
+obtenue par différence de sommes cumulées : sum[i-n, i) = P[i] - P[max(i-n, début)].
+Par défaut la fenêtre s'arrête au match précédent (shift) : la ligne courante
+n'est jamais incluse, donc pas de fuite du label. Coût O(n) par feature, quel
+que soit l'ordre initial des lignes — le résultat est réaligné sur l'index d'origine.
+"""
+import numpy as np
+import pandas as pd
+
+STATS = ("sum", "mean", "count")
+
+
+def _group_order(df, entity_col, date_col=None):
+    """Permutation triant par (entité, date, position) + début de groupe de chaque position triée."""
+    codes = pd.factorize(df[entity_col])[0]
+    pos = np.arange(len(df))
+    if date_col is None:
+        order = np.lexsort((pos, codes))
+    else:
+        dates = pd.to_datetime(df[date_col], errors="coerce").to_numpy(dtype="datetime64[ns]").view("int64")
+        order = np.lexsort((pos, dates, codes))
+    sorted_codes = codes[order]
+    is_start = np.ones(len(df), dtype=bool)
+    is_start[1:] = sorted_codes[1:] != sorted_codes[:-1]
+    group_start = np.maximum.accumulate(np.where(is_start, pos, 0))
+    return order, group_start
+
+
+def rolling_features(df, entity_col, specs, date_col=None, shift=True):
+    """
+    Calcule plusieurs stats glissantes en un seul tri.
+
+    specs : {nom_sortie: (colonne, stat, fenêtre[, min_periods])}
+            stat ∈ {"sum", "mean", "count"} ; min_periods par défaut = 1
+    shift : True → fenêtre [i-n, i) (point-in-time), False → [i-n+1, i]
+
+    Retourne un DataFrame aligné sur df.index.
+    """
+    n = len(df)
+    order, group_start = _group_order(df, entity_col, date_col)
+    pos = np.arange(n)
+    end = pos if shift else pos + 1
+
+    prefix = {}
+    out = {}
+    for name, spec in specs.items():
+        col, stat, window = spec[:3]
+        min_periods = spec[3] if len(spec) > 3 else 1
+        if stat not in STATS:
+            raise ValueError(f"stat inconnue : {stat} (attendu : {STATS})")
+        if col not in prefix:
+            v = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)[order]
+            valid = ~np.isnan(v)
+            P = np.concatenate(([0.0], np.cumsum(np.where(valid, v, 0.0))))
+            C = np.concatenate(([0], np.cumsum(valid)))
+            prefix[col] = (P, C)
+        P, C = prefix[col]
+
+        lo = np.maximum(end - window, group_start)
+        s = P[end] - P[lo]
+        c = C[end] - C[lo]
+        ok = c >= min_periods
+        if stat == "sum":
+            res = np.where(ok, s, np.nan)
+        elif stat == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                res = np.where(ok, s / np.maximum(c, 1), np.nan)
+        else:
+            res = c.astype(np.float64)
+
+        aligned = np.empty(n, dtype=np.float64)
+        aligned[order] = res
+        out[name] = aligned
+    return pd.DataFrame(out, index=df.index)
+
+
+def days_since_previous(df, entity_col, date_col):
+    """Jours écoulés depuis le match précédent de la même entité (NaN pour le premier)."""
+    n = len(df)
+    order, group_start = _group_order(df, entity_col, date_col)
+    d = pd.to_datetime(df[date_col], errors="coerce").to_numpy(dtype="datetime64[ns]")[order]
+    gap = np.full(n, np.nan)
+    gap[1:] = (d[1:] - d[:-1]) / np.timedelta64(1, "D")
+    gap[np.arange(n) == group_start] = np.nan
+    aligned = np.empty(n, dtype=np.float64)
+    aligned[order] = gap
+    return pd.Series(aligned, index=df.index)
@@ -2,9 +2,28 @@ import pandas as pd
 import numpy as np
 from tensorflow.keras.models import load_model
 from sklearn.metrics import accuracy_score, roc_auc_score
+import sys
 from pathlib import Path
 
-def main(sport, test_data_path, model_path):
+# Lancement direct (python src/evaluate.py) : la racine du dépôt doit être importable
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from src.betting.devig import devig, METHODS as DEVIG_METHODS
+
+def implied_home(df, method=None):
+    """
+    Proba implicite de 'odds_home'. Avec `method` et les cotes des autres issues
+    (odds_away, + odds_draw en football), la marge bookmaker est retirée ;
+    sinon 1/cote brut.
+    """
+    cols = [c for c in ("odds_home", "odds_draw", "odds_away") if c in df]
+    if method is None or len(cols) < 2:
+        return 1 / df['odds_home']
+    return pd.Series(devig(df[cols].to_numpy(dtype=float), method)[:, 0], index=df.index)
+
+def main(sport, test_data_path, model_path, devig_method=None):
     df = pd.read_csv(test_data_path)
     X = df.drop("target", axis=1).values
     y_true = df["target"].values
@@ -18,11 +37,19 @@ def main(sport, test_data_path, model_path):
 
     # Backtest simple: assume odds in df['odds_home']
     if 'odds_home' in df:
-        value_bets = (y_pred > 1/df['odds_home']) & (y_true == 1)
-        profit = value_bets.sum() * (df['odds_home'] - 1) - (~value_bets & (y_pred > 1/df['odds_home'])).sum()
-        print(f"Profit simulé: {profit}")
+        implied = implied_home(df, devig_method)
+        value_bets = (y_pred > implied) & (y_true == 1)
+        profit = value_bets.sum() * (df['odds_home'] - 1) - (~value_bets & (y_pred > implied)).sum()
+        print(f"Profit simulé ({devig_method or 'cotes brutes'}): {profit}")
 
 if __name__ == "__main__":
-    # Ex: python src/evaluate.py football data/processed/football_test.csv models/football_model.h5
-    import sys
-    main(sys.argv[1], sys.argv[2], sys.argv[3])
+    # Ex: python src/evaluate.py (ou python -m src.evaluate) football data/processed/football_test.csv models/football_model.h5 --devig shin
+    import argparse
+    parser = argparse.ArgumentParser(description="Évalue un modèle + backtest value bets")
+    parser.add_argument("sport")
+    parser.add_argument("test_data_path")
+    parser.add_argument("model_path")
+    parser.add_argument("--devig", choices=DEVIG_METHODS, default=None,
+                        help="Retire la marge bookmaker avant de comparer aux prédictions")
+    args = parser.parse_args()
+    main(args.sport, args.test_data_path, args.model_path, args.devig)
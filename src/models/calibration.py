@@ -0,0 +1,149 @@
+"""
+Calibration des probabilités par tables d'interpolation.
+
+Chaque calibrateur (isotonique/Platt chargé depuis joblib, ou ajusté sur
+l'historique résolu) est compilé en une table dense y = f(x) sur une grille
+fixe de [0, 1]. Les tables des surfaces sont concaténées sur des segments
+disjoints de l'axe x (surface k ↦ [2k, 2k + 1]) : calibrer un lot de probas
+de surfaces quelconques est un seul np.interp.
+
+Mise à jour incrémentale : les résultats sont agrégés dans N_BINS classes de
+probas (effectifs et victoires). Un nouveau résultat met à jour deux classes
+(p et 1 - p, la calibration étant symétrique) puis la régression isotonique
+(PAV) est relancée sur les classes seulement — coût indépendant de la taille
+de l'historique. Le calibrateur joblib de la surface sert d'a priori
+(PRIOR_STRENGTH pseudo-observations) ; sans a priori, une surface n'est
+calibrée qu'à partir de MIN_SAMPLES résultats.
+"""
+import numpy as np
+
+GRID_SIZE      = 1001
+GRID           = np.linspace(0.0, 1.0, GRID_SIZE)
+N_BINS         = 50
+PRIOR_STRENGTH = 200.0     # pseudo-observations réparties sur les classes
+MIN_SAMPLES    = 50
+SURFACE_KEYS   = ("Hard", "Clay", "Grass")
+
+
+def pav(y, w):
+    """Régression isotonique croissante (pool adjacent violators) de y pondéré par w."""
+    vals, wts, sizes = [], [], []
+    for yi, wi in zip(np.asarray(y, dtype=float), np.asarray(w, dtype=float)):
+        v, ww, n = yi, wi, 1
+        while vals and vals[-1] > v:
+            pv, pw, pn = vals.pop(), wts.pop(), sizes.pop()
+            tot = pw + ww
+            v = (pv * pw + v * ww) / tot if tot > 0 else (pv + v) / 2
+            ww, n = tot, n + pn
+        vals.append(v); wts.append(ww); sizes.append(n)
+    return np.repeat(vals, sizes)
+
+
+def compile_calibrator(obj):
+    """
+    Table (GRID_SIZE,) d'un calibrateur scikit-learn : IsotonicRegression
+    (seuils lus directement), sinon predict_proba / predict sur la grille.
+    Retourne None si l'objet n'est pas utilisable.
+    """
+    try:
+        if hasattr(obj, "X_thresholds_"):
+            y = np.interp(GRID, obj.X_thresholds_, obj.y_thresholds_)
+        elif hasattr(obj, "predict_proba"):
+            y = obj.predict_proba(GRID.reshape(-1, 1))[:, 1]
+        else:
+            y = obj.predict(GRID)
+    except Exception:
+        return None
+    y = np.clip(np.asarray(y, dtype=np.float64).ravel(), 0.0, 1.0)
+    if y.shape != GRID.shape or np.isnan(y).any():
+        return None
+    return np.maximum.accumulate(y)
+
+
+def _symmetrize(table):
+    """f(x) ← (f(x) + 1 - f(1 - x)) / 2 : P(J1) et P(J2) restent complémentaires."""
+    return 0.5 * (table + 1.0 - table[::-1])
+
+
+class Calibrator:
+    """
+    Calibration par surface, appliquée en un np.interp.
+
+    priors : {surface: table (GRID_SIZE,)} issues de compile_calibrator.
+    """
+
+    def __init__(self, priors=None, n_bins=N_BINS, prior_strength=PRIOR_STRENGTH,
+                 min_samples=MIN_SAMPLES):
+        self.priors = {s: t for s, t in (priors or {}).items() if t is not None}
+        self.n_bins, self.prior_strength, self.min_samples = n_bins, prior_strength, min_samples
+        self.centers = (np.arange(n_bins) + 0.5) / n_bins
+        self.counts = {s: np.zeros(n_bins) for s in SURFACE_KEYS}
+        self.wins = {s: np.zeros(n_bins) for s in SURFACE_KEYS}
+        self.tables = {}
+        self.version = 0           # incrémenté à chaque recompilation d'une table
+        for s in SURFACE_KEYS:
+            self.refit(s)
+
+    def _bin(self, p):
+        return np.minimum((np.asarray(p, dtype=float) * self.n_bins).astype(int), self.n_bins - 1)
+
+    def n_samples(self, surface):
+        return int(self.counts[surface].sum() // 2)
+
+    def add_many(self, surfaces, probas, outcomes, refit=True):
+        """Ajoute des résultats (outcome = 1 si J1 a gagné) ; p et 1 - p sont comptés."""
+        p = np.clip(np.asarray(probas, dtype=float), 0.0, 1.0)
+        y = np.asarray(outcomes, dtype=float)
+        surfaces = np.asarray(surfaces, dtype=object)
+        for s in SURFACE_KEYS:
+            m = surfaces == s
+            if not m.any():
+                continue
+            for pp, yy in ((p[m], y[m]), (1.0 - p[m], 1.0 - y[m])):
+                b = self._bin(pp)
+                self.counts[s] += np.bincount(b, minlength=self.n_bins)
+                self.wins[s] += np.bincount(b, weights=yy, minlength=self.n_bins)
+            if refit:
+                self.refit(s)
+
+    def add(self, surface, proba, outcome):
+        self.add_many([surface], [proba], [outcome])
+
+    def refit(self, surface):
+        """Recompile la table d'une surface : PAV sur les classes (a priori + observations)."""
+        prior = self.priors.get(surface)
+        n, k = self.counts[surface], self.wins[surface]
+        if prior is None and n.sum() / 2 < self.min_samples:
+            self.tables.pop(surface, None)
+        else:
+            w0 = self.prior_strength / self.n_bins
+            pm = self.centers if prior is None else np.interp(self.centers, GRID, prior)
+            fitted = pav((k + w0 * pm) / (n + w0), n + w0)
+            table = np.interp(GRID, self.centers, fitted)
+            self.tables[surface] = _symmetrize(table)
+        self._stack = None
+        self.version += 1
+
+    def _stacked(self):
+        if self._stack is None:
+            keys = SURFACE_KEYS + (None,)
+            xs = np.concatenate([GRID + 2.0 * i for i in range(len(keys))])
+            ys = np.concatenate([self.tables.get(s, GRID) for s in keys])
+            self._stack = (xs, ys)
+        return self._stack
+
+    def apply(self, probas, surfaces):
+        """Probas calibrées pour un lot (surface inconnue ou non calibrée : identité)."""
+        p = np.clip(np.asarray(probas, dtype=float), 0.0, 1.0)
+        idx = {s: i for i, s in enumerate(SURFACE_KEYS)}
+        off = np.array([idx.get(s, len(SURFACE_KEYS)) for s in surfaces], dtype=float)
+        xs, ys = self._stacked()
+        return np.interp(p + 2.0 * off, xs, ys)
+
+    def summary(self):
+        """{surface: (source, n résultats)} pour l'affichage."""
+        out = {}
+        for s in SURFACE_KEYS:
+            src = ("a priori + historique" if s in self.priors else "historique") if s in self.tables else "identite"
+            out[s] = (src, self.n_samples(s))
+        return out
@@ -1,4 +1,61 @@
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
 from .base_model import BaseModel
 
 class TennisModel(BaseModel):
     pass  # Custom: peut-être ajouter dropout pour overfitting sur joueurs
+
+
+@keras.utils.register_keras_serializable(package="tennis")
+class MirrorFeatures(keras.layers.Layer):
+    """x → scale * x + offset : échange J1/J2 directement dans l'espace normalisé."""
+
+    def __init__(self, scale, offset, **kwargs):
+        super().__init__(**kwargs)
+        self.scale  = [float(v) for v in scale]
+        self.offset = [float(v) for v in offset]
+
+    def call(self, x):
+        return x * tf.constant(self.scale, dtype=x.dtype) + tf.constant(self.offset, dtype=x.dtype)
+
+    def get_config(self):
+        return {**super().get_config(), "scale": self.scale, "offset": self.offset}
+
+
+def build_antisymmetric_model(scaler, antisym_mask):
+    """
+    Réseau antisymétrique : logit(x) = f(x) - f(miroir(x)).
+
+    `antisym_mask[i]` vaut True pour les features de différence (changent de signe
+    quand on inverse J1/J2), False pour le contexte (surface, best_of...).
+    Comme z = (x - mean) / scale, le miroir de x dans l'espace brut
+    correspond à z' = m * z + (m - 1) * mean / scale avec m = ±1 : le scaler
+    peut donc rester un StandardScaler classique.
+
+    P(A bat B) = 1 - P(B bat A) est garanti par construction, ce qui permet
+    d'entraîner sur une seule ligne par match.
+    """
+    m = np.where(np.asarray(antisym_mask, dtype=bool), -1.0, 1.0)
+    offset = (m - 1.0) * scaler.mean_ / scaler.scale_
+
+    inp = keras.layers.Input(shape=(len(m),))
+    # Pas de BatchNorm : les deux branches doivent appliquer exactement la même fonction
+    trunk = keras.Sequential([
+        keras.layers.Dense(128, activation="relu"),
+        keras.layers.Dropout(0.3),
+        keras.layers.Dense(64, activation="relu"),
+        keras.layers.Dropout(0.2),
+        keras.layers.Dense(32, activation="relu"),
+        keras.layers.Dense(1),
+    ], name="trunk")
+    logit = keras.layers.Subtract()([trunk(inp), trunk(MirrorFeatures(m, offset)(inp))])
+    out = keras.layers.Activation("sigmoid")(logit)
+
+    model = keras.Model(inp, out, name="tennis_antisymmetric")
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        loss="binary_crossentropy",
+        metrics=["accuracy", keras.metrics.AUC(name="auc")]
+    )
+    return model
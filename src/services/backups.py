@@ -0,0 +1,250 @@
+"""
+Sauvegardes incrémentales dédupliquées (stockage adressé par contenu).
+
+Chaque fichier sauvegardé est découpé en blocs de CHUNK_SIZE octets (la base
+SQLite s'écrit par pages de 4 Kio : une insertion ne modifie que quelques
+blocs). Un bloc est stocké une seule fois, compressé (gzip), sous le hash
+SHA-256 de son contenu :
+
+    backups/objects/ab/abcdef….gz
+    backups/snapshots/20261019T073000.json   {fichier: {size, sha256, chunks}}
+
+Un instantané ne coûte donc que les blocs nouveaux plus un petit manifeste.
+La rétention garde le dernier instantané de chaque jour sur `daily` jours et
+de chaque semaine sur `weekly` semaines, puis supprime les blocs qui ne sont
+plus référencés. restore() reconstruit les fichiers de n'importe quel
+instantané (le plus récent à une date donnée).
+
+snapshot() et prune()/gc() s'excluent par un verrou fichier (flock sur
+backups/.lock) : plusieurs processus peuvent sauvegarder sans qu'un gc ne
+supprime un bloc réutilisé par un manifeste pas encore écrit. Deux
+instantanés dans la même seconde reçoivent un suffixe (-1, -2…).
+
+    python -m src.services.backups list
+    python -m src.services.backups restore --at 2026-10-01 --dest restore/
+    python -m src.services.backups prune --daily 30 --weekly 52
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:                     # Windows : pas de verrou inter-processus
+    fcntl = None
+
+CHUNK_SIZE = 64 * 1024
+TS_FORMAT  = "%Y%m%dT%H%M%S"
+
+
+def _snap_time(snap_id):
+    return datetime.strptime(snap_id.split("-")[0], TS_FORMAT)
+
+
+def _snap_order(snap_id):
+    """Clé de tri (horodatage, suffixe numérique) : « …-10 » vient après « …-2 »."""
+    ts, _, k = snap_id.partition("-")
+    return ts, int(k or 0)
+
+
+def _atomic_write(path, data):
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class BackupRepo:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.snapshots = self.root / "snapshots"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.snapshots.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        with open(self.root / ".lock", "a+") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _object_path(self, digest):
+        return self.objects / digest[:2] / (digest + ".gz")
+
+    def _put_chunk(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if path.exists():
+            return digest, 0
+        path.parent.mkdir(exist_ok=True)
+        _atomic_write(path, gzip.compress(data, compresslevel=6))
+        return digest, 1
+
+    # ── Instantanés ─────────────────────────────────────────────
+    def snapshot(self, files, now=None):
+        """
+        Sauvegarde {nom: chemin} ; les fichiers absents sont ignorés.
+        Retourne (identifiant, {"files", "chunks", "new_chunks", "bytes"}).
+        """
+        with self._locked():
+            return self._snapshot(files, now or datetime.now())
+
+    def _snapshot(self, files, now):
+        manifest, stats = {}, {"files": 0, "chunks": 0, "new_chunks": 0, "bytes": 0}
+        for name, path in files.items():
+            path = Path(path)
+            if not path.exists():
+                continue
+            chunks, h, size = [], hashlib.sha256(), 0
+            with open(path, "rb") as f:
+                while True:
+                    data = f.read(CHUNK_SIZE)
+                    if not data:
+                        break
+                    h.update(data); size += len(data)
+                    digest, new = self._put_chunk(data)
+                    chunks.append(digest)
+                    stats["new_chunks"] += new
+            manifest[name] = {"size": size, "sha256": h.hexdigest(), "chunks": chunks}
+            stats["files"] += 1; stats["chunks"] += len(chunks); stats["bytes"] += size
+        snap_id, k = now.strftime(TS_FORMAT), 0
+        while (self.snapshots / (snap_id + ".json")).exists():
+            k += 1
+            snap_id = now.strftime(TS_FORMAT) + f"-{k}"
+        _atomic_write(self.snapshots / (snap_id + ".json"),
+                      json.dumps({"created": now.isoformat(), "files": manifest}).encode())
+        return snap_id, stats
+
+    def list(self):
+        """Identifiants des instantanés, du plus ancien au plus récent."""
+        return sorted((p.stem for p in self.snapshots.glob("*.json")), key=_snap_order)
+
+    def manifest(self, snap_id):
+        with open(self.snapshots / (snap_id + ".json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def resolve(self, at=None):
+        """Instantané le plus récent à la date `at` (datetime ou ISO), ou le dernier."""
+        snaps = self.list()
+        if at is not None:
+            if not isinstance(at, datetime):
+                day_only = len(str(at)) <= 10          # "2026-10-01" : fin de journée
+                at = datetime.fromisoformat(str(at))
+                if day_only:
+                    at = at.replace(hour=23, minute=59, second=59)
+            snaps = [s for s in snaps if _snap_time(s) <= at]
+        if not snaps:
+            raise FileNotFoundError("aucun instantane" + ("" if at is None else " avant " + str(at)))
+        return snaps[-1]
+
+    def restore(self, snap_id, dest, names=None):
+        """Reconstruit les fichiers de l'instantané dans `dest` (hash vérifié) ; retourne les chemins."""
+        dest = Path(dest)
+        dest.mkdir(parents=True, exist_ok=True)
+        out = []
+        for name, entry in self.manifest(snap_id)["files"].items():
+            if names and name not in names:
+                continue
+            target = dest / name
+            h = hashlib.sha256()
+            fd, tmp = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=dest)
+            with os.fdopen(fd, "wb") as f:
+                for digest in entry["chunks"]:
+                    with open(self._object_path(digest), "rb") as g:
+                        data = gzip.decompress(g.read())
+                    h.update(data); f.write(data)
+            if h.hexdigest() != entry["sha256"]:
+                os.unlink(tmp)
+                raise ValueError(f"{snap_id}/{name}: somme de controle invalide")
+            os.replace(tmp, target)
+            out.append(target)
+        return out
+
+    # ── Rétention ───────────────────────────────────────────────
+    def prune(self, daily=30, weekly=52, now=None):
+        """
+        Garde le dernier instantané de chaque jour (sur `daily` jours) et de
+        chaque semaine ISO (sur `weekly` semaines), plus le tout dernier ;
+        supprime les autres puis les blocs orphelins.
+        Retourne (instantanés supprimés, blocs supprimés).
+        """
+        with self._locked():
+            return self._prune(daily, weekly, now or datetime.now())
+
+    def _prune(self, daily, weekly, now):
+        snaps = self.list()
+        keep, seen_days, seen_weeks = set(snaps[-1:]), set(), set()
+        for s in reversed(snaps):
+            t = _snap_time(s)
+            day, week = t.date(), t.isocalendar()[:2]
+            if now - t <= timedelta(days=daily) and day not in seen_days:
+                keep.add(s); seen_days.add(day)
+            if now - t <= timedelta(weeks=weekly) and week not in seen_weeks:
+                keep.add(s); seen_weeks.add(week)
+        removed = [s for s in snaps if s not in keep]
+        for s in removed:
+            (self.snapshots / (s + ".json")).unlink()
+        return removed, self._gc()
+
+    def gc(self):
+        """Supprime les blocs non référencés par un instantané restant."""
+        with self._locked():
+            return self._gc()
+
+    def _gc(self):
+        live = set()
+        for s in self.list():
+            for entry in self.manifest(s)["files"].values():
+                live.update(entry["chunks"])
+        n = 0
+        for p in self.objects.glob("*/*.gz"):
+            if p.name[:-3] not in live:
+                p.unlink(); n += 1
+        return n
+
+    def usage(self):
+        """(nombre d'instantanés, octets stockés)."""
+        size = sum(p.stat().st_size for p in self.objects.glob("*/*.gz"))
+        size += sum(p.stat().st_size for p in self.snapshots.glob("*.json"))
+        return len(self.list()), size
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Sauvegardes dédupliquées TennisIQ")
+    parser.add_argument("--root", default=str(Path(__file__).resolve().parents[2] / "backups"))
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list")
+    p_restore = sub.add_parser("restore", help="Reconstruit un instantané")
+    p_restore.add_argument("--at", default=None, help="date/heure ISO (dernier instantané avant)")
+    p_restore.add_argument("--id", default=None, help="identifiant exact d'instantané")
+    p_restore.add_argument("--dest", required=True)
+    p_prune = sub.add_parser("prune")
+    p_prune.add_argument("--daily", type=int, default=30)
+    p_prune.add_argument("--weekly", type=int, default=52)
+    args = parser.parse_args()
+
+    repo = BackupRepo(args.root)
+    if args.cmd == "list":
+        for s in repo.list():
+            files = repo.manifest(s)["files"]
+            print(s, " ".join(f"{n}:{e['size']}" for n, e in files.items()))
+        n, size = repo.usage()
+        print(f"{n} instantanés, {size / 1e6:.1f} Mo stockés")
+    elif args.cmd == "restore":
+        snap = args.id or repo.resolve(args.at)
+        for p in repo.restore(snap, args.dest):
+            print("restauré", p)
+    else:
+        removed, chunks = repo.prune(args.daily, args.weekly)
+        print(f"{len(removed)} instantanés et {chunks} blocs supprimés")
@@ -0,0 +1,42 @@
+"""
+Exécution concurrente bornée des appels aux fournisseurs d'IA.
+
+Chaque fournisseur a son propre ThreadPoolExecutor, dimensionné à sa limite
+de concurrence (limites de débit des API) : les appels en excès attendent
+dans la file de l'exécuteur sans occuper de thread, et une rafale vers un
+fournisseur ne retarde pas les appels vers les autres. L'appelant récupère
+les Future (ou des fragments relayés par une file) pour afficher chaque
+résultat dès qu'il arrive : l'attente totale est celle de l'appel le plus
+lent, pas la somme.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+PROVIDER_LIMITS = {"Groq": 6, "DeepSeek": 4, "Claude": 4}
+DEFAULT_LIMIT   = 4
+
+
+class FanOut:
+    def __init__(self, limits=None):
+        self.limits = {**PROVIDER_LIMITS, **(limits or {})}
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, provider):
+        with self._lock:
+            pool = self._pools.get(provider)
+            if pool is None:
+                pool = self._pools[provider] = ThreadPoolExecutor(
+                    max_workers=self.limits.get(provider, DEFAULT_LIMIT),
+                    thread_name_prefix="fanout-" + str(provider).lower())
+        return pool
+
+    def submit(self, provider, fn, *args, **kw):
+        """Planifie fn(*args, **kw) dans l'exécuteur de `provider` ; retourne le Future."""
+        return self._pool(provider).submit(fn, *args, **kw)
+
+    def shutdown(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,77 @@
+"""
+Cache de lecture des fichiers d'état JSON, revalidé par stat().
+
+L'objet décodé est gardé en mémoire avec la signature (mtime_ns, taille) du
+fichier ; chaque accès ne coûte qu'un stat() tant que le fichier n'a pas
+changé (écriture par ce processus ou par un autre). Les écritures passent
+par un fichier temporaire puis os.replace (atomique) et mettent le cache à
+jour directement, sans relecture.
+
+Les objets retournés sont partagés : les copier avant de les modifier.
+"""
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+
+class JsonFileCache:
+    def __init__(self):
+        self._entries = {}          # chemin → (signature, objet)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "loads": 0, "writes": 0}
+
+    @staticmethod
+    def _signature(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def read(self, path, default=None):
+        """Objet JSON de `path` ; `default` si absent ou illisible."""
+        key = str(Path(path))
+        sig = self._signature(key)
+        if sig is None:
+            return default
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == sig:
+            self.stats["hits"] += 1
+            return entry[1]
+        try:
+            with open(key, "r", encoding="utf-8") as f:
+                obj = json.load(f)
+        except (OSError, ValueError):
+            return default
+        with self._lock:
+            self._entries[key] = (sig, obj)
+            self.stats["loads"] += 1
+        return obj
+
+    def write(self, path, obj, **dump_kwargs):
+        """Écriture atomique (temporaire + os.replace) ; le cache garde `obj` sans relire."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(obj, f, **dump_kwargs)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self._entries[str(path)] = (self._signature(path), obj)
+            self.stats["writes"] += 1
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(Path(path)), None)
@@ -0,0 +1,209 @@
+"""
+Client HTTP partagé : sessions keep-alive par hôte, disjoncteurs et latences.
+
+Une requests.Session (pool urllib3 de POOL_MAXSIZE connexions) est gardée par
+hôte : une rafale d'appels au même fournisseur réutilise les connexions
+TCP+TLS déjà ouvertes au lieu de refaire une poignée de main à chaque appel.
+
+Chaque appel est rattaché à un fournisseur (PROVIDERS) qui fixe :
+- le timeout par défaut (connexion, lecture) ;
+- le disjoncteur : après `fail_max` échecs consécutifs (exception réseau,
+  5xx ou 429), les appels échouent immédiatement (CircuitOpen) pendant
+  `reset` secondes, puis un appel d'essai décide de la réouverture.
+
+Les latences (nombre, erreurs, moyenne, p50, p95 sur les WINDOW derniers
+appels) sont exposées par metrics().
+"""
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_CONNECTIONS = 8
+POOL_MAXSIZE     = 16
+WINDOW           = 200      # appels gardés pour les percentiles
+
+PROVIDERS = {
+    "telegram": {"timeout": (5, 15), "fail_max": 5, "reset": 60},
+    "groq":     {"timeout": (5, 30), "fail_max": 3, "reset": 30},
+    "deepseek": {"timeout": (5, 45), "fail_max": 3, "reset": 30},
+    "claude":   {"timeout": (5, 45), "fail_max": 3, "reset": 30},
+    "github":   {"timeout": (10, 60), "fail_max": 2, "reset": 300},
+    "default":  {"timeout": (5, 30), "fail_max": 5, "reset": 30},
+}
+
+
+class CircuitOpen(requests.RequestException):
+    """Disjoncteur ouvert : l'appel n'a pas été tenté."""
+
+
+class CircuitBreaker:
+    def __init__(self, fail_max, reset):
+        self.fail_max, self.reset = fail_max, reset
+        self.failures, self.opened_at = 0, None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "ferme"
+        return "ouvert" if time.monotonic() - self.opened_at < self.reset else "semi-ouvert"
+
+    def allow(self):
+        with self._lock:
+            st = self.state
+            if st == "ferme":
+                return True
+            if st == "semi-ouvert" and not self._trial:
+                self._trial = True          # un seul appel d'essai à la fois
+                return True
+            return False
+
+    def release(self):
+        """Libère l'appel d'essai sans verdict (exception étrangère au réseau)."""
+        with self._lock:
+            self._trial = False
+
+    def record(self, ok):
+        with self._lock:
+            self._trial = False
+            if ok:
+                self.failures, self.opened_at = 0, None
+            else:
+                self.failures += 1
+                if self.failures >= self.fail_max or self.opened_at is not None:
+                    self.opened_at = time.monotonic()
+
+
+class _Metrics:
+    def __init__(self):
+        self.calls = self.errors = self.rejected = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=WINDOW)
+        self._lock = threading.Lock()
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def add(self, dt, error, timed=True):
+        with self._lock:
+            self.calls += 1; self.total += dt
+            self.errors += bool(error)
+            if timed:
+                self.recent.append(dt)
+
+    def summary(self):
+        with self._lock:
+            calls, errors, rejected, total = self.calls, self.errors, self.rejected, self.total
+            recent = list(self.recent)
+        lat = np.array(recent) if recent else np.zeros(1)
+        return {"appels": calls, "erreurs": errors, "rejetes": rejected,
+                "moy_ms": round(1000 * total / max(calls, 1), 1),
+                "p50_ms": round(1000 * float(np.percentile(lat, 50)), 1),
+                "p95_ms": round(1000 * float(np.percentile(lat, 95)), 1)}
+
+
+class ProviderSession:
+    """Vue d'un fournisseur avec l'interface get/post de requests.Session."""
+
+    def __init__(self, client, provider):
+        self.client, self.provider = client, provider
+
+    def get(self, url, **kw):
+        return self.client.request(self.provider, "GET", url, **kw)
+
+    def post(self, url, **kw):
+        return self.client.request(self.provider, "POST", url, **kw)
+
+
+class HttpClient:
+    def __init__(self, providers=None, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+        self.providers = {**PROVIDERS, **(providers or {})}
+        self.pool_connections, self.pool_maxsize = pool_connections, pool_maxsize
+        self._sessions = {}
+        self._breakers = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _config(self, provider):
+        return self.providers.get(provider, self.providers["default"])
+
+    def session(self, url):
+        """Session keep-alive de l'hôte de `url` (créée au premier appel)."""
+        parts = urlsplit(url)
+        host = parts.scheme + "://" + parts.netloc
+        with self._lock:
+            s = self._sessions.get(host)
+            if s is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                                      pool_maxsize=self.pool_maxsize, max_retries=0)
+                s.mount(host, adapter)
+                self._sessions[host] = s
+        return s
+
+    def breaker(self, provider):
+        with self._lock:
+            b = self._breakers.get(provider)
+            if b is None:
+                cfg = self._config(provider)
+                b = self._breakers[provider] = CircuitBreaker(cfg["fail_max"], cfg["reset"])
+                self._metrics[provider] = _Metrics()
+        return b
+
+    def request(self, provider, method, url, **kw):
+        """
+        Appel via la session de l'hôte ; timeout du fournisseur par défaut.
+        Lève CircuitOpen si le disjoncteur est ouvert, sinon les exceptions requests.
+        """
+        b = self.breaker(provider)
+        m = self._metrics[provider]
+        if not b.allow():
+            m.reject()
+            raise CircuitOpen(provider + ": disjoncteur ouvert")
+        kw.setdefault("timeout", self._config(provider)["timeout"])
+        t0 = time.perf_counter()
+        settled = False
+        try:
+            try:
+                r = self.session(url).request(method, url, **kw)
+            except requests.RequestException:
+                m.add(time.perf_counter() - t0, True, timed=False)
+                b.record(False); settled = True
+                raise
+            dt = time.perf_counter() - t0
+            ok = r.status_code < 500 and r.status_code != 429
+            m.add(dt, not ok)
+            b.record(ok); settled = True
+            return r
+        finally:
+            # Toute autre exception (décodage, KeyboardInterrupt…) rend l'appel d'essai
+            if not settled:
+                b.release()
+
+    def get(self, provider, url, **kw):
+        return self.request(provider, "GET", url, **kw)
+
+    def post(self, provider, url, **kw):
+        return self.request(provider, "POST", url, **kw)
+
+    def provider(self, name):
+        return ProviderSession(self, name)
+
+    def metrics(self):
+        """{fournisseur: {appels, erreurs, rejetes, moy_ms, p50_ms, p95_ms, etat}}."""
+        with self._lock:
+            items = list(self._metrics.items())
+        return {p: {**m.summary(), "etat": self._breakers[p].state} for p, m in items}
+
+    def close(self):
+        with self._lock:
+            for s in self._sessions.values():
+                s.close()
+            self._sessions.clear()
@@ -0,0 +1,147 @@
+"""
+Cache disque des réponses des IA, indexé par hash du prompt.
+
+La clé est SHA-256(fournisseur, modèle, prompt) : le prompt d'analyse est
+déterministe (joueurs, surface, probas, ELO, forme, H2H, value bet), une
+analyse identique est donc servie depuis la base sans appel payant.
+
+- expiration : une entrée plus vieille que `ttl` secondes est ignorée puis
+  supprimée ;
+- taille bornée : au-delà de `max_entries`, les entrées les moins récemment
+  lues sont évincées (LRU sur la colonne `accessed`, indexée) ;
+- compteurs hits / misses / evictions persistés dans la table `counters`,
+  partagés entre processus.
+
+Une lecture n'écrit rien : la date d'accès et les compteurs sont accumulés
+en mémoire puis écrits en une seule transaction par flush() (appelé en fin
+de page, par put(), par stats(), ou dès FLUSH_EVERY lectures).
+
+SQLite en mode WAL, une connexion par thread (appels depuis le pool IA).
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key      TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    model    TEXT NOT NULL,
+    created  REAL NOT NULL,
+    accessed REAL NOT NULL,
+    text     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_accessed ON llm_cache(accessed);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+DEFAULT_TTL         = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 2000
+FLUSH_EVERY         = 64
+
+
+def prompt_key(provider, model, prompt):
+    return hashlib.sha256("\x00".join((provider, model, prompt)).encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, db_path, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = Path(db_path)
+        self.ttl, self.max_entries = ttl, max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._touched = {}                    # clé → date d'accès à écrire
+        self._pending = {}                    # compteur → incrément à écrire
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, c, name, n=1):
+        c.execute("INSERT INTO counters (name, value) VALUES (?, ?) "
+                  "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, n))
+
+    def get(self, provider, model, prompt):
+        """Texte en cache (non expiré) ou None ; l'accès est noté pour le prochain flush()."""
+        key, now = prompt_key(provider, model, prompt), time.time()
+        row = self._conn().execute("SELECT text, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        hit = row is not None and now - row[1] <= self.ttl      # expirée : supprimée au prochain put()
+        with self._lock:
+            name = "hits" if hit else "misses"
+            self._pending[name] = self._pending.get(name, 0) + 1
+            if hit:
+                self._touched[key] = now
+            n = sum(self._pending.values())
+        if n >= FLUSH_EVERY:
+            self.flush()
+        return row[0] if hit else None
+
+    def _write_pending(self, c):
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            pending, self._pending = self._pending, {}
+        c.executemany("UPDATE llm_cache SET accessed = MAX(accessed, ?) WHERE key = ?",
+                      [(t, k) for k, t in touched.items()])
+        for name, n in pending.items():
+            self._count(c, name, n)
+
+    def flush(self):
+        """Écrit dates d'accès et compteurs accumulés, en une transaction."""
+        if not self._touched and not self._pending:
+            return
+        c = self._conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            self._write_pending(c)
+            c.execute("COMMIT")
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+
+    def put(self, provider, model, prompt, text):
+        now = time.time()
+        c = self._conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            self._write_pending(c)
+            c.execute("INSERT OR REPLACE INTO llm_cache (key, provider, model, created, accessed, text) "
+                      "VALUES (?, ?, ?, ?, ?, ?)",
+                      (prompt_key(provider, model, prompt), provider, model, now, now, text))
+            n = c.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,)).rowcount
+            excess = c.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                n += c.execute("DELETE FROM llm_cache WHERE key IN "
+                               "(SELECT key FROM llm_cache ORDER BY accessed LIMIT ?)", (excess,)).rowcount
+            if n:
+                self._count(c, "evictions", n)
+            c.execute("COMMIT")
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        with self._lock:
+            self._touched, self._pending = {}, {}
+        c = self._conn()
+        c.execute("DELETE FROM llm_cache")
+        c.execute("DELETE FROM counters")
+
+    def stats(self):
+        """{hits, misses, evictions, hit_rate, entries, bytes}."""
+        self.flush()
+        c = self._conn()
+        out = {"hits": 0, "misses": 0, "evictions": 0}
+        out.update(dict(c.execute("SELECT name, value FROM counters")))
+        entries, size = c.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(text)), 0) FROM llm_cache").fetchone()
+        lookups = out["hits"] + out["misses"]
+        return {**out, "hit_rate": out["hits"] / lookups if lookups else 0.0,
+                "entries": entries, "bytes": size}
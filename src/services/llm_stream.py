@@ -0,0 +1,92 @@
+"""
+Réponses des IA en streaming (Server-Sent Events).
+
+Les trois fournisseurs renvoient, avec "stream": true, un flux SSE :
+
+- Groq / DeepSeek (format OpenAI) : lignes `data: {"choices":[{"delta":
+  {"content": "..."}}]}` terminées par `data: [DONE]` ;
+- Claude (Messages API) : événements `content_block_delta` dont
+  `delta.text` porte le texte, fin sur `message_stop`, `error` en cas
+  d'échec.
+
+Les générateurs ci-dessous produisent les fragments de texte dès leur
+arrivée ; l'appelant les accumule pour le texte complet. Ils prennent un
+objet `http` exposant post(url, **kw) (vue fournisseur du client HTTP
+partagé) et une URL de base, remplaçable par un serveur SSE local.
+"""
+import json
+
+
+class StreamError(RuntimeError):
+    """Réponse HTTP non 200 ou événement d'erreur dans le flux."""
+
+
+def iter_sse(response):
+    """(événement, données) de chaque message SSE ; les lignes data multiples sont jointes."""
+    event, data = None, []
+    for raw in response.iter_lines(decode_unicode=False):
+        line = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = None, []
+        elif line.startswith(":"):
+            continue
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip(" "))
+    if data:
+        yield event, "\n".join(data)
+
+
+def _open(http, url, headers, payload):
+    r = http.post(url, headers=headers, json=payload, stream=True)
+    if r.status_code != 200:
+        body = r.text[:200]
+        r.close()
+        raise StreamError(f"{r.status_code}: {body}")
+    return r
+
+
+def stream_openai(http, base_url, key, model, prompt, max_tokens=600, temperature=0.3):
+    """Fragments d'une complétion de chat au format OpenAI (Groq, DeepSeek)."""
+    r = _open(http, base_url.rstrip("/") + "/chat/completions",
+              {"Authorization": "Bearer " + key, "Content-Type": "application/json"},
+              {"model": model, "messages": [{"role": "user", "content": prompt}],
+               "temperature": temperature, "max_tokens": max_tokens, "stream": True})
+    try:
+        for _, data in iter_sse(r):
+            if data.strip() == "[DONE]":
+                return
+            msg = json.loads(data)
+            if "error" in msg:
+                raise StreamError(str(msg["error"])[:200])
+            for choice in msg.get("choices", []):
+                text = (choice.get("delta") or {}).get("content")
+                if text:
+                    yield text
+    finally:
+        r.close()
+
+
+def stream_claude(http, base_url, key, model, prompt, max_tokens=600):
+    """Fragments d'une réponse de l'API Messages d'Anthropic."""
+    r = _open(http, base_url.rstrip("/") + "/messages",
+              {"x-api-key": key, "anthropic-version": "2023-06-01", "content-type": "application/json"},
+              {"model": model, "max_tokens": max_tokens, "stream": True,
+               "messages": [{"role": "user", "content": prompt}]})
+    try:
+        for event, data in iter_sse(r):
+            msg = json.loads(data)
+            kind = msg.get("type", event)
+            if kind == "content_block_delta":
+                text = (msg.get("delta") or {}).get("text")
+                if text:
+                    yield text
+            elif kind == "message_stop":
+                return
+            elif kind == "error":
+                raise StreamError(str(msg.get("error"))[:200])
+    finally:
+        r.close()
@@ -0,0 +1,68 @@
+"""
+Cache LRU borné en taille et en durée de vie, versionné.
+
+Chaque entrée est valable pour un jeton de version (modèle chargé, ELO,
+données…) : dès que le jeton courant change, tout le cache est vidé au
+premier accès. Les compteurs (hits, misses, évictions, expirations,
+invalidations) restent disponibles pour l'affichage.
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+
+def version_token(*parts):
+    """Jeton court et stable pour une combinaison de composants sérialisables."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class LRUCache:
+    """Clé → valeur, au plus `maxsize` entrées de moins de `ttl` secondes."""
+
+    def __init__(self, maxsize=256, ttl=1800.0, clock=time.monotonic):
+        self.maxsize, self.ttl, self.clock = maxsize, ttl, clock
+        self.version = None
+        self._data = OrderedDict()          # clé → (horodatage, valeur), ordre = récence
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidations": 0}
+
+    def __len__(self):
+        return len(self._data)
+
+    def set_version(self, version):
+        """Vide le cache si le jeton a changé."""
+        if version != self.version:
+            if self._data:
+                self.stats["invalidations"] += 1
+            self._data.clear()
+            self.version = version
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            self.stats["misses"] += 1
+            return default
+        ts, value = item
+        if self.clock() - ts > self.ttl:
+            del self._data[key]
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return default
+        self._data.move_to_end(key)
+        self.stats["hits"] += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = (self.clock(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        self._data.clear()
+
+    def hit_rate(self):
+        n = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / n if n else 0.0
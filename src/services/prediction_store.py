@@ -0,0 +1,352 @@
+"""
+Historique des pronostics en SQLite (mode WAL).
+
+Chaque pronostic est une ligne : les champs interrogés (id, statut, date,
+surface, joueurs, favori…) sont des colonnes indexées, l'enregistrement
+complet est conservé en JSON dans `data`. Une insertion ou une mise à jour
+de résultat touche une seule ligne par clé primaire ; l'historique n'est
+plus tronqué.
+
+Les statistiques sont des agrégats matérialisés, mis à jour par événement
+dans la même transaction que l'insertion ou le changement de statut (O(1)
+par résultat) :
+
+- table `stats` : compteurs par statut, séries, victoires value, et
+  compteurs « dimension:valeur:statut » par surface, mois, combinaison de
+  sources et tranche de confiance
+- table `acc_curve` : courbe de précision cumulée sous-échantillonnée ; au
+  plus 2 × CURVE_POINTS points, le pas double quand elle est pleine
+
+Le coût d'affichage ne dépend donc plus de la longueur de l'historique.
+recompute_stats() reconstruit tout depuis les pronostics (réparation
+explicite, ou changement de STATS_VERSION).
+
+Une correction (gagne → perdu, gagne → annule…) n'est pas un nouveau
+résultat : la contribution de l'ancien statut est retirée, les séries sont
+recalculées dans l'ordre des résultats (`date_resultat`, conservée par la
+correction) et aucun point de courbe n'est ajouté.
+
+Plusieurs processus (workers Streamlit/gunicorn) peuvent partager la base :
+WAL autorise les lectures concurrentes d'une écriture, busy_timeout fait
+patienter les écrivains, et les lecture-modification-écriture se font dans
+une transaction BEGIN IMMEDIATE. Une connexion est ouverte par thread.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    seq               INTEGER PRIMARY KEY AUTOINCREMENT,
+    id                TEXT NOT NULL UNIQUE,
+    date              TEXT,
+    statut            TEXT NOT NULL DEFAULT 'en_attente',
+    surface           TEXT,
+    player1           TEXT,
+    player2           TEXT,
+    favori            TEXT,
+    vainqueur_reel    TEXT,
+    pronostic_correct INTEGER,
+    has_value         INTEGER NOT NULL DEFAULT 0,
+    data              TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pred_statut  ON predictions(statut);
+CREATE INDEX IF NOT EXISTS idx_pred_date    ON predictions(date);
+CREATE INDEX IF NOT EXISTS idx_pred_surface ON predictions(surface, statut);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS stats (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS acc_curve (n INTEGER PRIMARY KEY, correct INTEGER NOT NULL);
+"""
+
+STATS_VERSION = "3"
+DIMENSIONS    = ("surface", "month", "sources", "conf")
+CURVE_POINTS  = 250
+RESOLVED      = ("gagne", "perdu")
+# Ordre des résultats : date du premier passage en gagne/perdu, à défaut dernière mise à jour
+RESULT_ORDER  = "COALESCE(json_extract(data, '$.date_resultat'), json_extract(data, '$.date_maj'), date, ''), seq"
+
+COLUMNS = ("id", "date", "statut", "surface", "player1", "player2", "favori",
+           "vainqueur_reel", "pronostic_correct", "has_value")
+
+
+def _dimensions(pred):
+    """Valeurs des dimensions d'agrégation d'un pronostic."""
+    sources = pred.get("sources") or []
+    if isinstance(sources, str):
+        sources = [s.strip(" '\"") for s in sources.strip("[]").split(",") if s.strip(" '\"")]
+    try:
+        conf = str(min(int(float(pred.get("confidence"))) // 10 * 10, 90))
+    except (TypeError, ValueError):
+        conf = "?"
+    return {"surface": str(pred.get("surface")), "month": str(pred.get("date") or "")[:7] or "?",
+            "sources": "+".join(sources) or "?", "conf": conf}
+
+
+def _row_values(pred):
+    pc = pred.get("pronostic_correct")
+    return (str(pred["id"]), pred.get("date"), pred.get("statut") or "en_attente",
+            pred.get("surface"), pred.get("player1"), pred.get("player2"), pred.get("favori"),
+            pred.get("vainqueur_reel"), None if pc is None else int(bool(pc)),
+            int(bool(pred.get("best_value"))))
+
+
+class PredictionStore:
+    """Accès à la base des pronostics ; les méthodes retournent des dicts comme l'ancien JSON."""
+
+    def __init__(self, path, timeout=30.0):
+        self.path = Path(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn().executescript(SCHEMA)
+        with self._tx() as c:
+            row = c.execute("SELECT value FROM meta WHERE key = 'stats_version'").fetchone()
+            if row is None or row[0] != STATS_VERSION:
+                self._recompute(c)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    class _Tx:
+        def __init__(self, conn):
+            self.conn = conn
+
+        def __enter__(self):
+            self.conn.execute("BEGIN IMMEDIATE")
+            return self.conn
+
+        def __exit__(self, exc_type, exc, tb):
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+            return False
+
+    def _tx(self):
+        return self._Tx(self._conn())
+
+    # ── Écriture ────────────────────────────────────────────────
+    def insert(self, pred):
+        """Ajoute un pronostic (pred["id"] requis) ; ignoré si l'id existe déjà."""
+        with self._tx() as c:
+            cur = c.execute(f"INSERT OR IGNORE INTO predictions ({','.join(COLUMNS)}, data) "
+                            f"VALUES ({','.join('?' * len(COLUMNS))}, ?)",
+                            _row_values(pred) + (json.dumps(pred, ensure_ascii=False, default=str),))
+            if cur.rowcount:
+                self._on_result(c, None, pred)
+        return pred["id"]
+
+    def update(self, pred_id, **fields):
+        """Met à jour des champs d'un pronostic ; retourne l'enregistrement complet ou None."""
+        with self._tx() as c:
+            row = c.execute("SELECT data FROM predictions WHERE id = ?", (pred_id,)).fetchone()
+            if row is None:
+                return None
+            old = json.loads(row[0])
+            pred = {**old, **fields}
+            if pred.get("statut") not in RESOLVED:
+                pred["date_resultat"] = None
+            elif old.get("statut") not in RESOLVED:
+                pred["date_resultat"] = datetime.now().isoformat()
+            values = _row_values(pred)
+            c.execute(f"UPDATE predictions SET {', '.join(col + ' = ?' for col in COLUMNS[1:])}, data = ? "
+                      "WHERE id = ?",
+                      values[1:] + (json.dumps(pred, ensure_ascii=False, default=str), pred_id))
+            if old.get("statut") != pred.get("statut"):
+                self._on_result(c, old, pred)
+        return pred
+
+    def clear(self):
+        with self._tx() as c:
+            c.execute("DELETE FROM predictions")
+            self._reset_stats(c)
+
+    # ── Statistiques incrémentales ──────────────────────────────
+    @staticmethod
+    def _bump(c, deltas):
+        c.executemany("INSERT INTO stats (key, value) VALUES (?, ?) "
+                      "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value", deltas.items())
+
+    def _on_result(self, c, old, new):
+        """Événement : pronostic inséré (old = None) ou changement de statut."""
+        deltas = {}
+        for pred, sign in ((old, -1), (new, 1)):
+            if pred is None:
+                continue
+            statut = pred.get("statut") or "en_attente"
+            keys = ["statut:" + statut] + [d + ":" + v + ":" + statut for d, v in _dimensions(pred).items()]
+            for key in keys:
+                deltas[key] = deltas.get(key, 0) + sign
+            if statut == "gagne" and pred.get("best_value"):
+                deltas["value_wins"] = deltas.get("value_wins", 0) + sign
+        if old is None:
+            deltas["total"] = 1
+        self._bump(c, deltas)
+        if old is not None and old.get("statut") in RESOLVED:
+            # Correction d'un résultat : séries recalculées, pas de nouveau point de courbe
+            self._recompute_streaks(c)
+            if new.get("statut") in RESOLVED:
+                self._curve_append(c)
+            return
+        # Série : suit l'ordre des résultats ; un abandon ne la coupe pas
+        statut = new.get("statut")
+        if statut in RESOLVED:
+            cur = 0
+            if statut == "gagne":
+                row = c.execute("SELECT value FROM stats WHERE key = 'current_streak'").fetchone()
+                cur = (row[0] if row else 0) + 1
+            c.execute("INSERT OR REPLACE INTO stats (key, value) VALUES ('current_streak', ?)", (cur,))
+            c.execute("INSERT INTO stats (key, value) VALUES ('best_streak', ?) "
+                      "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)", (cur,))
+            self._curve_append(c)
+
+    def _recompute_streaks(self, c):
+        cur = best = 0
+        for (statut,) in c.execute("SELECT statut FROM predictions WHERE statut IN ('gagne', 'perdu') "
+                                   f"ORDER BY {RESULT_ORDER}"):
+            cur = cur + 1 if statut == "gagne" else 0
+            best = max(best, cur)
+        c.executemany("INSERT OR REPLACE INTO stats (key, value) VALUES (?, ?)",
+                      (("current_streak", cur), ("best_streak", best)))
+
+    def _curve_append(self, c):
+        """
+        Point (résolus, gagnés) tous les `curve_step` résultats ; décimation quand pleine.
+        Un point existant (même n, après une correction) est remplacé sans être recompté.
+        """
+        vals = dict(c.execute("SELECT key, value FROM stats WHERE key IN "
+                              "('statut:gagne', 'statut:perdu', 'curve_step', 'curve_points')"))
+        n = vals.get("statut:gagne", 0) + vals.get("statut:perdu", 0)
+        step, points = vals.get("curve_step", 1), vals.get("curve_points", 0)
+        if n <= 0 or n % step:
+            return
+        existed = c.execute("SELECT 1 FROM acc_curve WHERE n = ?", (n,)).fetchone() is not None
+        c.execute("INSERT OR REPLACE INTO acc_curve (n, correct) VALUES (?, ?)", (n, vals.get("statut:gagne", 0)))
+        points += not existed
+        if points > 2 * CURVE_POINTS:
+            step *= 2
+            c.execute("DELETE FROM acc_curve WHERE n % ? != 0", (step,))
+            points = c.execute("SELECT COUNT(*) FROM acc_curve").fetchone()[0]
+        c.executemany("INSERT OR REPLACE INTO stats (key, value) VALUES (?, ?)",
+                      (("curve_step", step), ("curve_points", points)))
+
+    def _reset_stats(self, c):
+        c.execute("DELETE FROM stats")
+        c.execute("DELETE FROM acc_curve")
+        c.execute("INSERT INTO stats (key, value) VALUES ('total', 0)")
+        c.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('stats_version', ?)", (STATS_VERSION,))
+
+    def _recompute(self, c):
+        self._reset_stats(c)
+        rows = c.execute(f"SELECT data FROM predictions ORDER BY {RESULT_ORDER}").fetchall()
+        for (data,) in rows:
+            pred = json.loads(data)
+            self._on_result(c, None, pred)
+
+    def recompute_stats(self):
+        """Réparation : reconstruit la table stats depuis tous les pronostics."""
+        with self._tx() as c:
+            self._recompute(c)
+        return self.stats()
+
+    def stats(self):
+        """{"total", "statut:<s>", "value_wins", "current_streak", "best_streak", ...} (hors dimensions)."""
+        return {k: v for k, v in self._conn().execute("SELECT key, value FROM stats")
+                if k.split(":", 1)[0] not in DIMENSIONS}
+
+    def aggregate(self, dim):
+        """{valeur: {statut: n}} pour une dimension de DIMENSIONS (parcours de l'intervalle de clés)."""
+        out = {}
+        for key, n in self._conn().execute("SELECT key, value FROM stats WHERE key >= ? AND key < ?",
+                                           (dim + ":", dim + ";")):
+            value, statut = key[len(dim) + 1:].rsplit(":", 1)
+            if n:
+                out.setdefault(value, {})[statut] = n
+        return out
+
+    def accuracy_curve(self):
+        """[(résolus, gagnés)] sous-échantillonnés, terminés par l'état courant."""
+        pts = self._conn().execute("SELECT n, correct FROM acc_curve ORDER BY n").fetchall()
+        s = self.stats()
+        last = (s.get("statut:gagne", 0) + s.get("statut:perdu", 0), s.get("statut:gagne", 0))
+        if last[0] and (not pts or pts[-1][0] != last[0]):
+            pts.append(last)
+        return pts
+
+    # ── Lecture ─────────────────────────────────────────────────
+    def get(self, pred_id):
+        row = self._conn().execute("SELECT data FROM predictions WHERE id = ?", (pred_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(self, statut=None, surface=None, since=None, limit=None, newest_first=False):
+        """
+        Pronostics filtrés, dans l'ordre d'insertion (ou inverse).
+        statut : valeur ou liste de valeurs ; since : date ISO minimale.
+        """
+        where, args = [], []
+        if statut is not None:
+            st = [statut] if isinstance(statut, str) else list(statut)
+            where.append(f"statut IN ({','.join('?' * len(st))})"); args += st
+        if surface is not None:
+            where.append("surface = ?"); args.append(surface)
+        if since is not None:
+            where.append("date >= ?"); args.append(since)
+        sql = "SELECT data FROM predictions"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY seq " + ("DESC" if newest_first else "ASC")
+        if limit is not None:
+            sql += " LIMIT ?"; args.append(int(limit))
+        return [json.loads(r[0]) for r in self._conn().execute(sql, args)]
+
+    def recent(self, n, statut=None):
+        """Les n derniers pronostics (ordre chronologique)."""
+        return self.query(statut=statut, limit=n, newest_first=True)[::-1]
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    # ── Migration / sauvegarde ──────────────────────────────────
+    def migrate_json(self, json_path):
+        """
+        Import unique de l'ancien historique JSON (ordre conservé). Le drapeau
+        est posé dans la même transaction : un seul processus importe.
+        Retourne le nombre de pronostics importés.
+        """
+        json_path = Path(json_path)
+        with self._tx() as c:
+            if c.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+                return 0
+            n = 0
+            if json_path.exists():
+                try:
+                    with open(json_path, "r", encoding="utf-8") as f:
+                        history = json.load(f)
+                except (OSError, ValueError):
+                    history = []
+                for i, pred in enumerate(history):
+                    if not isinstance(pred, dict):
+                        continue
+                    pred = {**pred, "id": str(pred.get("id") or f"legacy{i:05d}")}
+                    cur = c.execute(f"INSERT OR IGNORE INTO predictions ({','.join(COLUMNS)}, data) "
+                                    f"VALUES ({','.join('?' * len(COLUMNS))}, ?)",
+                                    _row_values(pred) + (json.dumps(pred, ensure_ascii=False, default=str),))
+                    n += cur.rowcount
+            c.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (str(n),))
+            if n:
+                self._recompute(c)
+        return n
+
+    def backup(self, dest):
+        """Copie cohérente de la base (API backup de SQLite, sans bloquer les écrivains)."""
+        dst = sqlite3.connect(dest)
+        try:
+            self._conn().backup(dst)
+        finally:
+            dst.close()
@@ -0,0 +1,306 @@
+"""
+File d'envoi Telegram persistante, servie par un thread de fond.
+
+L'UI ne fait qu'insérer une ligne dans la table `outbox` (SQLite WAL) et
+rend la main. Le worker :
+
+- réclame les messages dus dans une transaction BEGIN IMMEDIATE (statut
+  « sending ») : plusieurs processus peuvent partager la file sans doublon ;
+- regroupe les messages « digest » (pronostics) d'un même chat arrivés dans
+  la fenêtre DIGEST_DELAY en un seul message, découpé aux frontières de
+  messages puis de lignes pour rester sous MAX_LEN (4096) caractères ;
+- respecte un intervalle minimal par chat et un plafond global par seconde,
+  et suit le retry_after renvoyé par Telegram (429) ;
+- réessaie avec backoff exponentiel (erreurs réseau, 5xx), repasse en texte
+  brut sur une erreur de parsing HTML, abandonne les autres 4xx.
+
+L'URL de l'API est configurable (api_base) : un serveur HTTP local peut
+remplacer Telegram pour les essais.
+"""
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+MAX_LEN           = 4096
+DIGEST_DELAY      = 2.0      # s : fenêtre de regroupement des pronostics
+PER_CHAT_INTERVAL = 1.05     # s entre deux messages d'un même chat
+GLOBAL_PER_SEC    = 25       # sous la limite de 30 messages/s du bot
+MAX_ATTEMPTS      = 6
+BACKOFF_BASE      = 2.0      # s, doublé à chaque échec
+BACKOFF_MAX       = 300.0
+STALE_CLAIM       = 300.0    # s : un « sending » plus vieux est repris
+SEPARATOR         = "\n\n— — —\n\n"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id    TEXT NOT NULL,
+    text       TEXT NOT NULL,
+    parse_mode TEXT,
+    digest     INTEGER NOT NULL DEFAULT 0,
+    status     TEXT NOT NULL DEFAULT 'pending',
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    created    REAL NOT NULL,
+    next_try   REAL NOT NULL,
+    claimed    REAL,
+    sent_at    REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_try);
+"""
+
+_TAGS = re.compile(r"</?(b|i|u|s|code|pre|a)(\s[^>]*)?>")
+
+
+def strip_html(text):
+    return _TAGS.sub("", text)
+
+
+def split_message(text, limit=MAX_LEN):
+    """Découpe aux sauts de ligne (coupe dure si une ligne dépasse `limit`)."""
+    parts, cur = [], ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if cur:
+                parts.append(cur); cur = ""
+            parts.append(line[:limit]); line = line[limit:]
+        cand = line if not cur else cur + "\n" + line
+        if len(cand) > limit:
+            parts.append(cur); cur = line
+        else:
+            cur = cand
+    if cur:
+        parts.append(cur)
+    return parts
+
+
+def build_digest(texts, limit=MAX_LEN):
+    """Regroupe des messages en le moins de morceaux ≤ limit, sans couper un message qui tient."""
+    out, cur = [], ""
+    for t in texts:
+        for piece in (split_message(t, limit) if len(t) > limit else [t]):
+            cand = piece if not cur else cur + SEPARATOR + piece
+            if len(cand) > limit:
+                out.append(cur); cur = piece
+            else:
+                cur = cand
+    if cur:
+        out.append(cur)
+    return out
+
+
+class TelegramQueue:
+    def __init__(self, db_path, token, chat_id, api_base="https://api.telegram.org",
+                 timeout=15.0, session=None):
+        self.db_path = Path(db_path)
+        self.token, self.chat_id = token, str(chat_id)
+        self.api_base = api_base.rstrip("/")
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_chat = {}          # chat_id → horodatage du dernier envoi
+        self._global = []             # horodatages de la dernière seconde
+        self._rate_lock = threading.Lock()   # worker et send_now (thread UI) partagent les limites
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    # ── Côté UI ─────────────────────────────────────────────────
+    def enqueue(self, text, parse_mode="HTML", digest=False, chat_id=None):
+        """Ajoute un message à la file et réveille le worker ; retourne son id."""
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT INTO outbox (chat_id, text, parse_mode, digest, created, next_try) VALUES (?, ?, ?, ?, ?, ?)",
+            (str(chat_id or self.chat_id), str(text), parse_mode, int(digest), now,
+             now + (DIGEST_DELAY if digest else 0.0)))
+        self._wake.set()
+        return cur.lastrowid
+
+    def stats(self):
+        counts = dict(self._conn().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status"))
+        row = self._conn().execute("SELECT last_error FROM outbox WHERE last_error IS NOT NULL "
+                                   "ORDER BY id DESC LIMIT 1").fetchone()
+        return {**counts, "last_error": row[0] if row else None}
+
+    # ── Worker ──────────────────────────────────────────────────
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="telegram-queue", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set(); self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                wait = self.process_due()
+            except sqlite3.Error:
+                wait = 1.0
+            self._wake.wait(timeout=wait)
+            self._wake.clear()
+
+    def _claim(self):
+        """Réclame les messages dus (un chat à la fois) ; retourne (chat_id, lignes) ou (None, [])."""
+        now = time.time()
+        c = self._conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            c.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending' AND claimed < ?",
+                      (now - STALE_CLAIM,))
+            row = c.execute("SELECT chat_id FROM outbox WHERE status = 'pending' AND next_try <= ? "
+                            "ORDER BY next_try LIMIT 1", (now,)).fetchone()
+            if row is None:
+                c.execute("COMMIT")
+                return None, []
+            rows = c.execute("SELECT id, text, parse_mode, digest, attempts FROM outbox "
+                             "WHERE status = 'pending' AND next_try <= ? AND chat_id = ? ORDER BY id",
+                             (now, row[0])).fetchall()
+            c.executemany("UPDATE outbox SET status = 'sending', claimed = ? WHERE id = ?",
+                          [(now, r[0]) for r in rows])
+            c.execute("COMMIT")
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+        return row[0], rows
+
+    def _next_due(self):
+        row = self._conn().execute("SELECT MIN(next_try) FROM outbox WHERE status = 'pending'").fetchone()
+        return None if row[0] is None else max(row[0] - time.time(), 0.05)
+
+    def process_due(self):
+        """Envoie tout ce qui est dû ; retourne le délai avant la prochaine échéance (s)."""
+        while not self._stop.is_set():
+            chat_id, rows = self._claim()
+            if not rows:
+                break
+            digest = [r for r in rows if r[3]]
+            single = [r for r in rows if not r[3]]
+            # Un pronostic seul ou plusieurs : même mode de parsing requis pour les fusionner
+            groups = [[r] for r in single]
+            by_mode = {}
+            for r in digest:
+                by_mode.setdefault(r[2], []).append(r)
+            groups += list(by_mode.values())
+            for group in groups:
+                self._deliver(chat_id, group)
+        nxt = self._next_due()
+        return 30.0 if nxt is None else min(nxt, 30.0)
+
+    def _throttle(self, chat_id):
+        """Attend un créneau libre ; vérification et réservation sous verrou, attente hors verrou."""
+        while True:
+            with self._rate_lock:
+                now = time.time()
+                self._global = [t for t in self._global if now - t < 1.0]
+                wait = max(PER_CHAT_INTERVAL - (now - self._last_chat.get(chat_id, 0.0)),
+                           (1.0 - (now - self._global[0])) if len(self._global) >= GLOBAL_PER_SEC else 0.0)
+                if wait <= 0:
+                    self._last_chat[chat_id] = now
+                    self._global.append(now)
+                    return
+            time.sleep(wait)
+
+    def _post(self, chat_id, text, parse_mode):
+        self._throttle(chat_id)
+        payload = {"chat_id": chat_id, "text": text, "disable_web_page_preview": True}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        return self.session.post(self.api_base + "/bot" + self.token + "/sendMessage",
+                                 json=payload, timeout=self.timeout)
+
+    def _send_chunk(self, chat_id, chunk, parse_mode):
+        """
+        Un appel sendMessage (repli texte brut sur erreur de parsing).
+        Retourne (erreur ou None, retry_after ou None, échec définitif).
+        """
+        try:
+            r = self._post(chat_id, chunk, parse_mode)
+            if r.status_code != 200 and parse_mode and "parse" in r.text.lower():
+                r = self._post(chat_id, strip_html(chunk), None)
+        except requests.RequestException as e:
+            return "reseau: " + str(e)[:120], None, False
+        if r.status_code == 200:
+            return None, None, False
+        try:
+            body = r.json()
+        except ValueError:
+            body = {}
+        error = f"{r.status_code}: " + str(body.get("description", r.text[:120]))
+        if r.status_code == 429:
+            return error, float(body.get("parameters", {}).get("retry_after", 5)), False
+        return error, None, 400 <= r.status_code < 500
+
+    def send_now(self, text, parse_mode="HTML", chat_id=None):
+        """Envoi synchrone hors file (test du bot) ; retourne (ok, message)."""
+        for chunk in split_message(str(text)):
+            error, _, _ = self._send_chunk(str(chat_id or self.chat_id), chunk, parse_mode)
+            if error:
+                return False, "Telegram: " + error
+        return True, "Envoye sur Telegram"
+
+    def _deliver(self, chat_id, group):
+        ids = [r[0] for r in group]
+        parse_mode, attempts = group[0][2], max(r[4] for r in group)
+        texts = [r[1] for r in group]
+        chunks = build_digest(texts) if len(texts) > 1 else split_message(texts[0])
+        error, retry_after, permanent = None, None, False
+        sent = 0
+        for chunk in chunks:
+            error, retry_after, permanent = self._send_chunk(chat_id, chunk, parse_mode)
+            if error:
+                break
+            sent += 1
+        c = self._conn()
+        now = time.time()
+        if error is None:
+            c.executemany("UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                          [(now, i) for i in ids])
+            return True
+        if sent:
+            # Morceaux déjà partis : seul le reste est remis en file
+            rest = "\n".join(chunks[sent:])
+            c.execute("UPDATE outbox SET text = ?, digest = 0 WHERE id = ?", (rest, ids[0]))
+            c.executemany("UPDATE outbox SET status = 'sent', sent_at = ? WHERE id = ?",
+                          [(now, i) for i in ids[1:]])
+            ids = ids[:1]
+        attempts += 1
+        if permanent or attempts >= MAX_ATTEMPTS:
+            status, next_try = "failed", now
+        else:
+            status = "pending"
+            next_try = now + (retry_after if retry_after is not None
+                              else min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX))
+        c.executemany("UPDATE outbox SET status = ?, attempts = ?, next_try = ?, last_error = ? WHERE id = ?",
+                      [(status, attempts, next_try, error, i) for i in ids])
+        return False
+
+    def flush(self, timeout=30.0):
+        """Traite la file dans le thread courant jusqu'à vide (ou timeout) ; retourne stats()."""
+        end = time.time() + timeout
+        while time.time() < end:
+            wait = self.process_due()
+            s = self.stats()
+            if not s.get("pending") and not s.get("sending"):
+                break
+            time.sleep(min(wait, max(end - time.time(), 0)))
+        return self.stats()
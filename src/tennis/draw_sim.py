@@ -0,0 +1,140 @@
+"""
+Simulation Monte-Carlo d'un tableau à élimination directe.
+
+Le tableau (jusqu'à 128 places, byes compris) est décrit par l'ordre des
+joueurs : la place 2k affronte la place 2k+1 au premier tour, puis les
+vainqueurs voisins se rencontrent, etc. Une matrice M (n × n) donne
+P(i bat j) ; toutes les simulations avancent ensemble, un tour entier à la
+fois : pour S simulations et m survivants, un tour est un gather M[a, b] de
+forme (S, m/2), un tirage uniforme et un np.where. Aucune boucle Python sur
+les matchs ni sur les simulations.
+
+Les simulations sont traitées par blocs pour borner la mémoire
+(≈ S × taille du tableau entiers int16).
+"""
+import csv
+from pathlib import Path
+
+import numpy as np
+
+MAX_DRAW = 128
+N_SIMS   = 100_000
+CHUNK    = 50_000
+BYE      = "bye"
+
+ROUND_NAMES = {128: "R128", 64: "R64", 32: "R32", 16: "R16", 8: "QF", 4: "SF", 2: "F", 1: "Vainqueur"}
+
+
+def read_bracket(path):
+    """
+    Joueurs dans l'ordre du tableau depuis un fichier texte (un nom par ligne)
+    ou CSV (colonne `player`/`joueur`, sinon la première). Une ligne vide ou
+    « bye » est un bye. Le tableau est complété par des byes jusqu'à une
+    puissance de 2.
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            rows = list(csv.reader(f))
+            header = [c.strip().lower() for c in rows[0]] if rows else []
+            col = next((header.index(c) for c in ("player", "joueur", "name") if c in header), None)
+            if col is None:
+                col, body = 0, rows
+            else:
+                body = rows[1:]
+            names = [r[col].strip() if len(r) > col else "" for r in body]
+        else:
+            names = [line.strip() for line in f if not line.lstrip().startswith("#")]
+    while names and not names[-1]:
+        names.pop()
+    names = [n if n and n.lower() != BYE else None for n in names]
+    if len(names) > MAX_DRAW:
+        raise ValueError(f"{path.name}: {len(names)} places (max {MAX_DRAW})")
+    size = 2
+    while size < len(names):
+        size *= 2
+    return names + [None] * (size - len(names))
+
+
+def elo_win_matrix(elo_global, elo_surface, w_surface=0.70, clip=(0.05, 0.95)):
+    """
+    P(i bat j) à partir des ELO (n,) : même mélange que l'ensemble
+    (30 % global, 70 % surface), borné à `clip`.
+    """
+    g = np.asarray(elo_global, dtype=np.float64)
+    s = np.asarray(elo_surface, dtype=np.float64)
+    p_glob = 1.0 / (1.0 + 10.0 ** ((g[None, :] - g[:, None]) / 400.0))
+    p_surf = 1.0 / (1.0 + 10.0 ** ((s[None, :] - s[:, None]) / 400.0))
+    M = np.clip((1 - w_surface) * p_glob + w_surface * p_surf, *clip)
+    np.fill_diagonal(M, 0.5)
+    return M
+
+
+def blend_win_matrix(base, other, weight):
+    """
+    Mélange log-odds de `base` avec `other` (NaN = signal absent, base gardée).
+    Le résultat reste antisymétrique : M[j, i] = 1 - M[i, j].
+    """
+    base = np.clip(np.asarray(base, dtype=np.float64), 1e-6, 1 - 1e-6)
+    other = np.asarray(other, dtype=np.float64)
+    mask = ~np.isnan(other)
+    lo = np.log(base / (1 - base))
+    oc = np.clip(np.where(mask, other, 0.5), 1e-6, 1 - 1e-6)
+    lo = np.where(mask, (1 - weight) * lo + weight * np.log(oc / (1 - oc)), lo)
+    M = 1.0 / (1.0 + np.exp(-lo))
+    M = np.triu(M, 1) + np.tril(1.0 - M.T, -1)
+    np.fill_diagonal(M, 0.5)
+    return M
+
+
+def _with_byes(M, slots):
+    """
+    Matrice étendue d'une ligne « bye » (indice n) : un joueur bat toujours un
+    bye ; deux byes donnent un bye au tour suivant.
+    """
+    n = M.shape[0]
+    E = np.empty((n + 1, n + 1), dtype=np.float32)
+    E[:n, :n] = M
+    E[:n, n] = 1.0
+    E[n, :] = 0.0
+    return E, np.array([n if s is None else s for s in slots], dtype=np.int16)
+
+
+def simulate_draw(M, slots, n_sims=N_SIMS, seed=0, chunk=CHUNK):
+    """
+    Simule `n_sims` tableaux.
+
+    M     : (n, n) P(i bat j)
+    slots : indice de joueur (0..n-1) ou None (bye) par place, longueur 2^R
+
+    Retourne reach (n, R + 1) : reach[i, r] = P(i atteint le tour r), la
+    colonne 0 étant le premier tour et la dernière le titre.
+    """
+    size = len(slots)
+    rounds = size.bit_length() - 1
+    if size < 2 or 1 << rounds != size:
+        raise ValueError("la taille du tableau doit être une puissance de 2")
+    n = M.shape[0]
+    E, start = _with_byes(M, slots)
+    counts = np.zeros((rounds + 1, n + 1), dtype=np.int64)
+    counts[0] = np.bincount(start, minlength=n + 1) * n_sims
+    rng = np.random.default_rng(seed)
+    done = 0
+    while done < n_sims:
+        s = min(chunk, n_sims - done)
+        alive = np.broadcast_to(start, (s, size))
+        for r in range(1, rounds + 1):
+            a, b = alive[:, 0::2], alive[:, 1::2]
+            alive = np.where(rng.random(a.shape, dtype=np.float32) < E[a, b], a, b)
+            counts[r] += np.bincount(alive.ravel(), minlength=n + 1)
+        done += s
+    return counts[:, :n].T / n_sims
+
+
+def round_labels(size):
+    """Libellés des colonnes de reach : ["R128", ..., "F", "Vainqueur"]."""
+    labels = []
+    while size >= 1:
+        labels.append(ROUND_NAMES.get(size, "R" + str(size)))
+        size //= 2
+    return labels
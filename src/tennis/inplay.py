@@ -0,0 +1,376 @@
+"""
+Probabilités en direct à partir du score courant.
+
+Pour un couple de probas de service (quantifiées, cf. markov.GRID) et un
+format (Bo3/Bo5), toutes les valeurs de l'espace d'états sont précalculées
+une fois par récurrence arrière et mémoïsées :
+
+- jeu       : P(serveur gagne le jeu | points)              table 5 × 5
+- tie-break : P(A gagne le TB | points, A a servi en premier)  table 8 × 8
+- match     : pour chaque début de jeu (sets, jeux, serveur) la proba de
+              victoire de A, la distribution des jeux restants (total et écart)
+              et la distribution du score final en sets
+
+Une mise à jour de score n'est ensuite qu'un mélange de deux entrées de table
+(« A gagne ce jeu / B gagne ce jeu ») : O(1), quelques microsecondes.
+
+Le flux de scores local est un fichier JSON lines suivi en tail (ScoreFeed) ;
+LiveBoard maintient l'état de dizaines de matchs simultanés.
+"""
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from .markov import GRID, quantize, hold_prob
+
+POINT_NAMES = {"0": 0, "15": 1, "30": 2, "40": 3, "AD": 4, "A": 4}
+
+
+@lru_cache(maxsize=1024)
+def _game_table(q):
+    """T[a, b] = P(serveur gagne le jeu) à a-b points (normalisé : égalité = 3-3)."""
+    p = q * GRID
+    r = 1.0 - p
+    deuce = p * p / (p * p + r * r)
+    T = np.zeros((5, 5))
+    for a in range(4, -1, -1):
+        for b in range(4, -1, -1):
+            if a >= 4 and a - b >= 2:
+                T[a, b] = 1.0
+            elif b >= 4 and b - a >= 2:
+                T[a, b] = 0.0
+            elif a >= 3 and b >= 3:
+                T[a, b] = deuce if a == b else (p + r * deuce if a > b else p * deuce)
+            else:
+                T[a, b] = p * T[a + 1, b] + r * T[a, b + 1]
+    return T
+
+
+def _tb_first_serves(k):
+    """Le point k du tie-break est-il servi par celui qui a servi le premier point ?"""
+    return k == 0 or ((k - 1) // 2) % 2 == 1
+
+
+@lru_cache(maxsize=1024)
+def _tb_table(qa, qb):
+    """V[a, b] = P(A gagne le tie-break) quand A a servi le premier point (scores normalisés ≤ 7)."""
+    pa, pb = qa * GRID, qb * GRID
+    win_a, win_b = pa * (1 - pb), (1 - pa) * pb
+    deuce = win_a / (win_a + win_b)
+    V = np.zeros((9, 9))
+    for a in range(8, -1, -1):
+        for b in range(8, -1, -1):
+            if a >= 7 and a - b >= 2:
+                V[a, b] = 1.0
+            elif b >= 7 and b - a >= 2:
+                V[a, b] = 0.0
+            elif a >= 6 and b >= 6 and a == b:
+                V[a, b] = deuce
+            elif a < 8 and b < 8:
+                pw = pa if _tb_first_serves(a + b) else 1 - pb
+                V[a, b] = pw * V[a + 1, b] + (1 - pw) * V[a, b + 1]
+    return V
+
+
+def _norm_game_points(a, b):
+    if a >= 3 and b >= 3:
+        return 3 + (a > b), 3 + (b > a)
+    return min(a, 4), min(b, 4)
+
+
+def _norm_tb_points(a, b):
+    # -2 / -2 conserve l'écart et le serveur (motif de service de période 4)
+    while min(a, b) >= 7:
+        a, b = a - 2, b - 2
+    return a, b
+
+
+def game_win_prob(qa, qb, points, server_a):
+    """P(A gagne le jeu en cours) — points = (points A, points B)."""
+    a, b = points
+    if server_a:
+        return float(_game_table(qa)[_norm_game_points(a, b)])
+    return 1.0 - float(_game_table(qb)[_norm_game_points(b, a)])
+
+
+def tiebreak_win_prob(qa, qb, points, server_a):
+    """P(A gagne le tie-break en cours) — `server_a` : A sert le prochain point."""
+    a, b = _norm_tb_points(*points)
+    first_is_server = _tb_first_serves(a + b)
+    a_first = server_a == first_is_server
+    if a_first:
+        return float(_tb_table(qa, qb)[a, b])
+    return 1.0 - float(_tb_table(qb, qa)[b, a])
+
+
+def _set_over(ga, gb):
+    return (ga >= 6 and ga - gb >= 2) or (gb >= 6 and gb - ga >= 2) or ga == 7 or gb == 7
+
+
+@lru_cache(maxsize=256)
+def match_state_tables(qa, qb, best_of=3):
+    """
+    Tables de l'espace d'états au début de chaque jeu.
+
+    Retourne (values, set_scores) où values[(sets A, sets B, jeux A, jeux B, A sert)]
+    = (P(A gagne), dist. jeux restants (L,), dist. écart restant (2L-1,), dist. score final en sets).
+    """
+    need = best_of // 2 + 1
+    L = 13 * best_of + 1                # jeux max d'un match (tous les sets à 7-6)
+    set_scores = [(need, b) for b in range(need)] + [(a, need) for a in range(need)]
+    score_idx = {s: i for i, s in enumerate(set_scores)}
+    ha, hb = hold_prob(qa * GRID), hold_prob(qb * GRID)
+    tb_a_first = _tb_table(qa, qb)[0, 0]
+    tb_b_first = 1.0 - _tb_table(qb, qa)[0, 0]
+    memo = {}
+
+    def terminal(sa, sb):
+        tot = np.zeros(L); tot[0] = 1.0
+        diff = np.zeros(2 * L - 1); diff[L - 1] = 1.0
+        sets = np.zeros(len(set_scores)); sets[score_idx[(sa, sb)]] = 1.0
+        return (1.0 if sa == need else 0.0, tot, diff, sets)
+
+    def after_game(v, a_won):
+        p, tot, diff, sets = v
+        tot = np.concatenate(([0.0], tot[:-1]))
+        diff = np.concatenate((diff[1:], [0.0])) if not a_won else np.concatenate(([0.0], diff[:-1]))
+        return p, tot, diff, sets
+
+    def mix(w, va, vb):
+        return tuple(w * x + (1 - w) * y for x, y in zip(va, vb))
+
+    def val(sa, sb, ga, gb, srv_a):
+        key = (sa, sb, ga, gb, srv_a)
+        if key in memo:
+            return memo[key]
+        if sa == need or sb == need:
+            memo[key] = terminal(sa, sb)
+            return memo[key]
+        if ga == 6 and gb == 6:
+            # Tie-break : compte comme un jeu, le set suivant commence par l'autre serveur
+            w = tb_a_first if srv_a else tb_b_first
+            res = mix(w, after_game(val(sa + 1, sb, 0, 0, not srv_a), True),
+                      after_game(val(sa, sb + 1, 0, 0, not srv_a), False))
+        else:
+            w = ha if srv_a else 1.0 - hb
+            res = mix(w, after_game(_next(sa, sb, ga + 1, gb, not srv_a), True),
+                      after_game(_next(sa, sb, ga, gb + 1, not srv_a), False))
+        memo[key] = res
+        return res
+
+    def _next(sa, sb, ga, gb, srv_a):
+        if _set_over(ga, gb):
+            return val(sa + (ga > gb), sb + (gb > ga), 0, 0, srv_a)
+        return val(sa, sb, ga, gb, srv_a)
+
+    for sa in range(need):
+        for sb in range(need):
+            for srv_a in (True, False):
+                val(sa, sb, 0, 0, srv_a)
+    for v in memo.values():
+        for arr in v[1:]:
+            arr.setflags(write=False)
+    return memo, set_scores
+
+
+def parse_points(points, tiebreak):
+    """
+    (« 30 », « 40 ») ou (2, 3) → entiers ; en tie-break les points sont déjà des entiers.
+    ValueError si le score est illisible ou si le jeu (tie-break) est déjà terminé.
+    """
+    points = tuple(points)
+    if len(points) != 2:
+        raise ValueError(f"points invalides : {points!r}")
+    out = []
+    for p in points:
+        if isinstance(p, str) and not tiebreak and not p.strip().isdigit():
+            name = p.strip().upper()
+            if name not in POINT_NAMES:
+                raise ValueError(f"point inconnu : {p!r}")
+            out.append(POINT_NAMES[name])
+        elif isinstance(p, str) and not tiebreak:
+            if p.strip() not in POINT_NAMES:
+                raise ValueError(f"point inconnu : {p!r}")
+            out.append(POINT_NAMES[p.strip()])
+        else:
+            v = int(p)
+            if v < 0:
+                raise ValueError(f"point negatif : {p!r}")
+            out.append(v)
+    a, b = out
+    end = 7 if tiebreak else 4
+    if max(a, b) >= end and abs(a - b) >= 2:
+        raise ValueError(f"jeu deja termine : {points!r}")
+    return a, b
+
+
+def parse_server(server):
+    """« p1 » / « p2 », ou 0 / 1 (1 = p2) → True si J1 sert ; ValueError sinon."""
+    if isinstance(server, str) and server.strip().lower() in ("p1", "p2"):
+        return server.strip().lower() == "p1"
+    if type(server) is int and server in (0, 1):
+        return server == 0
+    raise ValueError(f"serveur invalide : {server!r}")
+
+
+def inplay_distribution(qa, qb, best_of, sets, games, points=(0, 0), server_a=True):
+    """
+    Distributions conditionnelles au score courant.
+
+    sets   : scores (jeux A, jeux B) des sets terminés, ex. [(6, 4), (3, 6)]
+    games  : jeux du set en cours ; points : points du jeu (ou du tie-break) en cours
+    Retourne un dict compatible markov.prob_total_over / prob_handicap :
+    {"p_win", "sets", "total_games", "game_diff", "diff_offset"} (jeux depuis le début du match).
+    """
+    values, set_scores = match_state_tables(qa, qb, best_of)
+    L = 13 * best_of + 1
+    need = best_of // 2 + 1
+    sets = [tuple(s) for s in sets]
+    ga, gb = games
+    if _set_over(ga, gb):
+        # Set terminé mais pas encore reporté dans `sets` : le jeu suivant ouvre un set
+        sets, ga, gb, points = sets + [(ga, gb)], 0, 0, (0, 0)
+    sa = sum(1 for a, b in sets if a > b)
+    sb = len(sets) - sa
+    played_a = sum(a for a, _ in sets) + ga
+    played_b = sum(b for _, b in sets) + gb
+    if sa > need or sb > need or (sa == need and sb == need):
+        raise ValueError(f"score en sets impossible en Bo{best_of} : {sets!r}")
+    if sa == need or sb == need:
+        return _decided(sa, sb, played_a, played_b, L, set_scores)
+
+    tiebreak = ga == 6 and gb == 6
+    if tiebreak:
+        w = tiebreak_win_prob(qa, qb, points, server_a)
+        # Au prochain set, sert celui qui a reçu le premier point du tie-break
+        k = sum(_norm_tb_points(*points))
+        first_a = server_a == _tb_first_serves(k)
+        nxt_a = values[(sa + 1, sb, 0, 0, not first_a)]
+        nxt_b = values[(sa, sb + 1, 0, 0, not first_a)]
+    else:
+        w = game_win_prob(qa, qb, points, server_a)
+        def nxt(ga2, gb2):
+            if _set_over(ga2, gb2):
+                return values[(sa + (ga2 > gb2), sb + (gb2 > ga2), 0, 0, not server_a)]
+            return values[(sa, sb, ga2, gb2, not server_a)]
+        nxt_a, nxt_b = nxt(ga + 1, gb), nxt(ga, gb + 1)
+
+    played = played_a + played_b + 1             # le jeu en cours sera terminé
+    total = np.zeros(played + L)
+    total[played:] = w * nxt_a[1] + (1 - w) * nxt_b[1]
+    d0 = played_a - played_b
+    n_diff = 2 * (played + L) - 1
+    off = played + L - 1
+    diff = np.zeros(n_diff)
+    lo = off + d0 - (L - 1)
+    diff[lo + 1:lo + 1 + 2 * L - 1] += w * nxt_a[2]
+    diff[lo - 1:lo - 1 + 2 * L - 1] += (1 - w) * nxt_b[2]
+    sets_final = w * nxt_a[3] + (1 - w) * nxt_b[3]
+    return {"p_win": float(w * nxt_a[0] + (1 - w) * nxt_b[0]),
+            "sets": {s: float(p) for s, p in zip(set_scores, sets_final)},
+            "total_games": total, "game_diff": diff, "diff_offset": off}
+
+
+def _decided(sa, sb, played_a, played_b, L, set_scores):
+    """Distribution dégénérée d'un match terminé (score final connu)."""
+    played = played_a + played_b
+    total = np.zeros(played + L)
+    total[played] = 1.0
+    off = played + L - 1
+    diff = np.zeros(2 * (played + L) - 1)
+    diff[off + played_a - played_b] = 1.0
+    return {"p_win": 1.0 if sa > sb else 0.0,
+            "sets": {s: float(s == (sa, sb)) for s in set_scores},
+            "total_games": total, "game_diff": diff, "diff_offset": off}
+
+
+class ScoreFeed:
+    """
+    Flux de scores local : fichier JSON lines suivi en tail (une ligne = un point).
+    Seules les lignes complètes ajoutées depuis le dernier poll() sont lues.
+    """
+
+    def __init__(self, path, offset=0):
+        self.path = Path(path)
+        self.offset = offset
+
+    def poll(self):
+        if not self.path.exists():
+            return []
+        if self.path.stat().st_size < self.offset:      # fichier tronqué / recréé
+            self.offset = 0
+        events = []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        self.offset += end
+        return events
+
+
+class LiveBoard:
+    """
+    État en direct de plusieurs matchs.
+
+    register() fixe les forces au service d'avant-match (déjà ancrées sur la
+    proba de l'ensemble) ; update() applique un évènement de score et retourne
+    la distribution à jour.
+    """
+
+    def __init__(self):
+        self.matches = {}
+        self.rejected = 0               # évènements ignorés (score invalide)
+        self.last_error = None
+
+    def register(self, match_id, pa, pb, best_of=3, **info):
+        qa, qb = quantize(pa), quantize(pb)
+        match_state_tables(qa, qb, best_of)              # précalcul (mémoïsé)
+        self.matches[match_id] = {"qa": qa, "qb": qb, "best_of": best_of, **info,
+                                  "state": None, "dist": None, "updated": None}
+
+    def update(self, event):
+        """
+        event = {"match_id", "sets": [[6, 4]], "games": [2, 1], "points": ["30", "15"],
+                 "server": "p1" | "p2"} → distribution (None si match inconnu).
+        ValueError si l'évènement est incohérent (points, serveur, score en sets).
+        """
+        m = self.matches.get(event.get("match_id"))
+        if m is None:
+            return None
+        games = tuple(int(g) for g in event.get("games", (0, 0)))
+        if len(games) != 2 or min(games) < 0:
+            raise ValueError(f"jeux invalides : {games!r}")
+        tiebreak = games == (6, 6)
+        points = parse_points(event.get("points", (0, 0)), tiebreak)
+        server_a = parse_server(event.get("server", "p1"))
+        sets = [(int(a), int(b)) for a, b in event.get("sets", [])]
+        t0 = time.perf_counter()
+        m["dist"] = inplay_distribution(m["qa"], m["qb"], m["best_of"], sets, games, points, server_a)
+        m["compute_us"] = round((time.perf_counter() - t0) * 1e6, 1)
+        m["state"] = {"sets": sets, "games": games, "points": points, "server_a": server_a}
+        m["updated"] = event.get("ts") or time.time()
+        return m["dist"]
+
+    def apply(self, events):
+        """
+        Applique une liste d'évènements ; retourne les ids mis à jour.
+        Un évènement invalide est compté dans `rejected` et ignoré, sans perdre le reste du lot.
+        """
+        done = []
+        for e in events:
+            try:
+                if self.update(e) is not None:
+                    done.append(e.get("match_id"))
+            except (ValueError, TypeError, KeyError, IndexError) as exc:
+                self.rejected += 1
+                self.last_error = f"{e.get('match_id') if isinstance(e, dict) else '?'}: {exc}"
+        return done
@@ -0,0 +1,221 @@
+"""
+Modèle de Markov hiérarchique point → jeu → tie-break → set → match.
+
+Chaque joueur est résumé par sa proba de gagner un point sur son service.
+En supposant les points i.i.d. (hypothèse classique de Newton & Keller), on
+obtient des distributions exactes :
+
+- jeu     : forme fermée (avec égalités)
+- tie-break : DP sur le score jusqu'à 6-6, puis forme fermée des mini-breaks
+- set     : DP sur (jeux A, jeux B) avec alternance du service, tie-break à 6-6
+- match   : DP sur (sets A, sets B, serveur du 1er jeu du set) portant la
+            distribution jointe (jeux totaux A, jeux totaux B)
+
+Les tables sont mémoïsées sur une grille quantifiée (pas GRID) des probas de
+service : une requête est un accès cache dès que le couple a déjà été vu.
+Un tie-break classique (7 points) est joué à 6-6 dans tous les sets.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+GRID = 0.005
+SERVE_MIN, SERVE_MAX = 0.40, 0.90
+DEFAULT_SERVE = 0.62            # moyenne circuit ATP des points gagnés au service
+
+
+def quantize(p):
+    """Indice entier de la grille pour une proba de service."""
+    return int(round(min(max(float(p), SERVE_MIN), SERVE_MAX) / GRID))
+
+
+def hold_prob(p):
+    """Proba que le serveur gagne son jeu (points gagnés au service = p)."""
+    q = 1.0 - p
+    return p ** 4 * (1 + 4 * q + 10 * q ** 2) + 20 * p ** 3 * q ** 3 * p ** 2 / (1 - 2 * p * q)
+
+
+def _tb_server_is_a(k):
+    """Le point k (0-indexé) du tie-break est servi par A si A sert en premier : A, BB, AA, BB..."""
+    return k == 0 or ((k - 1) // 2) % 2 == 1
+
+
+def tiebreak_prob(pa, pb, target=7):
+    """Proba que A gagne le tie-break en servant le premier point."""
+    # Après (target-1)-(target-1), chaque paire de points contient un service de chaque joueur
+    win_a, win_b = pa * (1 - pb), (1 - pa) * pb
+    deuce = win_a / (win_a + win_b)
+    P = np.zeros((target + 1, target + 1))
+    P[0, 0] = 1.0
+    total = 0.0
+    for k in range(2 * target - 2):
+        for a in range(max(0, k - target + 1), min(k, target - 1) + 1):
+            b = k - a
+            if b >= target or P[a, b] == 0.0:
+                continue
+            pw = pa if _tb_server_is_a(k) else 1 - pb
+            if a + 1 == target:
+                total += P[a, b] * pw
+            else:
+                P[a + 1, b] += P[a, b] * pw
+            if b + 1 < target:
+                P[a, b + 1] += P[a, b] * (1 - pw)
+    return total + P[target - 1, target - 1] * deuce
+
+
+def _set_dist(pa, pb):
+    """
+    Distribution des scores d'un set quand A sert le premier jeu :
+    tableau (8, 8) indexé [jeux A, jeux B] (scores terminaux uniquement).
+    """
+    ha, hb = hold_prob(pa), hold_prob(pb)
+    P = np.zeros((8, 8))
+    out = np.zeros((8, 8))
+    P[0, 0] = 1.0
+    for k in range(12):
+        for a in range(max(0, k - 6), min(k, 6) + 1):
+            b = k - a
+            m = P[a, b]
+            if m == 0.0:
+                continue
+            pw = ha if k % 2 == 0 else 1 - hb
+            for na, nb, pr in ((a + 1, b, pw), (a, b + 1, 1 - pw)):
+                if (na == 6 and nb <= 4) or (nb == 6 and na <= 4) or na == 7 or nb == 7:
+                    out[na, nb] += m * pr
+                else:
+                    P[na, nb] += m * pr
+    # 6-6 : 13e jeu = tie-break, servi d'abord par A (12 jeux joués, nombre pair)
+    t = tiebreak_prob(pa, pb)
+    out[7, 6] += P[6, 6] * t
+    out[6, 7] += P[6, 6] * (1 - t)
+    return out
+
+
+def _match_tables(pa, pb, best_of):
+    sets_to_win = best_of // 2 + 1
+    G = 7 * best_of + 1
+    outcomes = []
+    for first_a in (True, False):
+        d = _set_dist(pa, pb) if first_a else _set_dist(pb, pa).T
+        ga, gb = np.nonzero(d)
+        outcomes.append([(int(a), int(b), float(d[a, b])) for a, b in zip(ga, gb)])
+
+    # état : (sets A, sets B, A sert le 1er jeu du set) → masse (G, G) sur (jeux A, jeux B)
+    states = {(0, 0, True): np.zeros((G, G)), (0, 0, False): np.zeros((G, G))}
+    states[(0, 0, True)][0, 0] = 0.5          # tirage au sort du premier serveur
+    states[(0, 0, False)][0, 0] = 0.5
+    final = {}
+    for n_sets in range(2 * sets_to_win - 1):
+        nxt = {}
+        for (sa, sb, first_a), M in states.items():
+            for ga, gb, pr in outcomes[0 if first_a else 1]:
+                a_won = ga > gb
+                key = (sa + a_won, sb + (not a_won))
+                # Le service alterne en continu : le set suivant change de serveur si le nombre de jeux est impair
+                nfirst = first_a if (ga + gb) % 2 == 0 else not first_a
+                shifted = np.zeros((G, G))
+                shifted[ga:, gb:] = M[:G - ga, :G - gb] * pr
+                if sets_to_win in key:
+                    final[key] = final.get(key, 0) + shifted
+                else:
+                    k = key + (nfirst,)
+                    nxt[k] = nxt[k] + shifted if k in nxt else shifted
+        states = nxt
+    return final
+
+
+@lru_cache(maxsize=8192)
+def match_distribution_q(qa, qb, best_of=3):
+    """
+    Distributions exactes pour des probas de service quantifiées (indices de grille).
+
+    Retourne {"p_win", "sets": {(sets A, sets B): p}, "total_games": (n,),
+    "game_diff": (2n-1,), "diff_offset"} — game_diff[d + diff_offset] = P(jeux A - jeux B = d).
+    """
+    pa, pb = qa * GRID, qb * GRID
+    final = _match_tables(pa, pb, best_of)
+    sets_to_win = best_of // 2 + 1
+    joint = sum(final.values())
+    G = joint.shape[0]
+    idx_a, idx_b = np.indices(joint.shape)
+    total = np.bincount((idx_a + idx_b).ravel(), weights=joint.ravel(), minlength=2 * G - 1)
+    diff = np.bincount((idx_a - idx_b + G - 1).ravel(), weights=joint.ravel(), minlength=2 * G - 1)
+    sets = {k: float(v.sum()) for k, v in sorted(final.items())}
+    for arr in (total, diff):
+        arr.setflags(write=False)
+    return {"p_win": sum(p for (sa, _), p in sets.items() if sa == sets_to_win),
+            "sets": sets, "total_games": total, "game_diff": diff, "diff_offset": G - 1}
+
+
+def match_distribution(pa, pb, best_of=3):
+    """Comme match_distribution_q, à partir de probas de service brutes (arrondies à la grille)."""
+    return match_distribution_q(quantize(pa), quantize(pb), best_of)
+
+
+def _anchor_bracket(qa, qb, target, best_of, max_shift):
+    """
+    Décalages de grille (lo, hi, w) tels que P(A gagne) avec (qa + k, qb - k)
+    encadre `target` ; w = poids d'interpolation de hi (0 ou 1 si hors bornes).
+    """
+    kmax = int(round(max_shift / GRID))
+    q_min, q_max = quantize(SERVE_MIN), quantize(SERVE_MAX)
+    lo = max(-kmax, q_min - qa, qb - q_max)
+    hi = min(kmax, q_max - qa, qb - q_min)
+
+    def p_win(k):
+        return match_distribution_q(qa + k, qb - k, best_of)["p_win"]
+
+    if p_win(lo) >= target:
+        return lo, lo, 0.0
+    if p_win(hi) <= target:
+        return hi, hi, 0.0
+    while hi - lo > 1:                          # P(A gagne) croît avec k
+        mid = (lo + hi) // 2
+        if p_win(mid) < target:
+            lo = mid
+        else:
+            hi = mid
+    return lo, hi, (target - p_win(lo)) / (p_win(hi) - p_win(lo))
+
+
+def anchored_serves(pa, pb, target, best_of=3, max_shift=0.15):
+    """Probas de service (sur la grille) décalées de ±δ pour reproduire P(A gagne) = target."""
+    qa, qb = quantize(pa), quantize(pb)
+    lo, hi, w = _anchor_bracket(qa, qb, target, best_of, max_shift)
+    k = hi if w >= 0.5 else lo
+    return (qa + k) * GRID, (qb - k) * GRID
+
+
+def anchored_distribution(pa, pb, target, best_of=3, max_shift=0.15):
+    """
+    Distribution cohérente avec une proba de victoire `target` (ex. l'ensemble).
+
+    Les probas de service sont décalées de ±δ (A + δ, B - δ) jusqu'à ce que
+    P(A gagne) = target : recherche dichotomique sur les pas de grille, puis
+    interpolation linéaire entre les deux tables voisines.
+    """
+    qa, qb = quantize(pa), quantize(pb)
+    lo, hi, w = _anchor_bracket(qa, qb, target, best_of, max_shift)
+    a = match_distribution_q(qa + lo, qb - lo, best_of)
+    if hi == lo:
+        return a
+    b = match_distribution_q(qa + hi, qb - hi, best_of)
+    return {"p_win": target,
+            "sets": {k: (1 - w) * a["sets"].get(k, 0.0) + w * b["sets"].get(k, 0.0)
+                     for k in sorted(a["sets"].keys() | b["sets"].keys())},
+            "total_games": (1 - w) * a["total_games"] + w * b["total_games"],
+            "game_diff": (1 - w) * a["game_diff"] + w * b["game_diff"],
+            "diff_offset": a["diff_offset"]}
+
+
+def prob_total_over(dist, line):
+    """P(jeux totaux > line) (line en .5)."""
+    t = dist["total_games"]
+    return float(t[int(np.floor(line)) + 1:].sum())
+
+
+def prob_handicap(dist, line):
+    """P(jeux A - jeux B + line > 0), ex. line = -3.5 → A gagne d'au moins 4 jeux."""
+    d = dist["game_diff"]
+    start = dist["diff_offset"] + int(np.floor(-line)) + 1
+    return float(d[max(start, 0):].sum())
@@ -0,0 +1,73 @@
+"""
+Fixtures communes : serveur HTTP local remplaçant les API externes.
+"""
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class StandIn:
+    """
+    Serveur HTTP/1.1 local. `handler(server, path, body)` est appelé pour
+    chaque POST (corps JSON décodé) et retourne (code, objet JSON) ou
+    (code, liste de fragments bytes envoyés en chunked).
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+                stand_in.requests.append((self.path, body))
+                code, out = stand_in.handler(stand_in, self.path, body)
+                self.send_response(code)
+                if isinstance(out, list):
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for part in out:
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    data = json.dumps(out).encode()
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05},
+                         daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stand_in():
+    """Fabrique de serveurs locaux, arrêtés en fin de test."""
+    servers = []
+
+    def make(handler):
+        servers.append(StandIn(handler))
+        return servers[-1]
+    yield make
+    for s in servers:
+        s.close()
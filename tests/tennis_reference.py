@@ -0,0 +1,99 @@
+"""
+Référence point par point pour les tests des modèles de Markov tennis.
+
+Récursion directe sur chaque point, égalités tronquées au-delà de MAX_POINTS
+(masse résiduelle < 1e-11 pour des probas de service ≤ 0.8). Aucune forme
+fermée ni table partagée avec src/tennis : sert de vérité de terrain.
+"""
+from functools import lru_cache
+
+MAX_POINTS = 150
+
+
+@lru_cache(maxsize=None)
+def game(p, a=0, b=0):
+    """P(le serveur gagne le jeu) depuis a-b (points du serveur, du relanceur)."""
+    if a >= 4 and a - b >= 2:
+        return 1.0
+    if b >= 4 and b - a >= 2:
+        return 0.0
+    if a + b > MAX_POINTS:
+        return 0.5
+    return p * game(p, a + 1, b) + (1 - p) * game(p, a, b + 1)
+
+
+def tb_first_serves(k):
+    """Le point k du tie-break est servi par le premier serveur : A, BB, AA, BB..."""
+    return k == 0 or ((k - 1) // 2) % 2 == 1
+
+
+@lru_cache(maxsize=None)
+def tiebreak(pa, pb, a=0, b=0, a_first=True):
+    """P(A gagne le tie-break) depuis a-b ; `a_first` : A a servi le premier point."""
+    if a >= 7 and a - b >= 2:
+        return 1.0
+    if b >= 7 and b - a >= 2:
+        return 0.0
+    if a + b > MAX_POINTS:
+        return 0.5
+    pw = pa if tb_first_serves(a + b) == a_first else 1 - pb
+    return pw * tiebreak(pa, pb, a + 1, b, a_first) + (1 - pw) * tiebreak(pa, pb, a, b + 1, a_first)
+
+
+def _set_over(ga, gb):
+    return (ga >= 6 and ga - gb >= 2) or (gb >= 6 and gb - ga >= 2) or ga == 7 or gb == 7
+
+
+def _add(out, dist, w, shift):
+    for k, v in dist.items():
+        out[k + shift] = out.get(k + shift, 0.0) + w * v
+
+
+@lru_cache(maxsize=None)
+def _from_game_start(pa, pb, need, sa, sb, ga, gb, a_serves):
+    """(P(A gagne), {jeux restants: proba}) au début d'un jeu."""
+    if sa == need:
+        return 1.0, {0: 1.0}
+    if sb == need:
+        return 0.0, {0: 1.0}
+    return _after_current(pa, pb, need, sa, sb, ga, gb, a_serves, (0, 0))
+
+
+def _after_current(pa, pb, need, sa, sb, ga, gb, a_serves, points):
+    a, b = points
+    if ga == 6 and gb == 6:
+        a_first = a_serves if tb_first_serves(a + b) else not a_serves
+        w = tiebreak(pa, pb, a, b, a_first)
+        nxt_a = _from_game_start(pa, pb, need, sa + 1, sb, 0, 0, not a_first)
+        nxt_b = _from_game_start(pa, pb, need, sa, sb + 1, 0, 0, not a_first)
+    else:
+        w = game(pa, a, b) if a_serves else 1 - game(pb, b, a)
+
+        def nxt(g1, g2):
+            if _set_over(g1, g2):
+                return _from_game_start(pa, pb, need, sa + (g1 > g2), sb + (g2 > g1), 0, 0, not a_serves)
+            return _from_game_start(pa, pb, need, sa, sb, g1, g2, not a_serves)
+        nxt_a, nxt_b = nxt(ga + 1, gb), nxt(ga, gb + 1)
+    totals = {}
+    _add(totals, nxt_a[1], w, 1)
+    _add(totals, nxt_b[1], 1 - w, 1)
+    return w * nxt_a[0] + (1 - w) * nxt_b[0], totals
+
+
+def match(pa, pb, best_of=3, sets=(), games=(0, 0), points=(0, 0), a_serves=True):
+    """(P(A gagne), {jeux totaux depuis le début: proba}) depuis un score en cours."""
+    need = best_of // 2 + 1
+    sa = sum(1 for x, y in sets if x > y)
+    sb = len(sets) - sa
+    played = sum(x + y for x, y in sets) + games[0] + games[1]
+    p, rest = _after_current(pa, pb, need, sa, sb, games[0], games[1], a_serves, tuple(points))
+    return p, {played + k: v for k, v in rest.items()}
+
+
+def prematch(pa, pb, best_of=3):
+    """Avant le match, premier serveur tiré au sort."""
+    (p1, t1), (p2, t2) = match(pa, pb, best_of), match(pa, pb, best_of, a_serves=False)
+    totals = {}
+    _add(totals, t1, 0.5, 0)
+    _add(totals, t2, 0.5, 0)
+    return (p1 + p2) / 2, totals
@@ -0,0 +1,23 @@
+"""
+Instantanés dédupliqués : ordre des identifiants pris dans la même seconde.
+"""
+from datetime import datetime
+
+from src.services.backups import BackupRepo
+
+
+def test_same_second_snapshots_sort_numerically(tmp_path):
+    repo = BackupRepo(tmp_path / "repo")
+    src = tmp_path / "hist.json"
+    now = datetime(2026, 10, 1, 12, 0, 0)
+    ids = []
+    for i in range(12):
+        src.write_text(f"version {i}")
+        ids.append(repo.snapshot({"hist.json": src}, now=now)[0])
+    assert ids[2] == "20261001T120000-2" and ids[10] == "20261001T120000-10"
+    assert repo.list() == ids
+    assert repo.resolve() == ids[-1]
+    repo.prune(daily=30, weekly=52, now=now)
+    assert repo.list() == [ids[-1]]
+    (out,) = repo.restore(repo.resolve(), tmp_path / "restored")
+    assert out.read_text() == "version 11"
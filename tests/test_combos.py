@@ -0,0 +1,56 @@
+"""
+Combinés par séparation-évaluation contre l'énumération complète.
+"""
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from src.betting.combos import build_combos
+
+
+def random_legs(n_matches=9, seed=0):
+    rng = np.random.default_rng(seed)
+    legs = []
+    for m in range(n_matches):
+        p = rng.uniform(0.25, 0.8)
+        for proba, margin in ((p, rng.uniform(-0.08, 0.05)), (1 - p, rng.uniform(-0.08, 0.05))):
+            legs.append({"match": m, "proba": proba, "cote": round(1 / (proba * (1 + margin)), 2)})
+    return legs
+
+
+def brute_force(legs, min_legs, max_legs, min_edge, min_proba):
+    # Jambes de valeur seulement : une jambe p·o ≤ 1 ne peut qu'abaisser l'edge d'un combiné
+    value = [i for i, l in enumerate(legs) if l["proba"] * l["cote"] > 1]
+    out = []
+    for k in range(min_legs, max_legs + 1):
+        for idx in itertools.combinations(value, k):
+            if len({legs[i]["match"] for i in idx}) < k:
+                continue
+            P = math.prod(legs[i]["proba"] for i in idx)
+            O = math.prod(legs[i]["cote"] for i in idx)
+            if P >= min_proba and P - 1 / O > min_edge:
+                out.append((P - 1 / O, frozenset(idx)))
+    return sorted(out, key=lambda e: e[0], reverse=True)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_top_k_matches_enumeration(seed):
+    legs = random_legs(seed=seed)
+    combos, nodes = build_combos(legs, min_legs=2, max_legs=4, min_edge=0.01, min_proba=0.02, top_k=10)
+    expected = brute_force(legs, 2, 4, 0.01, 0.02)[:10]
+    assert [c["edge"] for c in combos] == pytest.approx([e for e, _ in expected])
+    assert [frozenset(c["legs"]) for c in combos] == [s for _, s in expected]
+    assert nodes < sum(math.comb(len(legs), k) for k in range(2, 5))
+
+
+def test_one_leg_per_match_and_fields():
+    legs = [{"match": 0, "proba": 0.6, "cote": 2.0}, {"match": 0, "proba": 0.45, "cote": 2.5},
+            {"match": 1, "proba": 0.5, "cote": 2.2}]
+    combos, _ = build_combos(legs, min_edge=0.0)
+    assert combos and all(len({legs[i]["match"] for i in c["legs"]}) == len(c["legs"]) for c in combos)
+    best = combos[0]
+    assert best["proba"] == pytest.approx(0.3) and best["cote"] == pytest.approx(4.4)
+    assert best["ev"] == pytest.approx(0.3 * 4.4 - 1)
+    assert best["kelly"] == pytest.approx(round(best["ev"] / 3.4 * 0.25, 4))
@@ -0,0 +1,74 @@
+"""
+Dé-margination : chaque méthode ramène la somme à 1 et respecte sa définition.
+"""
+import numpy as np
+import pytest
+
+from src.betting.devig import METHODS, devig, devig_two_way, implied, overround
+
+
+def random_markets(n=500, k=3, seed=0):
+    rng = np.random.default_rng(seed)
+    p = rng.dirichlet(np.ones(k), n) * 0.75 + 0.25 / k    # p ≤ 0.875 : cotes > 1 même avec 12 % de marge
+    margin = rng.uniform(0.0, 0.12, (n, 1))
+    return 1.0 / (p * (1.0 + margin))
+
+
+@pytest.mark.parametrize("method", METHODS)
+@pytest.mark.parametrize("k", [2, 3])
+def test_probabilities_sum_to_one(method, k):
+    p = devig(random_markets(k=k), method)
+    np.testing.assert_allclose(p.sum(axis=1), 1.0, atol=1e-9)
+    assert (p > 0).all() and (p < 1).all()
+
+
+def test_power_is_a_common_exponent():
+    odds = random_markets()
+    p = devig(odds, "power")
+    kappa = np.log(p) / np.log(implied(odds))
+    np.testing.assert_allclose(kappa, kappa[:, :1].repeat(3, axis=1), rtol=1e-8)
+
+
+def shin_bisect(pi):
+    S = pi.sum()
+
+    def probs(z):
+        return (np.sqrt(z ** 2 + 4 * (1 - z) * pi ** 2 / S) - z) / (2 * (1 - z))
+    lo, hi = 0.0, 0.99
+    for _ in range(200):
+        mid = (lo + hi) / 2
+        lo, hi = (mid, hi) if probs(mid).sum() > 1 else (lo, mid)
+    return probs(lo)
+
+
+def test_shin_matches_bisection():
+    odds = random_markets(50)
+    got = devig(odds, "shin")
+    expected = np.array([shin_bisect(implied(o)) for o in odds])
+    np.testing.assert_allclose(got, expected, atol=1e-9)
+
+
+def test_favourite_longshot_ordering():
+    # Marge plus forte sur l'outsider : power et shin donnent au favori plus que le prorata
+    odds = np.array([1.25, 4.0])
+    prop, power, shin = (devig(odds, m) for m in METHODS)
+    assert prop[0] < power[0] and prop[0] < shin[0]
+
+
+def test_fair_market_is_unchanged():
+    odds = np.array([2.0, 4.0, 4.0])
+    assert overround(odds)[0] == pytest.approx(0.0)
+    for method in METHODS:
+        np.testing.assert_allclose(devig(odds, method), [0.5, 0.25, 0.25], atol=1e-12)
+
+
+def test_invalid_market_gives_nan_row():
+    p = devig(np.array([[1.9, 2.0], [0.9, 2.0], [np.nan, 1.5]]), "shin")
+    assert not np.isnan(p[0]).any() and np.isnan(p[1:]).all()
+
+
+def test_two_way_shortcut_and_unknown_method():
+    p1, p2 = devig_two_way([1.5, 2.2], [2.6, 1.7], "proportional")
+    np.testing.assert_allclose(p1 + p2, 1.0)
+    with pytest.raises(ValueError, match="inconnue"):
+        devig([2.0, 2.0], "logit")
@@ -0,0 +1,100 @@
+"""
+Probabilités en direct : cohérence avec l'avant-match et récursion point par point.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from src.tennis.inplay import LiveBoard, ScoreFeed, inplay_distribution, parse_points, parse_server
+from src.tennis.markov import GRID, match_distribution, quantize
+from tennis_reference import match
+
+PA, PB = 0.66, 0.61
+QA, QB = quantize(PA), quantize(PB)
+
+
+def as_array(totals, n):
+    out = np.zeros(n)
+    for k, v in totals.items():
+        out[k] += v
+    return out
+
+
+@pytest.mark.parametrize("best_of", [3, 5])
+def test_zero_zero_equals_prematch(best_of):
+    pre = match_distribution(PA, PB, best_of)
+    live = [inplay_distribution(QA, QB, best_of, [], (0, 0), server_a=s) for s in (True, False)]
+    assert (live[0]["p_win"] + live[1]["p_win"]) / 2 == pytest.approx(pre["p_win"], abs=1e-9)
+    total = sum(d["total_games"] for d in live) / 2
+    n = len(total)                                # au-delà : aucun match possible (tous les sets à 7-6)
+    np.testing.assert_allclose(total, pre["total_games"][:n], atol=1e-9)
+    assert pre["total_games"][n:].sum() == pytest.approx(0.0, abs=1e-12)
+    for s, p in pre["sets"].items():
+        assert (live[0]["sets"][s] + live[1]["sets"][s]) / 2 == pytest.approx(p, abs=1e-9)
+
+
+STATES = [
+    # (best_of, sets, games, points, A sert)
+    (3, [], (0, 0), ("30", "15"), True),
+    (3, [(6, 4)], (3, 5), ("40", "AD"), False),
+    (3, [(4, 6)], (6, 6), (5, 6), True),
+    (3, [(7, 6)], (6, 6), (9, 9), False),         # tie-break long, normalisé
+    (3, [], (6, 3), (0, 0), True),                # set fini pas encore reporté dans sets
+    (5, [(6, 7), (6, 2)], (5, 5), ("15", "40"), True),
+    (5, [(6, 3), (3, 6), (7, 5), (2, 6)], (6, 6), (0, 0), False),
+]
+
+
+@pytest.mark.parametrize("best_of,sets,games,points,server_a", STATES)
+def test_matches_point_recursion(best_of, sets, games, points, server_a):
+    pts = parse_points(points, games == (6, 6))
+    dist = inplay_distribution(QA, QB, best_of, sets, games, pts, server_a)
+    if games == (6, 3):
+        sets, games, pts = sets + [games], (0, 0), (0, 0)
+    p_ref, totals = match(QA * GRID, QB * GRID, best_of, sets, games, pts, server_a)
+    assert dist["p_win"] == pytest.approx(p_ref, abs=1e-8)
+    np.testing.assert_allclose(dist["total_games"], as_array(totals, len(dist["total_games"])), atol=1e-8)
+    assert dist["game_diff"].sum() == pytest.approx(1.0)
+
+
+def test_decided_match_is_degenerate():
+    dist = inplay_distribution(QA, QB, 3, [(6, 4), (3, 6)], (7, 5))
+    assert dist["p_win"] == 1.0 and dist["sets"][(2, 1)] == 1.0
+    assert dist["total_games"][31] == 1.0
+    assert dist["game_diff"][dist["diff_offset"] + 1] == 1.0     # 16 jeux à 15
+    with pytest.raises(ValueError, match="impossible"):
+        inplay_distribution(QA, QB, 3, [(6, 4), (6, 4), (6, 4)], (0, 0))
+
+
+@pytest.mark.parametrize("points,tiebreak", [(("50", "0"), False), (("40", "0", "0"), False),
+                                             ((-1, 0), True), ((7, 4), True), (("AD", "15"), False)])
+def test_invalid_points_raise(points, tiebreak):
+    with pytest.raises(ValueError):
+        parse_points(points, tiebreak)
+
+
+def test_server_parsing():
+    assert parse_server("P1") is True and parse_server(1) is False
+    for bad in ("p3", True, 2, None):
+        with pytest.raises(ValueError):
+            parse_server(bad)
+
+
+def test_board_skips_invalid_events(tmp_path):
+    feed_file = tmp_path / "feed.jsonl"
+    board = LiveBoard()
+    board.register("m1", PA, PB)
+    events = [{"match_id": "m1", "sets": [], "games": [2, 1], "points": ["15", "0"], "server": "p1"},
+              {"match_id": "m1", "games": [2, 1], "points": ["15", "99"]},
+              {"match_id": "m1", "games": [2, 2], "points": ["0", "0"], "server": "p2"}]
+    with open(feed_file, "w") as f:
+        f.write("".join(json.dumps(e) + "\n" for e in events) + '{"match_id": "m1", "ga')   # ligne partielle
+    feed = ScoreFeed(feed_file)
+    assert board.apply(feed.poll()) == ["m1", "m1"]
+    assert board.rejected == 1 and "m1" in board.last_error
+    assert board.matches["m1"]["state"]["games"] == (2, 2)
+    with open(feed_file, "a") as f:
+        f.write('mes": [3, 2], "points": ["0", "0"], "server": "p1"}\n')
+    assert board.apply(feed.poll()) == ["m1"]
+    assert board.matches["m1"]["state"]["games"] == (3, 2)
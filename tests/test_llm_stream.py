@@ -0,0 +1,108 @@
+"""
+Parsing SSE des fournisseurs d'IA contre un serveur local en chunked.
+"""
+import json
+
+import pytest
+import requests
+
+from src.services.llm_stream import StreamError, iter_sse, stream_claude, stream_openai
+
+
+def sse(*events):
+    """Messages SSE (data seul, ou (événement, data)) encodés en fragments."""
+    out = []
+    for e in events:
+        event, data = e if isinstance(e, tuple) else (None, e)
+        if not isinstance(data, str):
+            data = json.dumps(data)
+        out.append(((f"event: {event}\n" if event else "") + f"data: {data}\n\n").encode())
+    return out
+
+
+def openai_delta(text):
+    return {"choices": [{"delta": {"content": text}}]}
+
+
+def claude_delta(text):
+    return ("content_block_delta", {"type": "content_block_delta", "delta": {"type": "text_delta", "text": text}})
+
+
+def serve(stand_in, code, out):
+    return stand_in(lambda server, path, body: (code, out))
+
+
+def test_openai_stream_stops_at_done(stand_in):
+    server = serve(stand_in, 200, sse({"choices": [{"delta": {"role": "assistant"}}]},
+                                      openai_delta("Ana"), openai_delta("lyse"),
+                                      "[DONE]", openai_delta("ignoré")))
+    chunks = list(stream_openai(requests.Session(), server.url + "/v1", "k", "m", "prompt"))
+    assert chunks == ["Ana", "lyse"]
+    path, body = server.requests[0]
+    assert path == "/v1/chat/completions"
+    assert body["stream"] is True and body["model"] == "m"
+    assert body["messages"] == [{"role": "user", "content": "prompt"}]
+
+
+def test_openai_fragments_split_across_chunks(stand_in):
+    raw = b"".join(sse(openai_delta("un "), openai_delta("deux"), "[DONE]"))
+    # Découpage arbitraire du flux : les lignes sont recomposées
+    parts = [raw[i:i + 7] for i in range(0, len(raw), 7)]
+    server = serve(stand_in, 200, parts)
+    assert "".join(stream_openai(requests.Session(), server.url, "k", "m", "p")) == "un deux"
+
+
+def test_openai_error_event_raises(stand_in):
+    server = serve(stand_in, 200, sse(openai_delta("début"), {"error": {"message": "overloaded"}}))
+    gen = stream_openai(requests.Session(), server.url, "k", "m", "p")
+    assert next(gen) == "début"
+    with pytest.raises(StreamError, match="overloaded"):
+        next(gen)
+
+
+def test_claude_stream_stops_at_message_stop(stand_in):
+    server = serve(stand_in, 200, sse(("message_start", {"type": "message_start"}),
+                                      ("content_block_start", {"type": "content_block_start"}),
+                                      claude_delta("Bon"), ("ping", {"type": "ping"}), claude_delta("jour"),
+                                      ("message_stop", {"type": "message_stop"}), claude_delta("ignoré")))
+    chunks = list(stream_claude(requests.Session(), server.url + "/v1", "k", "claude-x", "prompt"))
+    assert chunks == ["Bon", "jour"]
+    path, body = server.requests[0]
+    assert path == "/v1/messages" and body["stream"] is True
+
+
+def test_claude_error_event_raises(stand_in):
+    server = serve(stand_in, 200, sse(claude_delta("a"),
+                                      ("error", {"type": "error", "error": {"type": "overloaded_error"}})))
+    with pytest.raises(StreamError, match="overloaded_error"):
+        list(stream_claude(requests.Session(), server.url, "k", "m", "p"))
+
+
+@pytest.mark.parametrize("stream", [stream_openai, stream_claude])
+def test_non_200_raises_before_streaming(stand_in, stream):
+    server = serve(stand_in, 401, {"error": {"message": "invalid api key"}})
+    with pytest.raises(StreamError, match="401"):
+        list(stream(requests.Session(), server.url, "k", "m", "p"))
+
+
+class _Lines:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+def test_iter_sse_joins_multiline_data_and_skips_comments():
+    lines = [b": keep-alive", b"event: delta", b"data: ligne 1", b"data: ligne 2", b"",
+             b"data:sans espace", b"", b"data: fin sans ligne vide"]
+    assert list(iter_sse(_Lines(lines))) == [("delta", "ligne 1\nligne 2"), (None, "sans espace"),
+                                            (None, "fin sans ligne vide")]
+
+
+def test_multiline_data_json_over_http(stand_in):
+    # Un objet JSON réparti sur plusieurs lignes data: est reconstitué avant décodage
+    payload = json.dumps(openai_delta("multi"), indent=1).split("\n")
+    body = "".join(f"data: {line}\n" for line in payload).encode() + b"\n"
+    server = serve(stand_in, 200, [body] + sse("[DONE]"))
+    assert list(stream_openai(requests.Session(), server.url, "k", "m", "p")) == ["multi"]
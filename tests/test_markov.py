@@ -0,0 +1,50 @@
+"""
+Modèle de Markov hiérarchique contre une récursion point par point.
+"""
+import numpy as np
+import pytest
+
+from src.tennis.markov import (GRID, anchored_distribution, hold_prob, match_distribution,
+                               prob_handicap, prob_total_over, tiebreak_prob)
+from tennis_reference import game, prematch, tiebreak
+
+SERVES = [(0.62, 0.62), (0.70, 0.58), (0.55, 0.66), (0.80, 0.75)]
+
+
+@pytest.mark.parametrize("p", [0.45, 0.6, 0.75, 0.9])
+def test_hold_prob_closed_form(p):
+    assert hold_prob(p) == pytest.approx(game(p), abs=1e-9)
+
+
+@pytest.mark.parametrize("pa,pb", SERVES)
+def test_tiebreak_prob(pa, pb):
+    assert tiebreak_prob(pa, pb) == pytest.approx(tiebreak(pa, pb), abs=1e-9)
+
+
+@pytest.mark.parametrize("best_of", [3, 5])
+@pytest.mark.parametrize("pa,pb", SERVES)
+def test_match_distribution_matches_point_recursion(pa, pb, best_of):
+    dist = match_distribution(pa, pb, best_of)
+    p_ref, totals = prematch(round(pa / GRID) * GRID, round(pb / GRID) * GRID, best_of)
+    assert dist["p_win"] == pytest.approx(p_ref, abs=1e-8)
+    ref = np.zeros(len(dist["total_games"]))
+    for k, v in totals.items():
+        ref[k] += v
+    np.testing.assert_allclose(dist["total_games"], ref, atol=1e-8)
+    assert sum(dist["sets"].values()) == pytest.approx(1.0)
+    assert dist["game_diff"].sum() == pytest.approx(1.0)
+
+
+def test_symmetry_and_markets():
+    ab, ba = match_distribution(0.66, 0.60), match_distribution(0.60, 0.66)
+    assert ab["p_win"] + ba["p_win"] == pytest.approx(1.0)
+    assert prob_handicap(ab, -0.5) + prob_handicap(ba, 0.5) == pytest.approx(1.0)
+    # Le total ne dépend pas de l'ordre des joueurs
+    assert prob_total_over(ab, 21.5) == pytest.approx(prob_total_over(ba, 21.5))
+
+
+@pytest.mark.parametrize("target", [0.3, 0.5, 0.72])
+def test_anchored_distribution_hits_target(target):
+    dist = anchored_distribution(0.64, 0.62, target)
+    assert dist["p_win"] == pytest.approx(target, abs=1e-9)
+    assert dist["total_games"].sum() == pytest.approx(1.0)
@@ -0,0 +1,62 @@
+"""
+Kelly simultané : optimum vérifié par recherche exhaustive sur une grille.
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from src.betting.portfolio import (expected_log_growth, nearest_correlation, project_capped_simplex,
+                                   same_player_corr, scenarios, simultaneous_kelly)
+
+
+def test_single_bet_is_classic_kelly():
+    p, o = 0.55, 2.1
+    res = simultaneous_kelly([p], [o], max_exposure=0.5)
+    assert res["stakes"][0] == pytest.approx((p * o - 1) / (o - 1), abs=1e-5)
+
+
+def test_matches_grid_search_under_cap():
+    probs, odds, cap = [0.55, 0.40, 0.62], [2.1, 2.9, 1.75], 0.15
+    res = simultaneous_kelly(probs, odds, max_exposure=cap)
+    R, w = scenarios(probs)
+    grid = np.arange(0.0, cap + 1e-9, 0.005)
+    best = max(expected_log_growth(s, odds, R, w)
+               for s in itertools.product(grid, repeat=3) if sum(s) <= cap + 1e-12)
+    assert res["total"] <= cap + 1e-9 and (res["stakes"] >= 0).all()
+    assert res["growth"] >= best - 1e-7
+
+
+def test_fraction_scales_the_full_kelly_optimum():
+    probs, odds = [0.55, 0.48], [2.1, 2.3]
+    full = simultaneous_kelly(probs, odds, max_exposure=0.4)
+    quarter = simultaneous_kelly(probs, odds, max_exposure=0.1, fraction=0.25)
+    np.testing.assert_allclose(quarter["stakes"], full["stakes"] * 0.25, atol=1e-5)
+
+
+def test_no_value_means_no_stake():
+    res = simultaneous_kelly([0.4, 0.3], [2.0, 3.0])
+    assert res["total"] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_capped_simplex_projection():
+    v = np.array([0.5, -0.2, 0.3, 0.1])
+    s = project_capped_simplex(v, 0.4)
+    assert s.sum() == pytest.approx(0.4) and (s >= 0).all()
+    np.testing.assert_allclose(project_capped_simplex(np.array([0.1, 0.05]), 0.4), [0.1, 0.05])
+
+
+def test_indefinite_correlation_is_repaired():
+    # A=B, B=C mais A opposé à C : matrice indéfinie, Cholesky échouerait
+    C = np.array([[1.0, 0.9, -0.9], [0.9, 1.0, 0.9], [-0.9, 0.9, 1.0]])
+    assert np.linalg.eigvalsh(C).min() < 0
+    fixed, F = nearest_correlation(C)
+    assert np.linalg.eigvalsh(fixed).min() > -1e-12
+    np.testing.assert_allclose(np.diag(fixed), 1.0)
+    R, w = scenarios([0.5, 0.5, 0.5], fixed, n_scenarios=20000, seed=1)
+    assert np.corrcoef(R[:, 0], R[:, 1])[0, 1] > 0.3
+
+
+def test_same_player_corr_signs():
+    C = same_player_corr([("Sinner", "Alcaraz"), ("Sinner", "Zverev"), ("Zverev", "Sinner")], rho=0.3)
+    assert C[0, 1] == 0.3 and C[0, 2] == -0.3 and C[1, 2] == -0.3
@@ -0,0 +1,66 @@
+"""
+Compteurs matérialisés de PredictionStore face aux corrections de résultat.
+"""
+import pytest
+
+from src.services import prediction_store as ps
+from src.services.prediction_store import PredictionStore
+
+
+def pred(i, **kw):
+    return {"id": f"p{i}", "date": "2026-03-01", "surface": "Hard", "player1": "A", "player2": "B",
+            "favori": "A", "confidence": 65, "statut": "en_attente", **kw}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PredictionStore(tmp_path / "pred.db")
+
+
+def resolve(store, results):
+    for i, statut in enumerate(results):
+        store.insert(pred(i))
+        store.update(f"p{i}", statut=statut)
+
+
+def counters(store):
+    s = store.stats()
+    return {k: s.get(k, 0) for k in ("total", "statut:gagne", "statut:perdu", "statut:annule",
+                                     "statut:en_attente", "current_streak", "best_streak", "curve_points")}
+
+
+def test_correction_reverses_old_status(store):
+    resolve(store, ["gagne", "gagne", "perdu", "gagne"])
+    before = counters(store)
+    assert (before["current_streak"], before["best_streak"], before["curve_points"]) == (1, 2, 4)
+
+    store.update("p0", statut="perdu")           # gagne → perdu sur un ancien résultat
+    c = counters(store)
+    assert (c["statut:gagne"], c["statut:perdu"], c["total"]) == (2, 2, 4)
+    assert (c["current_streak"], c["best_streak"]) == (1, 1)
+    assert c["curve_points"] == before["curve_points"]
+
+    store.update("p3", statut="annule")          # le dernier résultat est annulé
+    c = counters(store)
+    assert (c["statut:gagne"], c["statut:annule"]) == (1, 1)
+    assert (c["current_streak"], c["best_streak"]) == (0, 1)
+
+
+def test_repeated_corrections_match_recompute(store):
+    resolve(store, ["gagne", "perdu", "gagne", "gagne", "perdu"])
+    for statut in ("perdu", "gagne", "perdu", "gagne", "annule", "gagne"):
+        store.update("p1", statut=statut)
+    incremental = counters(store)
+    assert incremental["curve_points"] == 5
+    assert store.aggregate("surface") == {"Hard": {"gagne": 4, "perdu": 1}}
+    rebuilt = store.recompute_stats()
+    assert {k: rebuilt.get(k, 0) for k in incremental} == incremental
+
+
+def test_curve_is_not_decimated_by_corrections(store, monkeypatch):
+    monkeypatch.setattr(ps, "CURVE_POINTS", 2)
+    resolve(store, ["gagne", "perdu", "gagne", "gagne"])      # 4 points = 2 × CURVE_POINTS
+    for statut in ("perdu", "gagne") * 3:
+        store.update("p3", statut=statut)
+    assert store.stats()["curve_step"] == 1
+    assert store.accuracy_curve() == [(1, 1), (2, 1), (3, 2), (4, 3)]
@@ -0,0 +1,172 @@
+"""
+File d'envoi Telegram contre un serveur HTTP local.
+"""
+import threading
+import time
+
+import pytest
+
+from src.services import telegram_queue as tq
+from src.services.telegram_queue import MAX_LEN, SEPARATOR, TelegramQueue
+
+
+@pytest.fixture(autouse=True)
+def fast_timings(monkeypatch):
+    monkeypatch.setattr(tq, "DIGEST_DELAY", 0.0)
+    monkeypatch.setattr(tq, "PER_CHAT_INTERVAL", 0.0)
+    monkeypatch.setattr(tq, "BACKOFF_BASE", 0.2)
+
+
+def ok():
+    return 200, {"ok": True, "result": {}}
+
+
+def scripted(*responses):
+    """Réponses successives imposées, puis 200."""
+    queue = list(responses)
+
+    def handler(server, path, body):
+        return queue.pop(0) if queue else ok()
+    return handler
+
+
+def make_queue(tmp_path, server):
+    return TelegramQueue(tmp_path / "q.db", "TOKEN", "42", api_base=server.url)
+
+
+def sent_texts(server):
+    return [body["text"] for path, body in server.requests]
+
+
+def row(q, msg_id):
+    return q._conn().execute("SELECT status, attempts, next_try, text, last_error FROM outbox WHERE id = ?",
+                             (msg_id,)).fetchone()
+
+
+def test_digest_coalesces_and_splits_at_limit(tmp_path, stand_in):
+    server = stand_in(scripted())
+    q = make_queue(tmp_path, server)
+    msgs = [f"<b>Prono {i}</b>\n" + "x" * 400 for i in range(25)]
+    for m in msgs:
+        q.enqueue(m, digest=True)
+    stats = q.flush(timeout=10)
+    assert stats.get("sent") == 25 and not stats.get("pending")
+    texts = sent_texts(server)
+    assert 1 < len(texts) < 25
+    assert all(len(t) <= MAX_LEN for t in texts)
+    # Aucun pronostic coupé ni perdu, ordre conservé
+    assert SEPARATOR.join(texts).split(SEPARATOR) == msgs
+    assert all(body["parse_mode"] == "HTML" for _, body in server.requests)
+    assert server.requests[0][0] == "/botTOKEN/sendMessage"
+
+
+def test_long_message_split_on_lines(tmp_path, stand_in):
+    server = stand_in(scripted())
+    q = make_queue(tmp_path, server)
+    text = "\n".join("ligne %04d " % i + "y" * 40 for i in range(200))
+    q.enqueue(text)
+    q.flush(timeout=10)
+    texts = sent_texts(server)
+    assert len(texts) == 3 and all(len(t) <= MAX_LEN for t in texts)
+    assert "\n".join(texts) == text
+
+
+def test_rate_limit_honours_retry_after(tmp_path, stand_in):
+    server = stand_in(scripted((429, {"ok": False, "description": "Too Many Requests: retry after 1",
+                                      "parameters": {"retry_after": 1}})))
+    q = make_queue(tmp_path, server)
+    msg_id = q.enqueue("bonjour")
+    t0 = time.time()
+    q.process_due()
+    status, attempts, next_try, _, error = row(q, msg_id)
+    assert status == "pending" and attempts == 1 and error.startswith("429")
+    assert next_try == pytest.approx(t0 + 1, abs=0.3)
+    q.flush(timeout=5)
+    assert row(q, msg_id)[0] == "sent"
+    assert len(server.requests) == 2
+
+
+def test_server_error_backs_off_exponentially(tmp_path, stand_in):
+    server = stand_in(scripted((502, {"ok": False, "description": "Bad Gateway"}),
+                               (503, {"ok": False, "description": "Unavailable"})))
+    q = make_queue(tmp_path, server)
+    msg_id = q.enqueue("bonjour")
+    t0 = time.time()
+    q.process_due()
+    assert row(q, msg_id)[:2] == ("pending", 1)
+    assert row(q, msg_id)[2] == pytest.approx(t0 + 0.2, abs=0.1)
+    time.sleep(0.25)
+    t1 = time.time()
+    q.process_due()
+    assert row(q, msg_id)[:2] == ("pending", 2)
+    assert row(q, msg_id)[2] == pytest.approx(t1 + 0.4, abs=0.1)
+    q.flush(timeout=5)
+    assert row(q, msg_id)[0] == "sent"
+
+
+def test_client_error_is_permanent(tmp_path, stand_in):
+    server = stand_in(scripted((403, {"ok": False, "description": "Forbidden: bot was blocked"})))
+    q = make_queue(tmp_path, server)
+    msg_id = q.enqueue("bonjour")
+    q.flush(timeout=5)
+    assert row(q, msg_id)[0] == "failed"
+    assert len(server.requests) == 1
+
+
+def test_parse_error_falls_back_to_plain_text(tmp_path, stand_in):
+    def handler(server, path, body):
+        if body.get("parse_mode") == "HTML":
+            return 400, {"ok": False, "description": "Bad Request: can't parse entities"}
+        return ok()
+    server = stand_in(handler)
+    q = make_queue(tmp_path, server)
+    msg_id = q.enqueue("<b>Titre</b> <i>incomplet")
+    q.flush(timeout=5)
+    assert row(q, msg_id)[0] == "sent"
+    (_, first), (_, second) = server.requests
+    assert first["parse_mode"] == "HTML"
+    assert "parse_mode" not in second and second["text"] == "Titre incomplet"
+
+
+def test_partial_send_requeues_remaining_chunks(tmp_path, stand_in):
+    calls = []
+
+    def handler(server, path, body):
+        calls.append(body["text"])
+        return (502, {"ok": False, "description": "Bad Gateway"}) if len(calls) == 2 else ok()
+    server = stand_in(handler)
+    q = make_queue(tmp_path, server)
+    text = "\n".join("ligne %04d " % i + "z" * 40 for i in range(120))    # deux morceaux
+    msg_id = q.enqueue(text)
+    chunks = tq.split_message(text)
+    assert len(chunks) == 2
+    q.process_due()
+    status, attempts, _, remaining, _ = row(q, msg_id)
+    assert (status, attempts) == ("pending", 1)
+    assert remaining == chunks[1]
+    q.flush(timeout=5)
+    assert row(q, msg_id)[0] == "sent"
+    # Le premier morceau n'est pas renvoyé
+    assert calls == [chunks[0], chunks[1], chunks[1]]
+
+
+def test_send_now_reports_errors(tmp_path, stand_in):
+    server = stand_in(scripted((401, {"ok": False, "description": "Unauthorized"})))
+    q = make_queue(tmp_path, server)
+    assert q.send_now("test") == (False, "Telegram: 401: Unauthorized")
+    assert q.send_now("test") == (True, "Envoye sur Telegram")
+    assert q.stats().get("pending") is None
+
+
+def test_throttle_is_shared_across_threads(tmp_path, stand_in, monkeypatch):
+    # send_now (thread UI) et le worker réservent leurs créneaux sous le même verrou
+    monkeypatch.setattr(tq, "PER_CHAT_INTERVAL", 0.1)
+    q = make_queue(tmp_path, stand_in(scripted()))
+    threads = [threading.Thread(target=q._throttle, args=("42",)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    slots = sorted(q._global)
+    assert len(slots) == 5
+    assert min(b - a for a, b in zip(slots, slots[1:])) >= 0.1 - 1e-6
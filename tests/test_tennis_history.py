@@ -0,0 +1,64 @@
+"""
+H2H, repos et fatigue point-in-time contre un recalcul naïf en O(n²).
+"""
+import numpy as np
+import pandas as pd
+
+from src.data.preprocess import approx_match_dates, tennis_history_features
+
+
+def random_matches(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    p1 = rng.integers(0, 12, n)
+    p2 = (p1 + rng.integers(1, 12, n)) % 12
+    dates = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D")
+    return p1, p2, pd.Series(dates), rng.random(n) < 0.5, rng.integers(1, 50, n)
+
+
+def naive(p1, p2, dates, won, order, window_days=7):
+    n = len(p1)
+    day = dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+    seq = np.lexsort((np.arange(n), order, day))
+    rank = np.empty(n, dtype=int)
+    rank[seq] = np.arange(n)
+    out = {k: np.full(n, np.nan) for k in ("h2h_p1_wins", "h2h_p2_wins", "days_since_last_p1",
+                                              "days_since_last_p2", "fatigue_p1", "fatigue_p2")}
+    for i in range(n):
+        before = [j for j in range(n) if rank[j] < rank[i]]
+        w1 = sum(1 for j in before if {p1[j], p2[j]} == {p1[i], p2[i]}
+                 and (p1[j] if won[j] else p2[j]) == p1[i])
+        w2 = sum(1 for j in before if {p1[j], p2[j]} == {p1[i], p2[i]}
+                 and (p1[j] if won[j] else p2[j]) == p2[i])
+        out["h2h_p1_wins"][i], out["h2h_p2_wins"][i] = w1, w2
+        for player, suffix in ((p1[i], "p1"), (p2[i], "p2")):
+            played = [day[j] for j in before if player in (p1[j], p2[j])]
+            out["fatigue_" + suffix][i] = sum(1 for d in played if d > day[i] - window_days)
+            if played:
+                out["days_since_last_" + suffix][i] = day[i] - max(played)
+    return pd.DataFrame(out)
+
+
+def test_matches_naive_recount():
+    p1, p2, dates, won, order = random_matches()
+    got = tennis_history_features(p1, p2, dates, won, order=order)
+    expected = naive(p1, p2, dates, won, order)
+    pd.testing.assert_frame_equal(got[expected.columns], expected, check_dtype=False)
+
+
+def test_match_num_breaks_same_day_ties():
+    # Même jour : le match 2 (match_num) voit le match 1 même s'il est plus haut dans le fichier
+    got = tennis_history_features([7, 7], [8, 8], pd.Series(pd.to_datetime(["2024-01-01"] * 2)),
+                                  [True, False], order=[2, 1])
+    assert got["h2h_p1_wins"].tolist() == [0.0, 0.0]
+    assert got["h2h_p2_wins"].tolist() == [1.0, 0.0]
+
+
+def test_approx_match_dates_follow_rounds():
+    df = pd.DataFrame({
+        "tourney_id": ["a"] * 4 + ["gs"] * 3 + ["rr"],
+        "tourney_date": pd.to_datetime(["2024-01-01"] * 4 + ["2024-01-15"] * 3 + ["2024-02-01"]),
+        "round": ["R32", "R16", "QF", "F", "R128", "R64", "F", "RR"],
+        "best_of": [3] * 4 + [5] * 3 + [3],
+    })
+    days = (approx_match_dates(df) - df["tourney_date"]).dt.days.tolist()
+    assert days == [0, 1, 2, 4, 0, 2, 12, 0]
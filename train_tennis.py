@@ -1,229 +1,466 @@
 """
 Script d'entraînement – Modèle Tennis
 Données : format TML (tourney_id, winner_rank, loser_rank, surface, stats...)
-Usage   : python train_tennis.py
-Sortie  : models/tennis_model.h5 + models/tennis_scaler.joblib
+Usage   : python train_tennis.py [--tour atp --surface Hard]
+          python train_tennis.py --finetune-since 2026-02-25 --tour atp --surface Hard
+          python train_tennis.py --finetune-since last --tour atp --surface Hard
+          python train_tennis.py --rebuild-features   (ignore le cache de features)
+          python train_tennis.py --antisymmetric      (P(A,B) = 1 - P(B,A), 1 ligne / match)
+          Un modèle dont le nombre de features diffère de FEATURES (ex: les
+          modèles 26 features de l'ancien pipeline) est réentraîné en entier.
+Sortie  : models/tennis_model[_<tour>_<surface>].h5 + models/tennis_scaler[...].joblib
+Cache   : data/feature_store/<hash>/ (X, y, dates en .npy memory-mappés)
 """
 
 import os
-import glob
+import json
+import argparse
 import numpy as np
 import pandas as pd
+from datetime import datetime
 from pathlib import Path
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, roc_auc_score
 import joblib
 
+from src.data.feature_store import FeatureStore, data_manifest, code_version, feature_key
+
 # ── TensorFlow / Keras ────────────────────────────────────────────────────────
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
 import tensorflow as tf
 from tensorflow import keras
 
+from src.models.tennis_model import build_antisymmetric_model
+
 print(f"TensorFlow {tf.__version__}")
 
 # ── Chemins ───────────────────────────────────────────────────────────────────
 ROOT_DIR   = Path(__file__).parent
 DATA_DIR   = ROOT_DIR / "src" / "data" / "raw" / "tml-tennis"
 MODELS_DIR = ROOT_DIR / "models"
+META_FILE  = MODELS_DIR / "tennis_features_meta.json"
 MODELS_DIR.mkdir(exist_ok=True)
 
-# ── 1. Chargement de tous les CSV ─────────────────────────────────────────────
-csv_files = sorted(DATA_DIR.glob("*.csv"))
-if not csv_files:
-    raise FileNotFoundError(f"Aucun CSV trouvé dans {DATA_DIR}")
-
-print(f"\n📂 {len(csv_files)} fichier(s) trouvé(s) :")
-for f in csv_files:
-    print(f"   • {f.name}")
-
-df = pd.concat([pd.read_csv(f) for f in csv_files], ignore_index=True)
-print(f"\n✅ Dataset total : {len(df)} matchs, {df.shape[1]} colonnes")
-
-# ── 2. Feature Engineering ────────────────────────────────────────────────────
-# Surface → encodage one-hot
-df["surface_hard"]  = (df["surface"] == "Hard").astype(int)
-df["surface_clay"]  = (df["surface"] == "Clay").astype(int)
-df["surface_grass"] = (df["surface"] == "Grass").astype(int)
-
-# Différence de classement (winner - loser, du point de vue joueur A)
-# On va créer 2 lignes par match : une où A=winner, une où A=loser → équilibre
-def build_balanced_dataset(df):
-    records = []
-
-    for _, row in df.iterrows():
-        w_rank = row.get("winner_rank", np.nan)
-        l_rank = row.get("loser_rank", np.nan)
-        w_pts  = row.get("winner_rank_points", np.nan)
-        l_pts  = row.get("loser_rank_points", np.nan)
-        w_age  = row.get("winner_age", np.nan)
-        l_age  = row.get("loser_age", np.nan)
-        best_of = row.get("best_of", 3)
-
-        surf_h = int(row.get("surface_hard", 0))
-        surf_c = int(row.get("surface_clay", 0))
-        surf_g = int(row.get("surface_grass", 0))
-
-        # Stats de service gagnant (si disponibles)
-        w_ace   = row.get("w_ace", np.nan)
-        w_df    = row.get("w_df", np.nan)
-        w_svpt  = row.get("w_svpt", np.nan)
-        w_1stIn = row.get("w_1stIn", np.nan)
-        w_1stWon= row.get("w_1stWon", np.nan)
-        w_bpSaved = row.get("w_bpSaved", np.nan)
-        w_bpFaced = row.get("w_bpFaced", np.nan)
-
-        l_ace   = row.get("l_ace", np.nan)
-        l_df    = row.get("l_df", np.nan)
-        l_svpt  = row.get("l_svpt", np.nan)
-        l_1stIn = row.get("l_1stIn", np.nan)
-        l_1stWon= row.get("l_1stWon", np.nan)
-        l_bpSaved = row.get("l_bpSaved", np.nan)
-        l_bpFaced = row.get("l_bpFaced", np.nan)
-
-        # % 1ère balle
-        w_1st_pct = (w_1stWon / w_1stIn) if (w_1stIn and w_1stIn > 0) else np.nan
-        l_1st_pct = (l_1stWon / l_1stIn) if (l_1stIn and l_1stIn > 0) else np.nan
-
-        # % bp sauvées
-        w_bp_pct = (w_bpSaved / w_bpFaced) if (w_bpFaced and w_bpFaced > 0) else np.nan
-        l_bp_pct = (l_bpSaved / l_bpFaced) if (l_bpFaced and l_bpFaced > 0) else np.nan
-
-        base = {
-            "surface_hard": surf_h,
-            "surface_clay": surf_c,
-            "surface_grass": surf_g,
-            "best_of": best_of,
-        }
-
-        # Observation A = winner (label 1)
-        records.append({
-            **base,
-            "rank_p1": w_rank,
-            "rank_p2": l_rank,
-            "rank_diff": (w_rank - l_rank) if (pd.notna(w_rank) and pd.notna(l_rank)) else np.nan,
-            "pts_diff": (w_pts - l_pts) if (pd.notna(w_pts) and pd.notna(l_pts)) else np.nan,
-            "age_diff": (w_age - l_age) if (pd.notna(w_age) and pd.notna(l_age)) else np.nan,
-            "ace_diff": (w_ace - l_ace) if (pd.notna(w_ace) and pd.notna(l_ace)) else np.nan,
-            "df_diff":  (w_df  - l_df)  if (pd.notna(w_df)  and pd.notna(l_df))  else np.nan,
-            "1st_pct_diff": (w_1st_pct - l_1st_pct) if (pd.notna(w_1st_pct) and pd.notna(l_1st_pct)) else np.nan,
-            "bp_pct_diff":  (w_bp_pct  - l_bp_pct)  if (pd.notna(w_bp_pct)  and pd.notna(l_bp_pct))  else np.nan,
-            "label": 1
-        })
-
-        # Observation B = loser (label 0) → symétrie
-        records.append({
-            **base,
-            "rank_p1": l_rank,
-            "rank_p2": w_rank,
-            "rank_diff": (l_rank - w_rank) if (pd.notna(l_rank) and pd.notna(w_rank)) else np.nan,
-            "pts_diff": (l_pts - w_pts) if (pd.notna(l_pts) and pd.notna(w_pts)) else np.nan,
-            "age_diff": (l_age - w_age) if (pd.notna(l_age) and pd.notna(w_age)) else np.nan,
-            "ace_diff": (l_ace - w_ace) if (pd.notna(l_ace) and pd.notna(w_ace)) else np.nan,
-            "df_diff":  (l_df  - w_df)  if (pd.notna(l_df)  and pd.notna(w_df))  else np.nan,
-            "1st_pct_diff": (l_1st_pct - w_1st_pct) if (pd.notna(l_1st_pct) and pd.notna(w_1st_pct)) else np.nan,
-            "bp_pct_diff":  (l_bp_pct  - w_bp_pct)  if (pd.notna(l_bp_pct)  and pd.notna(w_bp_pct))  else np.nan,
-            "label": 0
-        })
-
-    return pd.DataFrame(records)
-
-print("\n⚙️  Construction du dataset équilibré...")
-data = build_balanced_dataset(df)
-print(f"   Observations : {len(data)} (dont {data['label'].sum()} victoires)")
-
-# ── 3. Nettoyage ──────────────────────────────────────────────────────────────
 FEATURES = [
     "rank_diff", "pts_diff", "age_diff",
     "surface_hard", "surface_clay", "surface_grass",
     "best_of", "ace_diff", "df_diff", "1st_pct_diff", "bp_pct_diff"
 ]
+FEATURE_VERSION = "1"  # à incrémenter si la sémantique d'une feature change sans changer le code
 
-# Remplir les NaN par la médiane de chaque feature
-for feat in FEATURES:
-    median = data[feat].median()
-    data[feat] = data[feat].fillna(median)
-
-X = data[FEATURES].values
-y = data["label"].values
-
-print(f"\n📊 Features utilisées ({len(FEATURES)}) : {FEATURES}")
-
-# ── 4. Split train / test ─────────────────────────────────────────────────────
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
-print(f"\n🔀 Split : {len(X_train)} train / {len(X_test)} test")
-
-# ── 5. Normalisation ──────────────────────────────────────────────────────────
-scaler = StandardScaler()
-X_train = scaler.fit_transform(X_train)
-X_test  = scaler.transform(X_test)
-
-scaler_path = MODELS_DIR / "tennis_scaler.joblib"
-joblib.dump(scaler, scaler_path)
-print(f"💾 Scaler sauvegardé → {scaler_path}")
-
-# ── 6. Modèle ─────────────────────────────────────────────────────────────────
-model = keras.Sequential([
-    keras.layers.Input(shape=(len(FEATURES),)),
-    keras.layers.Dense(128, activation="relu"),
-    keras.layers.BatchNormalization(),
-    keras.layers.Dropout(0.3),
-    keras.layers.Dense(64, activation="relu"),
-    keras.layers.BatchNormalization(),
-    keras.layers.Dropout(0.2),
-    keras.layers.Dense(32, activation="relu"),
-    keras.layers.Dense(1, activation="sigmoid")
-])
-
-model.compile(
-    optimizer=keras.optimizers.Adam(learning_rate=0.001),
-    loss="binary_crossentropy",
-    metrics=["accuracy", keras.metrics.AUC(name="auc")]
-)
-
-model.summary()
-
-# ── 7. Entraînement ───────────────────────────────────────────────────────────
-callbacks = [
-    keras.callbacks.EarlyStopping(
-        monitor="val_auc", patience=15, restore_best_weights=True, mode="max"
-    ),
-    keras.callbacks.ReduceLROnPlateau(
-        monitor="val_loss", factor=0.5, patience=7, min_lr=1e-5
+# ── 1. Chargement de tous les CSV ─────────────────────────────────────────────
+def csv_files_for(tour=None):
+    csv_files = sorted(DATA_DIR.glob("*.csv"))
+    if tour == "atp":
+        csv_files = [f for f in csv_files if "wta" not in f.name.lower()]
+    elif tour == "wta":
+        csv_files = [f for f in csv_files if "wta" in f.name.lower()]
+    return csv_files
+
+def load_matches(tour=None, surface=None):
+    csv_files = csv_files_for(tour)
+    if not csv_files:
+        raise FileNotFoundError(f"Aucun CSV trouvé dans {DATA_DIR}")
+
+    print(f"\n📂 {len(csv_files)} fichier(s) trouvé(s) :")
+    for f in csv_files:
+        print(f"   • {f.name}")
+
+    df = pd.concat([pd.read_csv(f) for f in csv_files], ignore_index=True)
+    if surface:
+        df = df[df["surface"] == surface].reset_index(drop=True)
+    df["tourney_date"] = pd.to_datetime(df["tourney_date"].astype(str), format="%Y%m%d", errors="coerce")
+    print(f"\n✅ Dataset total : {len(df)} matchs, {df.shape[1]} colonnes")
+
+    # Surface → encodage one-hot
+    df["surface_hard"]  = (df["surface"] == "Hard").astype(int)
+    df["surface_clay"]  = (df["surface"] == "Clay").astype(int)
+    df["surface_grass"] = (df["surface"] == "Grass").astype(int)
+    return df
+
+# ── 2. Feature Engineering ────────────────────────────────────────────────────
+# Features de différence (J1 - J2) : changent de signe quand on inverse les joueurs
+DIFF_FEATURES = ["rank_diff", "pts_diff", "age_diff", "ace_diff", "df_diff", "1st_pct_diff", "bp_pct_diff"]
+ANTISYM_MASK  = [f in DIFF_FEATURES for f in FEATURES]
+
+def _col(df, name):
+    return df[name].astype(float) if name in df.columns else pd.Series(np.nan, index=df.index)
+
+def _winner_perspective(df):
+    """Une ligne par match, du point de vue du vainqueur (J1 = winner)."""
+    w_1st_in, l_1st_in = _col(df, "w_1stIn"), _col(df, "l_1stIn")
+    w_bp_f,   l_bp_f   = _col(df, "w_bpFaced"), _col(df, "l_bpFaced")
+    # % 1ère balle / % bp sauvées (NaN si dénominateur nul ou absent)
+    w_1st_pct = (_col(df, "w_1stWon") / w_1st_in).where(w_1st_in > 0)
+    l_1st_pct = (_col(df, "l_1stWon") / l_1st_in).where(l_1st_in > 0)
+    w_bp_pct  = (_col(df, "w_bpSaved") / w_bp_f).where(w_bp_f > 0)
+    l_bp_pct  = (_col(df, "l_bpSaved") / l_bp_f).where(l_bp_f > 0)
+
+    return pd.DataFrame({
+        "surface_hard":  df["surface_hard"].astype(int),
+        "surface_clay":  df["surface_clay"].astype(int),
+        "surface_grass": df["surface_grass"].astype(int),
+        "best_of":       df["best_of"] if "best_of" in df.columns else 3,
+        "tourney_date":  df["tourney_date"],
+        "rank_p1":       _col(df, "winner_rank"),
+        "rank_p2":       _col(df, "loser_rank"),
+        "rank_diff":     _col(df, "winner_rank") - _col(df, "loser_rank"),
+        "pts_diff":      _col(df, "winner_rank_points") - _col(df, "loser_rank_points"),
+        "age_diff":      _col(df, "winner_age") - _col(df, "loser_age"),
+        "ace_diff":      _col(df, "w_ace") - _col(df, "l_ace"),
+        "df_diff":       _col(df, "w_df") - _col(df, "l_df"),
+        "1st_pct_diff":  w_1st_pct - l_1st_pct,
+        "bp_pct_diff":   w_bp_pct - l_bp_pct,
+    }, index=df.index)
+
+def _swap(data, flip):
+    """Inverse J1/J2 sur les lignes `flip` (négation des diffs, échange des rangs)."""
+    data = data.copy()
+    sign = np.where(flip, -1.0, 1.0)
+    for feat in DIFF_FEATURES:
+        data[feat] = data[feat] * sign
+    r1, r2 = data["rank_p1"].to_numpy(), data["rank_p2"].to_numpy()
+    data["rank_p1"], data["rank_p2"] = np.where(flip, r2, r1), np.where(flip, r1, r2)
+    return data
+
+# On crée 2 lignes par match : une où A=winner, une où A=loser → équilibre
+def build_balanced_dataset(df):
+    w = _winner_perspective(df).reset_index(drop=True)
+    w["label"] = 1
+    l = _swap(w, np.ones(len(w), dtype=bool))
+    l["label"] = 0
+    # Entrelacement winner / loser pour chaque match (même ordre que l'historique)
+    return pd.concat([w, l]).sort_index(kind="stable").reset_index(drop=True)
+
+# Variante antisymétrique : 1 ligne par match, orientation tirée au hasard
+def build_oriented_dataset(df, seed=42):
+    w = _winner_perspective(df).reset_index(drop=True)
+    flip = np.random.default_rng(seed).random(len(w)) < 0.5
+    data = _swap(w, flip)
+    data["label"] = (~flip).astype(int)
+    return data
+
+# ── 3. Modèle ─────────────────────────────────────────────────────────────────
+def build_model(n_features):
+    model = keras.Sequential([
+        keras.layers.Input(shape=(n_features,)),
+        keras.layers.Dense(128, activation="relu"),
+        keras.layers.BatchNormalization(),
+        keras.layers.Dropout(0.3),
+        keras.layers.Dense(64, activation="relu"),
+        keras.layers.BatchNormalization(),
+        keras.layers.Dropout(0.2),
+        keras.layers.Dense(32, activation="relu"),
+        keras.layers.Dense(1, activation="sigmoid")
+    ])
+
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        loss="binary_crossentropy",
+        metrics=["accuracy", keras.metrics.AUC(name="auc")]
+    )
+    return model
+
+# ── Artefacts & métadonnées ───────────────────────────────────────────────────
+def model_key(tour=None, surface=None):
+    """Clé des résultats dans tennis_features_meta.json (ex: atp_Hard)."""
+    return f"{tour}_{surface}" if tour and surface else "default"
+
+def artifact_paths(key):
+    suffix = "" if key == "default" else "_" + key
+    return (MODELS_DIR / f"tennis_model{suffix}.h5",
+            MODELS_DIR / f"tennis_scaler{suffix}.joblib")
+
+def load_meta():
+    if not META_FILE.exists():
+        return {"features": FEATURES, "n_features": len(FEATURES), "results": {}}
+    with open(META_FILE) as f:
+        return json.load(f)
+
+def save_meta(meta):
+    meta["last_update"] = datetime.now().strftime("%Y-%m-%d")
+    with open(META_FILE, "w") as f:
+        json.dump(meta, f, indent=2)
+
+def brier_score(y_true, y_proba):
+    return float(np.mean((np.asarray(y_proba, dtype=float) - np.asarray(y_true, dtype=float)) ** 2))
+
+# ── Cache de features ─────────────────────────────────────────────────────────
+def build_features(tour=None, surface=None, antisymmetric=False):
+    """Charge les CSV et construit X (NaN conservés), y et la date de chaque ligne."""
+    df = load_matches(tour, surface)
+    if antisymmetric:
+        print("\n⚙️  Construction du dataset orienté (1 ligne / match)...")
+        data = build_oriented_dataset(df)
+    else:
+        print("\n⚙️  Construction du dataset équilibré...")
+        data = build_balanced_dataset(df)
+    return {
+        "X": data[FEATURES].to_numpy(dtype=np.float64),
+        "y": data["label"].to_numpy(dtype=np.int8),
+        "dates": data["tourney_date"].to_numpy(dtype="datetime64[D]"),
+    }
+
+def load_features(tour=None, surface=None, antisymmetric=False, rebuild=False):
+    """
+    Retourne les features depuis le cache si (manifest CSV, code, features)
+    n'a pas changé — seul un stat() par CSV est nécessaire sur un hit.
+    """
+    store = FeatureStore()
+    key = feature_key(
+        data_manifest(csv_files_for(tour)),
+        code_version(load_matches, _winner_perspective, _swap, build_balanced_dataset,
+                     build_oriented_dataset, build_features, version=FEATURE_VERSION),
+        FEATURES, tour=tour, surface=surface, antisymmetric=antisymmetric,
+    )
+    builder = lambda: build_features(tour, surface, antisymmetric)
+    if rebuild:
+        store.save(key, builder(), tour=tour, surface=surface)
+        arrays, hit = store.load(key), False
+    else:
+        arrays, hit = store.get_or_build(key, builder, tour=tour, surface=surface)
+    print(f"\n{'⚡ Cache de features (hit)' if hit else '💾 Cache de features (construit)'} : {key}")
+    print(f"   Observations : {len(arrays['y'])} (dont {int(arrays['y'].sum())} victoires)")
+    return arrays
+
+# ── 4. Entraînement complet ───────────────────────────────────────────────────
+def _impute(X, fill, antisymmetric=False):
+    """Remplace les NaN par `fill` (0 pour les diffs en mode antisymétrique)."""
+    X = np.array(X, dtype=np.float64)
+    fill = np.asarray(fill, dtype=np.float64).copy()
+    if antisymmetric:
+        fill[np.asarray(ANTISYM_MASK)] = 0.0  # 0 = pas d'info, reste vrai après inversion J1/J2
+    nan_rows, nan_cols = np.where(np.isnan(X))
+    X[nan_rows, nan_cols] = fill[nan_cols]
+    return X
+
+def train_full(arrays, key, antisymmetric=False):
+    y = np.asarray(arrays["y"])
+
+    # Nettoyage : remplir les NaN par la médiane de chaque feature (conservée pour le fine-tuning)
+    median = np.nanmedian(arrays["X"], axis=0)
+    X = _impute(arrays["X"], median, antisymmetric)
+
+    print(f"\n📊 Features utilisées ({len(FEATURES)}) : {FEATURES}")
+
+    # Split train / test
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    print(f"\n🔀 Split : {len(X_train)} train / {len(X_test)} test")
+
+    # Normalisation
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X_train)
+    X_test  = scaler.transform(X_test)
+
+    model_path, scaler_path = artifact_paths(key)
+    joblib.dump(scaler, scaler_path)
+    print(f"💾 Scaler sauvegardé → {scaler_path}")
+
+    if antisymmetric:
+        model = build_antisymmetric_model(scaler, ANTISYM_MASK)
+    else:
+        model = build_model(len(FEATURES))
+    model.summary()
+
+    callbacks = [
+        keras.callbacks.EarlyStopping(
+            monitor="val_auc", patience=15, restore_best_weights=True, mode="max"
+        ),
+        keras.callbacks.ReduceLROnPlateau(
+            monitor="val_loss", factor=0.5, patience=7, min_lr=1e-5
+        )
+    ]
+
+    print("\n🚀 Entraînement...")
+    model.fit(
+        X_train, y_train,
+        validation_split=0.15,
+        epochs=150,
+        batch_size=64,
+        callbacks=callbacks,
+        verbose=1
     )
-]
 
-print("\n🚀 Entraînement...")
-history = model.fit(
-    X_train, y_train,
-    validation_split=0.15,
-    epochs=150,
-    batch_size=64,
-    callbacks=callbacks,
-    verbose=1
-)
-
-# ── 8. Évaluation ─────────────────────────────────────────────────────────────
-print("\n📈 Évaluation sur le jeu de test :")
-loss, acc, auc = model.evaluate(X_test, y_test, verbose=0)
-print(f"   Loss     : {loss:.4f}")
-print(f"   Accuracy : {acc:.4f} ({acc*100:.1f}%)")
-print(f"   AUC      : {auc:.4f}")
-
-y_pred = (model.predict(X_test, verbose=0) > 0.5).astype(int).flatten()
-print("\n📋 Rapport de classification :")
-print(classification_report(y_test, y_pred, target_names=["Défaite", "Victoire"]))
-
-# ── 9. Sauvegarde du modèle ───────────────────────────────────────────────────
-model_path = MODELS_DIR / "tennis_model.h5"
-model.save(str(model_path))
-print(f"\n✅ Modèle sauvegardé → {model_path}")
-
-# ── 10. Résumé des features pour config.yaml ─────────────────────────────────
-print("\n📝 Copiez ces features dans config/config.yaml :")
-print("tennis:")
-print("  features:")
-for f in FEATURES:
-    print(f"    - {f}")
+    # Évaluation
+    print("\n📈 Évaluation sur le jeu de test :")
+    loss, acc, auc = model.evaluate(X_test, y_test, verbose=0)
+    y_proba = model.predict(X_test, verbose=0).flatten()
+    brier = brier_score(y_test, y_proba)
+    print(f"   Loss     : {loss:.4f}")
+    print(f"   Accuracy : {acc:.4f} ({acc*100:.1f}%)")
+    print(f"   AUC      : {auc:.4f}")
+    print(f"   Brier    : {brier:.4f}")
+
+    y_pred = (y_proba > 0.5).astype(int)
+    print("\n📋 Rapport de classification :")
+    print(classification_report(y_test, y_pred, target_names=["Défaite", "Victoire"]))
+
+    # Sauvegarde du modèle
+    model.save(str(model_path))
+    print(f"\n✅ Modèle sauvegardé → {model_path}")
+
+    meta = load_meta()
+    # Le jeu de features de tête décrit le dernier entraînement complet
+    meta["features"], meta["n_features"] = FEATURES, len(FEATURES)
+    meta.setdefault("results", {})[key] = {
+        "accuracy": float(acc), "auc": float(auc), "brier": brier,
+        "n_train": int(len(X_train)), "n_test": int(len(X_test)),
+        "last_finetuned": str(_max_date(arrays["dates"])),
+        "status": "trained",
+        "architecture": "antisymmetric" if antisymmetric else "mlp",
+        "n_features": len(FEATURES),
+        "impute_median": [None if np.isnan(v) else float(v) for v in median],
+    }
+    save_meta(meta)
+
+    # Résumé des features pour config.yaml
+    print("\n📝 Copiez ces features dans config/config.yaml :")
+    print("tennis:")
+    print("  features:")
+    for f in FEATURES:
+        print(f"    - {f}")
+
+# ── 5. Fine-tuning incrémental ────────────────────────────────────────────────
+def _max_date(dates):
+    return np.max(dates[~np.isnat(dates)])
+
+def _prepare(X, scaler, fill, antisymmetric=False):
+    """Impute les NaN comme à l'entraînement complet (médiane) puis normalise."""
+    return scaler.transform(_impute(X, fill, antisymmetric))
+
+def _match_ids(n_rows, antisymmetric=False):
+    """Match de chaque ligne : build_balanced_dataset entrelace winner / loser (2 lignes adjacentes)."""
+    return np.arange(n_rows) // (1 if antisymmetric else 2)
+
+def finetune(arrays, key, since, epochs=5, replay_ratio=1.0, holdout=0.2, seed=42, antisymmetric=False):
+    """
+    Met à jour le modèle existant avec les matchs postérieurs à `since`.
+
+    - les matchs récents sont découpés chronologiquement : les plus anciens
+      servent à l'entraînement, les `holdout` derniers à la validation ; la
+      coupe se fait par match, les deux lignes d'un match restent du même côté
+    - un échantillon d'anciens matchs (replay) est mélangé à l'entraînement
+      pour limiter l'oubli catastrophique
+    - le nouveau modèle n'est promu que si le Brier sur le holdout s'améliore
+    """
+    model_path, scaler_path = artifact_paths(key)
+    if not model_path.exists() or not scaler_path.exists():
+        raise FileNotFoundError(f"{model_path.name} / {scaler_path.name} absents — lancez d'abord un entraînement complet")
+
+    model  = keras.models.load_model(str(model_path))
+    scaler = joblib.load(scaler_path)
+    if model.input_shape[-1] != len(FEATURES) or scaler.n_features_in_ != len(FEATURES):
+        # Modèles livrés par l'ancien pipeline (26 features) : non fine-tunables, on les reconstruit
+        print(f"\n⚠️  {model_path.name} attend {model.input_shape[-1]} features, ce script en produit "
+              f"{len(FEATURES)} — entraînement complet de '{key}' à la place du fine-tuning")
+        train_full(arrays, key, antisymmetric=antisymmetric)
+        return True
+
+    X, y, dates = arrays["X"], np.asarray(arrays["y"]), np.asarray(arrays["dates"])
+    since = np.datetime64(since, "D")
+    valid = np.flatnonzero(~np.isnat(dates))
+    order = valid[np.argsort(dates[valid], kind="stable")]
+    new_idx = order[dates[order] > since]
+    old_idx = order[dates[order] <= since]
+    if len(new_idx) < 10:
+        print(f"\nℹ️  {len(new_idx)} nouvelle(s) observation(s) depuis {since} — rien à faire")
+        return False
+
+    match = _match_ids(len(y), antisymmetric)
+    new_matches = pd.unique(match[new_idx])        # ordre chronologique
+    cut = int(len(new_matches) * (1 - holdout))
+    in_hold = np.isin(match[new_idx], new_matches[cut:])
+    train_idx, hold_idx = new_idx[~in_hold], new_idx[in_hold]
+    # Replay tiré par match, comme le holdout : les lignes d'un match restent ensemble
+    old_matches = np.unique(match[old_idx])
+    n_replay = min(len(old_matches), int(len(np.unique(match[train_idx])) * replay_ratio))
+    rng = np.random.default_rng(seed)
+    replay_matches = rng.choice(old_matches, size=n_replay, replace=False) if n_replay else old_matches[:0]
+    replay_idx = old_idx[np.isin(match[old_idx], replay_matches)]
+    print(f"\n🔁 Fine-tuning '{key}' depuis {since} : "
+          f"{len(train_idx)} nouvelles + {len(replay_idx)} replay / {len(hold_idx)} holdout")
+
+    # Médiane de l'entraînement complet ; à défaut (modèle plus ancien), celle des anciens matchs
+    fill = load_meta().get("results", {}).get(key, {}).get("impute_median")
+    if fill is None:
+        fill = np.nanmedian(X[old_idx] if len(old_idx) else X, axis=0)
+
+    ft_idx = np.concatenate([train_idx, replay_idx])
+    X_ft, y_ft     = _prepare(X[ft_idx], scaler, fill, antisymmetric), y[ft_idx]
+    X_hold, y_hold = _prepare(X[hold_idx], scaler, fill, antisymmetric), y[hold_idx]
+
+    brier_before = brier_score(y_hold, model.predict(X_hold, verbose=0).flatten())
+
+    candidate = keras.models.clone_model(model)
+    candidate.set_weights(model.get_weights())
+    candidate.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=1e-4),
+        loss="binary_crossentropy",
+        metrics=["accuracy", keras.metrics.AUC(name="auc")]
+    )
+    candidate.fit(X_ft, y_ft, epochs=epochs, batch_size=64, shuffle=True, verbose=0)
+
+    y_proba = candidate.predict(X_hold, verbose=0).flatten()
+    brier_after = brier_score(y_hold, y_proba)
+    print(f"   Brier holdout : {brier_before:.4f} → {brier_after:.4f}")
+
+    if brier_after >= brier_before:
+        print("   ⏭️  Pas d'amélioration — modèle existant conservé")
+        return False
+
+    candidate.save(str(model_path))
+    meta = load_meta()
+    res = meta.setdefault("results", {}).setdefault(key, {})
+    res.update({
+        "accuracy": float(np.mean((y_proba > 0.5) == y_hold)),
+        "auc": float(roc_auc_score(y_hold, y_proba)),
+        "brier": brier_after,
+        "n_finetune": int(len(ft_idx)),
+        "n_test": int(len(hold_idx)),
+        "last_finetuned": str(dates[new_idx].max()),
+        "status": "finetuned",
+    })
+    save_meta(meta)
+    print(f"   ✅ Modèle promu → {model_path}")
+    return True
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Entraîne ou fine-tune le modèle tennis")
+    parser.add_argument("--tour", choices=["atp", "wta"], default=None)
+    parser.add_argument("--surface", choices=["Hard", "Clay", "Grass"], default=None)
+    parser.add_argument("--finetune-since", default=None,
+                        help="Date YYYY-MM-DD ou 'last' (dernier fine-tune enregistré)")
+    parser.add_argument("--finetune-epochs", type=int, default=5)
+    parser.add_argument("--replay-ratio", type=float, default=1.0,
+                        help="Anciens matchs rejoués par nouveau match")
+    parser.add_argument("--rebuild-features", action="store_true",
+                        help="Recalcule les features même si le cache est valide")
+    parser.add_argument("--antisymmetric", action="store_true",
+                        help="Modèle f(x) - f(-x) entraîné sur 1 ligne par match")
+    args = parser.parse_args()
+
+    key = model_key(args.tour, args.surface)
+    antisym = args.antisymmetric
+    if args.finetune_since is not None:
+        # Le fine-tuning réutilise l'architecture du modèle existant
+        antisym = load_meta().get("results", {}).get(key, {}).get("architecture") == "antisymmetric"
+    arrays = load_features(args.tour, args.surface, antisymmetric=antisym, rebuild=args.rebuild_features)
+
+    if args.finetune_since is None:
+        train_full(arrays, key, antisymmetric=antisym)
+        return
+
+    since = args.finetune_since
+    if since == "last":
+        since = load_meta().get("results", {}).get(key, {}).get("last_finetuned")
+        if not since:
+            raise SystemExit(f"Aucune date de fine-tune enregistrée pour '{key}'")
+    finetune(arrays, key, since, epochs=args.finetune_epochs,
+             replay_ratio=args.replay_ratio, antisymmetric=antisym)
+
+if __name__ == "__main__":
+    main()